@@ -0,0 +1,125 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Hashable, Optional
+
+from metrics import REGISTRY
+
+
+_ACTIVE = REGISTRY.gauge("pii_admission_active", "Requests currently holding a processing slot")
+_QUEUE_DEPTH = REGISTRY.gauge("pii_admission_queue_depth", "Requests waiting for a processing slot")
+_WAIT_SECONDS = REGISTRY.histogram(
+    "pii_admission_wait_seconds", "Time spent waiting for a processing slot"
+)
+_REJECTED = REGISTRY.counter(
+    "pii_admission_rejected_total", "Requests shed because the wait queue was full", ["reason"]
+)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(f"Server busy ({reason})")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionTicket:
+    # Returned by acquire(); release() is idempotent so a streaming response
+    # can release both when its body finishes and from a background task.
+
+    def __init__(self, controller: Optional["AdmissionController"]):
+        self._controller = controller
+
+    def release(self) -> None:
+        controller, self._controller = self._controller, None
+        if controller is not None:
+            controller._release()
+
+
+class AdmissionController:
+    # At most `max_active` requests run at once. Up to `max_queue` more wait,
+    # each user in their own FIFO, and freed slots are handed out round-robin
+    # across users so one client's burst cannot starve the others. Beyond
+    # that requests are rejected immediately. `max_active=0` disables it.
+
+    def __init__(
+        self,
+        max_active: int,
+        max_queue: int,
+        max_queue_per_user: int,
+        retry_after_seconds: int,
+    ):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.retry_after_seconds = retry_after_seconds
+        self._active = 0
+        self._queued = 0
+        self._waiting: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+        _ACTIVE.set_function(lambda: self._active)
+        _QUEUE_DEPTH.set_function(lambda: self._queued)
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def queue_depth(self) -> int:
+        return self._queued
+
+    async def acquire(self, key: Hashable) -> AdmissionTicket:
+        if self.max_active <= 0:
+            return AdmissionTicket(None)
+        if self._active < self.max_active and not self._queued:
+            self._active += 1
+            _WAIT_SECONDS.observe(0.0)
+            return AdmissionTicket(self)
+
+        if self._queued >= self.max_queue:
+            _REJECTED.inc(reason="queue_full")
+            raise AdmissionRejected(self.retry_after_seconds, "queue full")
+        waiters = self._waiting.get(key)
+        if waiters is not None and len(waiters) >= self.max_queue_per_user:
+            _REJECTED.inc(reason="user_queue_full")
+            raise AdmissionRejected(self.retry_after_seconds, "too many queued requests")
+
+        future = asyncio.get_running_loop().create_future()
+        if waiters is None:
+            waiters = self._waiting[key] = deque()
+        waiters.append(future)
+        self._queued += 1
+        started = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the client went away.
+                self._release()
+            else:
+                self._discard(key, future)
+            raise
+        _WAIT_SECONDS.observe(time.perf_counter() - started)
+        return AdmissionTicket(self)
+
+    def _discard(self, key: Hashable, future: asyncio.Future) -> None:
+        waiters = self._waiting.get(key)
+        if waiters is None or future not in waiters:
+            return
+        waiters.remove(future)
+        self._queued -= 1
+        if not waiters:
+            del self._waiting[key]
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter, taking users in turn.
+        while self._waiting:
+            key, waiters = next(iter(self._waiting.items()))
+            future = waiters.popleft()
+            self._queued -= 1
+            if waiters:
+                self._waiting.move_to_end(key)
+            else:
+                del self._waiting[key]
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Deque, List, Optional, Sequence, Tuple
+
+from db import RedactionLogData
+from metrics import REGISTRY
+
+
+logger = logging.getLogger(__name__)
+
+_QUEUE_DEPTH = REGISTRY.gauge("pii_audit_queue_depth", "Redaction log events waiting to be written")
+_LAG_SECONDS = REGISTRY.histogram(
+    "pii_audit_lag_seconds", "Time from a redaction log event being queued to being written"
+)
+_WRITTEN = REGISTRY.counter("pii_audit_written_total", "Redaction log events written")
+_DROPPED = REGISTRY.counter(
+    "pii_audit_dropped_total", "Redaction log events dropped because the queue was full"
+)
+_FAILED = REGISTRY.counter(
+    "pii_audit_failed_total", "Redaction log events lost to failed database writes"
+)
+
+
+class AuditWriter:
+    # Takes redaction log events off the request path. Events are queued in
+    # memory and written with one bulk insert once `batch_size` are waiting or
+    # the oldest has waited `flush_interval` seconds. When the queue holds
+    # `max_queue` events, submit() waits up to `enqueue_timeout` seconds for
+    # room (backpressure) and then drops the event. stop() flushes whatever
+    # is still queued.
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[RedactionLogData]], Awaitable[int]],
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        enqueue_timeout: float = 0.1,
+    ):
+        self.write_batch = write_batch
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._pending: Deque[Tuple[RedactionLogData, float]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        _QUEUE_DEPTH.set_function(lambda: len(self._pending))
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._stopping
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def submit(self, event: RedactionLogData) -> bool:
+        # False means the writer is not running and the caller should write
+        # the event itself. A dropped event still returns True.
+        if not self.running:
+            return False
+        loop = asyncio.get_running_loop()
+        if len(self._pending) >= self.max_queue and self.enqueue_timeout > 0:
+            deadline = loop.time() + self.enqueue_timeout
+            while len(self._pending) >= self.max_queue:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._space.clear()
+                try:
+                    await asyncio.wait_for(self._space.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        if len(self._pending) >= self.max_queue:
+            _DROPPED.inc()
+            return True
+        # Rows keep the time of the request rather than of the flush.
+        if event.created_at is None:
+            event = replace(event, created_at=datetime.now(timezone.utc))
+        self._pending.append((event, loop.time()))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def submit_many(self, events: Sequence[RedactionLogData]) -> bool:
+        if not self.running:
+            return False
+        for event in events:
+            await self.submit(event)
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending or not self._stopping:
+            if self._pending and not self._stopping and len(self._pending) < self.batch_size:
+                wait = self._pending[0][1] + self.flush_interval - loop.time()
+            elif self._pending:
+                wait = 0
+            else:
+                wait = self.flush_interval
+            if wait > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                if not self._pending or (
+                    not self._stopping
+                    and len(self._pending) < self.batch_size
+                    and self._pending[0][1] + self.flush_interval > loop.time()
+                ):
+                    continue
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            self._space.set()
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[RedactionLogData, float]]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await self.write_batch([event for event, _ in batch])
+            written = batch
+        except Exception:
+            if len(batch) == 1:
+                _FAILED.inc()
+                logger.exception("Writing a redaction log event failed")
+                return
+            # One bad row fails the whole insert; retry each event on its own
+            # so only the ones that still fail are lost.
+            logger.warning("Writing %d redaction log events failed; retrying one at a time", len(batch))
+            written = []
+            for item in batch:
+                try:
+                    await self.write_batch([item[0]])
+                except Exception:
+                    _FAILED.inc()
+                    logger.exception("Writing a redaction log event failed")
+                else:
+                    written.append(item)
+        now = loop.time()
+        _WRITTEN.inc(len(written))
+        for _, queued_at in written:
+            _LAG_SECONDS.observe(now - queued_at)
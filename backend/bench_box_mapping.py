@@ -0,0 +1,86 @@
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from main import _find_matching_indices, _pii_word_indices
+from word_table import WordTable
+
+
+_VOCAB = ["Name", "Address", "Road", "Chennai", "India", "Date", "Invoice", "Total", "the", "of"]
+
+
+def _synthetic_document(pages: int, words_per_page: int, seed: int) -> Tuple[str, WordTable]:
+    rng = random.Random(seed)
+    page_texts = []
+    tables = []
+    offset = 0
+    for page in range(pages):
+        words = [rng.choice(_VOCAB) for _ in range(words_per_page)]
+        data = {
+            "text": words,
+            "left": [(i % 20) * 50 for i in range(len(words))],
+            "top": [(i // 20) * 20 for i in range(len(words))],
+            "width": [45] * len(words),
+            "height": [15] * len(words),
+        }
+        table = WordTable.from_tesseract(data, page, 0)
+        table.shift_offsets(offset)
+        text = " ".join(words)
+        page_texts.append(text)
+        tables.append(table)
+        offset += len(text) + 2
+    return "\n\n".join(page_texts), WordTable.concat(tables)
+
+
+def _synthetic_pii(text: str, words: WordTable, count: int, seed: int) -> List[dict]:
+    rng = random.Random(seed)
+    items = []
+    for _ in range(count):
+        first = rng.randrange(len(words) - 3)
+        last = first + rng.randrange(1, 3)
+        start = int(words.start[first])
+        end = int(words.end[last])
+        items.append({"type": "PERSON", "value": text[start:end], "start": start, "end": end})
+    return items
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - began)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--pii-per-page", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'words':>8} {'pii':>6} {'legacy_ms':>12} {'offset_ms':>12} {'speedup':>9}")
+    for pages in args.pages:
+        text, words = _synthetic_document(pages, args.words_per_page, args.seed)
+        pii_items = _synthetic_pii(text, words, pages * args.pii_per_page, args.seed)
+
+        legacy = _time(
+            lambda: [_find_matching_indices(words, item["value"]) for item in pii_items],
+            args.repeat,
+        )
+        offset = _time(
+            lambda: [_pii_word_indices(words, item) for item in pii_items],
+            args.repeat,
+        )
+        print(
+            f"{pages:>6} {len(words):>8} {len(pii_items):>6} "
+            f"{legacy * 1000:>12.2f} {offset * 1000:>12.2f} {legacy / max(offset, 1e-9):>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, List
+
+
+def _configure(args) -> None:
+    # Settings must be in the environment before config/db are imported.
+    if args.url:
+        os.environ["DB_URL"] = args.url
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="pii-db-load-"), "load.db")
+        os.environ["DB_URL"] = f"sqlite:///{path}"
+    os.environ["DB_ASYNC"] = "true"
+    os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+    os.environ["WORKERS_IO_POOL_SIZE"] = str(args.io_threads)
+    # Every lookup should reach the database.
+    os.environ["APP_TOKEN_CACHE_SIZE"] = "0"
+
+
+async def _drive(call: Callable[[], Awaitable], concurrency: int, total: int) -> List[float]:
+    latencies: List[float] = []
+    remaining = iter(range(total))
+
+    async def client() -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies
+
+
+def _report(label: str, latencies: List[float], elapsed: float) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{label:<12} {len(ordered) / elapsed:>9.0f} req/s"
+        f"   p50 {statistics.median(ordered) * 1000:>7.2f} ms"
+        f"   p99 {p99 * 1000:>7.2f} ms"
+    )
+
+
+async def _run(args) -> None:
+    import db
+    from workers import run_io
+
+    db.init_db()
+    name = f"load-{os.getpid()}"
+    db.create_user(name, "L0ad!test-pass")
+    token = db.login_user(name, "L0ad!test-pass")["token"]
+    event = db.RedactionLogData(
+        user_id=None,
+        username=name,
+        filename="load.txt",
+        content_type="text/plain",
+        size_bytes=1,
+        total_pii=1,
+        pii_counts={"EMAIL": 1},
+    )
+    await db.start_async_db()
+
+    workloads = {
+        "token": (
+            lambda: run_io(db.get_user_by_token, token),
+            lambda: db.get_user_by_token_async(token),
+        ),
+        "log": (
+            lambda: run_io(db.log_redactions, [event]),
+            lambda: db.log_redactions_async([event]),
+        ),
+    }
+    sync_call, async_call = workloads[args.workload]
+    print(
+        f"{args.workload} workload, {args.requests} requests, concurrency {args.concurrency}, "
+        f"{db.get_engine().url.get_backend_name()}"
+    )
+    for mode in args.modes:
+        call = sync_call if mode == "sync" else async_call
+        await _drive(call, args.concurrency, min(args.requests, 50))
+        started = time.perf_counter()
+        latencies = await _drive(call, args.concurrency, args.requests)
+        _report(mode, latencies, time.perf_counter() - started)
+    await db.stop_async_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare thread-pool and async database access under concurrent load."
+    )
+    parser.add_argument("--url", default=None, help="DB_URL to test (default: a temporary sqlite file)")
+    parser.add_argument("--workload", choices=("token", "log"), default="token")
+    parser.add_argument("--modes", nargs="+", choices=("sync", "async"), default=["sync", "async"])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--io-threads", type=int, default=8)
+    args = parser.parse_args()
+
+    _configure(args)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
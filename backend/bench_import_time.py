@@ -0,0 +1,73 @@
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+# Modules the API must not import until a request (or warmup) needs them.
+HEAVY_MODULES = (
+    "spacy",
+    "cv2",
+    "pytesseract",
+    "pdf2image",
+    "reportlab",
+    "docx",
+    "chromadb",
+    "openai",
+)
+
+
+def _run(module: str) -> Tuple[Dict[str, int], List[str]]:
+    # Returns cumulative microseconds per module from `python -X importtime`,
+    # plus the heavy modules that ended up loaded.
+    code = (
+        f"import {module}, sys; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=here,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        cumulative[name] = max(cumulative.get(name, 0), int(cumulative_us))
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return cumulative, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Track import time of the API modules.")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail when slower than this")
+    args = parser.parse_args()
+
+    runs = [_run(args.module) for _ in range(max(1, args.repeat))]
+    # The fastest run is the least disturbed by the rest of the machine.
+    best, loaded = min(runs, key=lambda run: run[0].get(args.module, 0))
+    total_ms = best.get(args.module, 0) / 1000
+
+    print(f"import {args.module}: {total_ms:.1f} ms (best of {len(runs)})")
+    print(f"{'cumulative_ms':>14}  module")
+    ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative_us in ranked[: args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}  {name}")
+    print(f"heavy modules loaded: {', '.join(loaded) if loaded else 'none'}")
+
+    if loaded or (args.max_ms is not None and total_ms > args.max_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
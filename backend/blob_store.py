@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Iterable, Optional
+
+from encryption import decrypt_bytes, encrypt_bytes
+
+
+# Bump when the shape or meaning of cached results changes.
+RESULT_VERSION = 3
+
+_BLOB_NAME = re.compile(r"^(?P<sha>[0-9a-f]{64})(?P<enc>\.enc)?(?P<ext>\.[a-z0-9]+)$")
+
+
+def blob_name(sha256: str, ext: str, encrypted: bool) -> str:
+    # Encrypted and plain copies of the same bytes are kept apart so toggling
+    # encryption never serves a blob in the wrong format.
+    return f"{sha256}{'.enc' if encrypted else ''}{ext}"
+
+
+def config_fingerprint(config) -> str:
+    # Everything that changes what processing produces for the same bytes.
+    settings = {
+        "version": RESULT_VERSION,
+        "use_preprocess": config.use_preprocess,
+        "pdf_dpi": config.pdf_dpi,
+        "classify_documents": config.classify_documents,
+        "region_ocr": config.region_ocr,
+        "ner_model_path": config.ner_model_path,
+        "enable_rag_stub": config.enable_rag_stub,
+    }
+    encoded = json.dumps(settings, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def results_dir(uploads_dir: str) -> str:
+    path = os.path.join(uploads_dir, "results")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def result_path(uploads_dir: str, sha256: str, ext: str, fingerprint: str, encrypted: bool) -> str:
+    suffix = ".json.enc" if encrypted else ".json"
+    name = f"{sha256}-{ext.lstrip('.')}-{fingerprint}{suffix}"
+    return os.path.join(results_dir(uploads_dir), name)
+
+
+def load_result(path: str, encrypted: bool) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        if encrypted:
+            data = decrypt_bytes(data)
+        return json.loads(data.decode("utf-8"))
+    except (OSError, ValueError):
+        # A corrupt or undecryptable entry is just a cache miss.
+        return None
+
+
+def save_result(path: str, payload: dict, encrypted: bool) -> None:
+    data = json.dumps(payload).encode("utf-8")
+    if encrypted:
+        data = encrypt_bytes(data)
+    temp_path = f"{path}.part"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def collect_garbage(
+    uploads_dir: str,
+    retention_seconds: float,
+    referenced: Optional[Iterable[str]],
+    now: Optional[float] = None,
+) -> int:
+    # Removes blobs (and their cached results) untouched for the retention
+    # period whose hash no redaction log inside that period refers to.
+    # `referenced=None` means no database: age alone decides.
+    if not os.path.isdir(uploads_dir):
+        return 0
+    now = now if now is not None else time.time()
+    cutoff = now - retention_seconds
+    keep = set(referenced or ())
+    removed_hashes = set()
+    removed = 0
+    for name in os.listdir(uploads_dir):
+        match = _BLOB_NAME.match(name)
+        if not match or match.group("sha") in keep:
+            continue
+        path = os.path.join(uploads_dir, name)
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                continue
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        removed_hashes.add(match.group("sha"))
+        removed += 1
+
+    cached = os.path.join(uploads_dir, "results")
+    if removed_hashes and os.path.isdir(cached):
+        for name in os.listdir(cached):
+            if name[:64] in removed_hashes:
+                try:
+                    os.remove(os.path.join(cached, name))
+                except FileNotFoundError:
+                    pass
+    return removed
@@ -54,6 +54,8 @@ class AppConfig:
     output_dir: str
     enable_config_debug: bool
     max_upload_mb: int
+    max_batch_files: int
+    upload_spool_memory_mb: int
     enable_rag_stub: bool
     rag_vectordb_url: Optional[str]
     rag_vectordb_api_key: Optional[str]
@@ -70,18 +72,60 @@ class AppConfig:
     tesseract_cmd: Optional[str]
     use_preprocess: bool
     pdf_dpi: int
+    classify_documents: bool
+    region_ocr: bool
     ner_model_path: str
+    ner_service_socket: Optional[str]
+    ner_service_timeout_seconds: int
+    ner_service_max_batch: int
+    ner_service_max_wait_ms: int
     db_url: Optional[str]
     db_echo: bool
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout_seconds: int
+    db_pool_recycle_seconds: int
+    db_pool_pre_ping: bool
+    db_async: bool
+    db_async_url: Optional[str]
     api_token: Optional[str]
     user_token_ttl_minutes: int
     reset_token_ttl_minutes: int
+    token_cache_size: int
+    token_cache_ttl_seconds: int
     smtp_host: Optional[str]
     smtp_port: int
     smtp_user: Optional[str]
     smtp_password: Optional[str]
     smtp_from: Optional[str]
     smtp_use_tls: bool
+    process_pool_size: int
+    process_start_method: str
+    io_pool_size: int
+    batch_concurrency: int
+    job_workers: int
+    job_max_queue: int
+    job_result_ttl_minutes: int
+    job_stale_seconds: int
+    admission_max_active: int
+    admission_max_queue: int
+    admission_max_queue_per_user: int
+    admission_retry_after_seconds: int
+    stage_timing: bool
+    output_cache_mb: int
+    output_cache_ttl_seconds: int
+    storage_retention_days: int
+    storage_gc_interval_minutes: int
+    reuse_results: bool
+    idempotency_ttl_seconds: int
+    idempotency_max_entries: int
+    idempotency_max_mb: int
+    warmup_enabled: bool
+    audit_async: bool
+    audit_max_queue: int
+    audit_batch_size: int
+    audit_flush_interval_ms: int
+    audit_enqueue_timeout_ms: int
 
 
 def _load_config() -> AppConfig:
@@ -99,6 +143,10 @@ def _load_config() -> AppConfig:
             "output_dir": "outputs",
             "enable_config_debug": False,
             "max_upload_mb": 10,
+            "max_batch_files": 50,
+            "upload_spool_memory_mb": 2,
+            "output_cache_mb": 32,
+            "output_cache_ttl_seconds": 300,
             "enable_rag_stub": False,
             "rag_vectordb_url": "",
             "rag_vectordb_api_key": "",
@@ -117,18 +165,33 @@ def _load_config() -> AppConfig:
             "tesseract_cmd": r"C:\Program Files\Tesseract-OCR\tesseract.exe",
             "use_preprocess": True,
             "pdf_dpi": 200,
+            "classify_documents": True,
+            "region_ocr": False,
         },
         "ner": {
             "model_path": "custom_pii_model",
+            "service_socket": "",
+            "service_timeout_seconds": 30,
+            "service_max_batch": 32,
+            "service_max_wait_ms": 5,
         },
         "db": {
             "url": "",
             "echo": False,
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_timeout_seconds": 30,
+            "pool_recycle_seconds": 1800,
+            "pool_pre_ping": True,
+            "async": False,
+            "async_url": "",
         },
         "security": {
             "api_token": "",
             "user_token_ttl_minutes": 1440,
             "reset_token_ttl_minutes": 30,
+            "token_cache_size": 10000,
+            "token_cache_ttl_seconds": 60,
         },
         "smtp": {
             "host": "",
@@ -138,6 +201,47 @@ def _load_config() -> AppConfig:
             "from": "",
             "use_tls": True,
         },
+        "workers": {
+            "process_pool_size": 0,
+            "process_start_method": "spawn",
+            "io_pool_size": 8,
+            "batch_concurrency": 4,
+        },
+        "jobs": {
+            "workers": 2,
+            "max_queue": 100,
+            "result_ttl_minutes": 60,
+            "stale_seconds": 300,
+        },
+        "admission": {
+            "max_active": 4,
+            "max_queue": 32,
+            "max_queue_per_user": 8,
+            "retry_after_seconds": 5,
+        },
+        "metrics": {
+            "stage_timing": True,
+        },
+        "storage": {
+            "retention_days": 30,
+            "gc_interval_minutes": 60,
+            "reuse_results": True,
+        },
+        "idempotency": {
+            "ttl_seconds": 600,
+            "max_entries": 1000,
+            "max_mb": 64,
+        },
+        "warmup": {
+            "enabled": True,
+        },
+        "audit": {
+            "async": True,
+            "max_queue": 10000,
+            "batch_size": 200,
+            "flush_interval_ms": 500,
+            "enqueue_timeout_ms": 100,
+        },
     }
 
     toml_data = _read_toml(CONFIG_PATH)
@@ -148,6 +252,14 @@ def _load_config() -> AppConfig:
     db = {**defaults["db"], **toml_data.get("db", {})}
     security = {**defaults["security"], **toml_data.get("security", {})}
     smtp = {**defaults["smtp"], **toml_data.get("smtp", {})}
+    workers = {**defaults["workers"], **toml_data.get("workers", {})}
+    jobs = {**defaults["jobs"], **toml_data.get("jobs", {})}
+    admission = {**defaults["admission"], **toml_data.get("admission", {})}
+    metrics = {**defaults["metrics"], **toml_data.get("metrics", {})}
+    storage = {**defaults["storage"], **toml_data.get("storage", {})}
+    idempotency = {**defaults["idempotency"], **toml_data.get("idempotency", {})}
+    warmup = {**defaults["warmup"], **toml_data.get("warmup", {})}
+    audit = {**defaults["audit"], **toml_data.get("audit", {})}
 
     allowed_extensions = _env_list("APP_ALLOWED_EXTENSIONS", app["allowed_extensions"])
     allowed_content_types = _env_list("APP_ALLOWED_CONTENT_TYPES", app["allowed_content_types"])
@@ -155,6 +267,12 @@ def _load_config() -> AppConfig:
     output_dir = os.getenv("APP_OUTPUT_DIR", app["output_dir"])
     enable_config_debug = _env_bool("APP_ENABLE_CONFIG_DEBUG", app["enable_config_debug"])
     max_upload_mb = _env_int("APP_MAX_UPLOAD_MB", app["max_upload_mb"])
+    max_batch_files = _env_int("APP_MAX_BATCH_FILES", app["max_batch_files"])
+    upload_spool_memory_mb = _env_int("APP_UPLOAD_SPOOL_MEMORY_MB", app["upload_spool_memory_mb"])
+    output_cache_mb = _env_int("APP_OUTPUT_CACHE_MB", app["output_cache_mb"])
+    output_cache_ttl_seconds = _env_int(
+        "APP_OUTPUT_CACHE_TTL_SECONDS", app["output_cache_ttl_seconds"]
+    )
     enable_rag_stub = _env_bool("APP_ENABLE_RAG_STUB", app["enable_rag_stub"])
     rag_vectordb_url = os.getenv("RAG_VECTORDB_URL", app["rag_vectordb_url"])
     rag_vectordb_api_key = os.getenv("RAG_VECTORDB_API_KEY", app["rag_vectordb_api_key"])
@@ -172,10 +290,25 @@ def _load_config() -> AppConfig:
     tesseract_cmd = os.getenv("OCR_TESSERACT_CMD", ocr["tesseract_cmd"])
     use_preprocess = _env_bool("OCR_USE_PREPROCESS", ocr["use_preprocess"])
     pdf_dpi = _env_int("OCR_PDF_DPI", ocr["pdf_dpi"])
+    classify_documents = _env_bool("OCR_CLASSIFY_DOCUMENTS", ocr["classify_documents"])
+    region_ocr = _env_bool("OCR_REGION_OCR", ocr["region_ocr"])
 
     model_path = os.getenv("NER_MODEL_PATH", ner["model_path"])
+    ner_service_socket = os.getenv("NER_SERVICE_SOCKET", ner["service_socket"])
+    ner_service_timeout_seconds = _env_int(
+        "NER_SERVICE_TIMEOUT_SECONDS", ner["service_timeout_seconds"]
+    )
+    ner_service_max_batch = _env_int("NER_SERVICE_MAX_BATCH", ner["service_max_batch"])
+    ner_service_max_wait_ms = _env_int("NER_SERVICE_MAX_WAIT_MS", ner["service_max_wait_ms"])
     db_url = os.getenv("DB_URL", db["url"])
     db_echo = _env_bool("DB_ECHO", db["echo"])
+    db_pool_size = _env_int("DB_POOL_SIZE", db["pool_size"])
+    db_max_overflow = _env_int("DB_MAX_OVERFLOW", db["max_overflow"])
+    db_pool_timeout_seconds = _env_int("DB_POOL_TIMEOUT_SECONDS", db["pool_timeout_seconds"])
+    db_pool_recycle_seconds = _env_int("DB_POOL_RECYCLE_SECONDS", db["pool_recycle_seconds"])
+    db_pool_pre_ping = _env_bool("DB_POOL_PRE_PING", db["pool_pre_ping"])
+    db_async = _env_bool("DB_ASYNC", db["async"])
+    db_async_url = os.getenv("DB_ASYNC_URL", db["async_url"])
     api_token = os.getenv("APP_API_TOKEN", security["api_token"])
     user_token_ttl_minutes = _env_int(
         "APP_USER_TOKEN_TTL_MINUTES", security["user_token_ttl_minutes"]
@@ -183,6 +316,10 @@ def _load_config() -> AppConfig:
     reset_token_ttl_minutes = _env_int(
         "APP_RESET_TOKEN_TTL_MINUTES", security["reset_token_ttl_minutes"]
     )
+    token_cache_size = _env_int("APP_TOKEN_CACHE_SIZE", security["token_cache_size"])
+    token_cache_ttl_seconds = _env_int(
+        "APP_TOKEN_CACHE_TTL_SECONDS", security["token_cache_ttl_seconds"]
+    )
 
     smtp_host = os.getenv("SMTP_HOST", smtp["host"])
     smtp_port = _env_int("SMTP_PORT", smtp["port"])
@@ -191,6 +328,47 @@ def _load_config() -> AppConfig:
     smtp_from = os.getenv("SMTP_FROM", smtp["from"])
     smtp_use_tls = _env_bool("SMTP_USE_TLS", smtp["use_tls"])
 
+    process_pool_size = _env_int("WORKERS_PROCESS_POOL_SIZE", workers["process_pool_size"])
+    process_start_method = os.getenv(
+        "WORKERS_PROCESS_START_METHOD", workers["process_start_method"]
+    )
+    io_pool_size = _env_int("WORKERS_IO_POOL_SIZE", workers["io_pool_size"])
+    batch_concurrency = _env_int("WORKERS_BATCH_CONCURRENCY", workers["batch_concurrency"])
+
+    job_workers = _env_int("JOBS_WORKERS", jobs["workers"])
+    job_max_queue = _env_int("JOBS_MAX_QUEUE", jobs["max_queue"])
+    job_result_ttl_minutes = _env_int("JOBS_RESULT_TTL_MINUTES", jobs["result_ttl_minutes"])
+    job_stale_seconds = _env_int("JOBS_STALE_SECONDS", jobs["stale_seconds"])
+
+    admission_max_active = _env_int("ADMISSION_MAX_ACTIVE", admission["max_active"])
+    admission_max_queue = _env_int("ADMISSION_MAX_QUEUE", admission["max_queue"])
+    admission_max_queue_per_user = _env_int(
+        "ADMISSION_MAX_QUEUE_PER_USER", admission["max_queue_per_user"]
+    )
+    admission_retry_after_seconds = _env_int(
+        "ADMISSION_RETRY_AFTER_SECONDS", admission["retry_after_seconds"]
+    )
+
+    stage_timing = _env_bool("METRICS_STAGE_TIMING", metrics["stage_timing"])
+
+    storage_retention_days = _env_int("STORAGE_RETENTION_DAYS", storage["retention_days"])
+    storage_gc_interval_minutes = _env_int(
+        "STORAGE_GC_INTERVAL_MINUTES", storage["gc_interval_minutes"]
+    )
+    reuse_results = _env_bool("STORAGE_REUSE_RESULTS", storage["reuse_results"])
+
+    idempotency_ttl_seconds = _env_int("IDEMPOTENCY_TTL_SECONDS", idempotency["ttl_seconds"])
+    idempotency_max_entries = _env_int("IDEMPOTENCY_MAX_ENTRIES", idempotency["max_entries"])
+    idempotency_max_mb = _env_int("IDEMPOTENCY_MAX_MB", idempotency["max_mb"])
+
+    warmup_enabled = _env_bool("WARMUP_ENABLED", warmup["enabled"])
+
+    audit_async = _env_bool("AUDIT_ASYNC", audit["async"])
+    audit_max_queue = _env_int("AUDIT_MAX_QUEUE", audit["max_queue"])
+    audit_batch_size = _env_int("AUDIT_BATCH_SIZE", audit["batch_size"])
+    audit_flush_interval_ms = _env_int("AUDIT_FLUSH_INTERVAL_MS", audit["flush_interval_ms"])
+    audit_enqueue_timeout_ms = _env_int("AUDIT_ENQUEUE_TIMEOUT_MS", audit["enqueue_timeout_ms"])
+
     return AppConfig(
         allowed_extensions=allowed_extensions,
         allowed_content_types=allowed_content_types,
@@ -198,6 +376,8 @@ def _load_config() -> AppConfig:
         output_dir=output_dir,
         enable_config_debug=enable_config_debug,
         max_upload_mb=max_upload_mb,
+        max_batch_files=max(1, max_batch_files),
+        upload_spool_memory_mb=max(0, upload_spool_memory_mb),
         enable_rag_stub=enable_rag_stub,
         rag_vectordb_url=rag_vectordb_url if rag_vectordb_url else None,
         rag_vectordb_api_key=rag_vectordb_api_key if rag_vectordb_api_key else None,
@@ -214,18 +394,61 @@ def _load_config() -> AppConfig:
         tesseract_cmd=tesseract_cmd,
         use_preprocess=use_preprocess,
         pdf_dpi=pdf_dpi,
+        classify_documents=classify_documents,
+        region_ocr=region_ocr,
         ner_model_path=model_path,
+        ner_service_socket=ner_service_socket if ner_service_socket else None,
+        ner_service_timeout_seconds=max(1, ner_service_timeout_seconds),
+        ner_service_max_batch=max(1, ner_service_max_batch),
+        ner_service_max_wait_ms=max(0, ner_service_max_wait_ms),
         db_url=db_url if db_url else None,
         db_echo=db_echo,
+        db_pool_size=max(1, db_pool_size),
+        db_max_overflow=max(0, db_max_overflow),
+        db_pool_timeout_seconds=max(1, db_pool_timeout_seconds),
+        # -1 turns recycling off.
+        db_pool_recycle_seconds=max(-1, db_pool_recycle_seconds),
+        db_pool_pre_ping=db_pool_pre_ping,
+        db_async=db_async,
+        db_async_url=db_async_url if db_async_url else None,
         api_token=api_token if api_token else None,
         user_token_ttl_minutes=user_token_ttl_minutes,
         reset_token_ttl_minutes=reset_token_ttl_minutes,
+        token_cache_size=max(0, token_cache_size),
+        token_cache_ttl_seconds=max(0, token_cache_ttl_seconds),
         smtp_host=smtp_host if smtp_host else None,
         smtp_port=smtp_port,
         smtp_user=smtp_user if smtp_user else None,
         smtp_password=smtp_password if smtp_password else None,
         smtp_from=smtp_from if smtp_from else None,
         smtp_use_tls=smtp_use_tls,
+        process_pool_size=max(0, process_pool_size),
+        process_start_method=process_start_method,
+        io_pool_size=max(1, io_pool_size),
+        batch_concurrency=max(1, batch_concurrency),
+        job_workers=max(1, job_workers),
+        job_max_queue=max(1, job_max_queue),
+        job_result_ttl_minutes=max(1, job_result_ttl_minutes),
+        job_stale_seconds=max(1, job_stale_seconds),
+        admission_max_active=max(0, admission_max_active),
+        admission_max_queue=max(0, admission_max_queue),
+        admission_max_queue_per_user=max(1, admission_max_queue_per_user),
+        admission_retry_after_seconds=max(1, admission_retry_after_seconds),
+        stage_timing=stage_timing,
+        output_cache_mb=max(0, output_cache_mb),
+        output_cache_ttl_seconds=max(1, output_cache_ttl_seconds),
+        storage_retention_days=max(0, storage_retention_days),
+        storage_gc_interval_minutes=max(1, storage_gc_interval_minutes),
+        reuse_results=reuse_results,
+        idempotency_ttl_seconds=max(1, idempotency_ttl_seconds),
+        idempotency_max_entries=max(0, idempotency_max_entries),
+        idempotency_max_mb=max(0, idempotency_max_mb),
+        warmup_enabled=warmup_enabled,
+        audit_async=audit_async,
+        audit_max_queue=max(1, audit_max_queue),
+        audit_batch_size=max(1, audit_batch_size),
+        audit_flush_interval_ms=max(1, audit_flush_interval_ms),
+        audit_enqueue_timeout_ms=max(0, audit_enqueue_timeout_ms),
     )
 
 
@@ -1,18 +1,40 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, timezone, timedelta
-from typing import Dict, Optional
+from datetime import date, datetime, timezone, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+import base64
 import hashlib
+import json
 import secrets
 import uuid
 
 import bcrypt
 
-from sqlalchemy import JSON, Column, DateTime, Integer, String, create_engine, desc
+from sqlalchemy import (
+    JSON,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    and_,
+    create_engine,
+    desc,
+    exists,
+    func,
+    insert,
+    inspect,
+    or_,
+    select,
+)
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from config import CONFIG
+from token_cache import TokenCache
 
 Base = declarative_base()
 
@@ -28,8 +50,61 @@ class RedactionLog(Base):
     size_bytes = Column(Integer, nullable=False)
     total_pii = Column(Integer, nullable=False)
     pii_counts = Column(JSON, nullable=False)
+    content_sha256 = Column(String(64), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), nullable=False)
 
+    # One (column, id) index per /logs sort order, unscoped and per user, so
+    # keyset pages are index range scans.
+    __table_args__ = tuple(
+        Index(f"ix_redaction_logs_{prefix}{column}_id", *scope, column, "id")
+        for column in ("created_at", "size_bytes", "total_pii", "filename")
+        for prefix, scope in (("", ()), ("user_", ("user_id",)))
+    )
+
+
+class RedactionLogPii(Base):
+    # One row per PII type found in a log entry, so /logs can filter by type
+    # in SQL. created_at is copied from the log for the (pii_type, created_at)
+    # index.
+    __tablename__ = "redaction_log_pii"
+    __table_args__ = (Index("ix_redaction_log_pii_type_created", "pii_type", "created_at"),)
+
+    log_id = Column(
+        Integer, ForeignKey("redaction_logs.id", ondelete="CASCADE"), primary_key=True
+    )
+    pii_type = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class RedactionStat(Base):
+    # Daily rollup of redaction_logs, updated in the same transaction as the
+    # log rows so /logs/stats never scans the raw logs. pii_type "" holds the
+    # per-file totals (files, total_pii); other rows count the files that
+    # contained that type and how many items were found.
+    __tablename__ = "redaction_stats_daily"
+    __table_args__ = (Index("ix_redaction_stats_daily_user_day", "user_id", "day"),)
+
+    day = Column(Date, primary_key=True)
+    # 0 for uploads without a user.
+    user_id = Column(Integer, primary_key=True)
+    content_type = Column(String(255), primary_key=True)
+    pii_type = Column(String(50), primary_key=True)
+    files = Column(Integer, nullable=False)
+    pii = Column(Integer, nullable=False)
+
+
+class RedactionStatsBackfill(Base):
+    # One row, written when redaction_stats_daily is created. Log entries up
+    # to upto_log_id predate the rollup and are added by backfill_stats();
+    # later ones are counted by their writers. done_log_id moves forward in
+    # the same transaction as each backfilled batch.
+    __tablename__ = "redaction_stats_backfill"
+
+    id = Column(Integer, primary_key=True)
+    upto_log_id = Column(Integer, nullable=False)
+    done_log_id = Column(Integer, nullable=False)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -38,7 +113,7 @@ class User(Base):
     username = Column(String(150), nullable=False, unique=True)
     email = Column(String(255), nullable=True, unique=True)
     password_hash = Column(String(255), nullable=False)
-    api_token = Column(String(64), nullable=True)
+    api_token = Column(String(64), nullable=True, index=True)
     token_expires_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False)
 
@@ -54,6 +129,26 @@ class PasswordResetToken(Base):
     created_at = Column(DateTime(timezone=True), nullable=False)
 
 
+class ProcessingJob(Base):
+    __tablename__ = "processing_jobs"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, nullable=True)
+    status = Column(String(20), nullable=False, index=True)
+    stage = Column(String(50), nullable=True)
+    progress = Column(Integer, nullable=False, default=0)
+    priority = Column(Integer, nullable=False, default=0)
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(255), nullable=False)
+    params = Column(JSON, nullable=False)
+    result_path = Column(String(512), nullable=True)
+    result_media_type = Column(String(255), nullable=True)
+    error = Column(String(1000), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+
 @dataclass(frozen=True)
 class RedactionLogData:
     user_id: Optional[int]
@@ -63,33 +158,129 @@ class RedactionLogData:
     size_bytes: int
     total_pii: int
     pii_counts: Dict[str, int]
+    content_sha256: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+def _engine_options(url: str) -> dict:
+    options = {"echo": CONFIG.db_echo, "pool_pre_ping": CONFIG.db_pool_pre_ping}
+    # sqlite picks its own pool (a single connection for :memory:), which
+    # does not take the sizing arguments.
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=CONFIG.db_pool_size,
+            max_overflow=CONFIG.db_max_overflow,
+            pool_timeout=CONFIG.db_pool_timeout_seconds,
+            # MySQL drops connections idle past wait_timeout.
+            pool_recycle=CONFIG.db_pool_recycle_seconds,
+        )
+    return options
 
 
 def _get_engine():
     if not CONFIG.db_url:
         return None
-    return create_engine(CONFIG.db_url, echo=CONFIG.db_echo, future=True)
+    return create_engine(CONFIG.db_url, future=True, **_engine_options(CONFIG.db_url))
 
 
 _ENGINE = _get_engine()
 _SessionLocal = sessionmaker(bind=_ENGINE, autoflush=False, autocommit=False, future=True) if _ENGINE else None
 
 
+_TOKEN_CACHE = TokenCache(CONFIG.token_cache_size, CONFIG.token_cache_ttl_seconds)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # MySQL DATETIME and sqlite return naive values for timezone-aware columns;
+    # everything is stored in UTC.
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+# Async drivers for DB_URL backends when DB_ASYNC_URL is not set.
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# Created by start_async_db() on the serving event loop: async connections
+# belong to the loop that opened them.
+_ASYNC_ENGINE = None
+_AsyncSessionLocal = None
+
+
+def _async_url(url: str) -> str:
+    if CONFIG.db_async_url:
+        return CONFIG.db_async_url
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver known for {parsed.drivername}; set DB_ASYNC_URL")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
 def get_engine():
     return _ENGINE
 
 
+async def start_async_db() -> bool:
+    global _ASYNC_ENGINE, _AsyncSessionLocal
+    if not CONFIG.db_async or not CONFIG.db_url:
+        return False
+    url = _async_url(CONFIG.db_url)
+    # The async stack is an optional install (requirements-async.txt).
+    try:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        _ASYNC_ENGINE = create_async_engine(url, **_engine_options(url))
+    except ImportError as exc:
+        raise RuntimeError(
+            f"DB_ASYNC=true needs the async database packages ({exc}); "
+            "install them with pip install -r requirements-async.txt"
+        ) from exc
+    _AsyncSessionLocal = async_sessionmaker(_ASYNC_ENGINE, expire_on_commit=False)
+    return True
+
+
+async def stop_async_db() -> None:
+    global _ASYNC_ENGINE, _AsyncSessionLocal
+    if _ASYNC_ENGINE is None:
+        return
+    engine, _ASYNC_ENGINE, _AsyncSessionLocal = _ASYNC_ENGINE, None, None
+    await engine.dispose()
+
+
+def async_db_enabled() -> bool:
+    return _AsyncSessionLocal is not None
+
+
 def init_db() -> None:
     if not _ENGINE:
         return
-    Base.metadata.create_all(bind=_ENGINE)
+    with _ENGINE.begin() as conn:
+        new_stats = not inspect(conn).has_table(RedactionStat.__tablename__)
+        Base.metadata.create_all(bind=conn)
+        if new_stats:
+            upto = conn.execute(select(func.max(RedactionLog.id))).scalar() or 0
+            conn.execute(
+                insert(RedactionStatsBackfill).values(id=1, upto_log_id=upto, done_log_id=0)
+            )
 
 
-def log_redaction(event: RedactionLogData) -> Optional[int]:
-    if not _SessionLocal:
-        return None
-    with _SessionLocal() as session:
-        entry = RedactionLog(
+def _pii_rows(log_id: int, pii_counts: Optional[Dict[str, int]], created_at: datetime) -> List[dict]:
+    return [
+        {"log_id": log_id, "pii_type": pii_type, "count": count, "created_at": created_at}
+        for pii_type, count in (pii_counts or {}).items()
+        if count > 0
+    ]
+
+
+def _add_logs(session, events: List[RedactionLogData]) -> List[int]:
+    now = datetime.now(timezone.utc)
+    entries = [
+        RedactionLog(
             user_id=event.user_id,
             username=event.username,
             filename=event.filename,
@@ -97,12 +288,312 @@ def log_redaction(event: RedactionLogData) -> Optional[int]:
             size_bytes=event.size_bytes,
             total_pii=event.total_pii,
             pii_counts=event.pii_counts,
-            created_at=datetime.now(timezone.utc),
+            content_sha256=event.content_sha256,
+            created_at=event.created_at or now,
         )
-        session.add(entry)
+        for event in events
+    ]
+    session.add_all(entries)
+    # The flush assigns ids (in one round-trip where the driver supports
+    # multi-row RETURNING) for the per-type rows.
+    session.flush()
+    pii_rows = [
+        row
+        for entry in entries
+        for row in _pii_rows(entry.id, entry.pii_counts, entry.created_at)
+    ]
+    if pii_rows:
+        session.execute(insert(RedactionLogPii), pii_rows)
+    _add_stats(session, entries)
+    return [entry.id for entry in entries]
+
+
+_STAT_KEYS = ("day", "user_id", "content_type", "pii_type")
+
+
+def _add_stats(session, entries) -> None:
+    # entries only need user_id, content_type, total_pii, pii_counts and
+    # created_at, so log rows and column tuples both work.
+    deltas: Dict[tuple, List[int]] = {}
+
+    def add(key: tuple, pii: int) -> None:
+        delta = deltas.setdefault(key, [0, 0])
+        delta[0] += 1
+        delta[1] += pii
+
+    for entry in entries:
+        day = _as_utc(entry.created_at).date()
+        user_id = entry.user_id or 0
+        content_type = entry.content_type[:255]
+        add((day, user_id, content_type, ""), entry.total_pii)
+        for pii_type, count in (entry.pii_counts or {}).items():
+            if count > 0:
+                add((day, user_id, content_type, pii_type), count)
+    if not deltas:
+        return
+    # Sorted so concurrent writers take row locks in the same order.
+    rows = [
+        {**dict(zip(_STAT_KEYS, key)), "files": files, "pii": pii}
+        for key, (files, pii) in sorted(deltas.items())
+    ]
+    dialect = session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        stmt = upsert(RedactionStat)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(_STAT_KEYS),
+            set_={
+                "files": RedactionStat.files + stmt.excluded.files,
+                "pii": RedactionStat.pii + stmt.excluded.pii,
+            },
+        )
+        session.execute(stmt, rows)
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as upsert
+
+        stmt = upsert(RedactionStat)
+        stmt = stmt.on_duplicate_key_update(
+            files=RedactionStat.files + stmt.inserted.files,
+            pii=RedactionStat.pii + stmt.inserted.pii,
+        )
+        session.execute(stmt, rows)
+    else:
+        for row in rows:
+            stat = session.get(RedactionStat, tuple(row[key] for key in _STAT_KEYS))
+            if stat is None:
+                session.add(RedactionStat(**row))
+            else:
+                stat.files += row["files"]
+                stat.pii += row["pii"]
+        session.flush()
+
+
+def backfill_stats(batch_size: int = 1000) -> int:
+    # Adds the log entries that predate redaction_stats_daily to it, up to the
+    # id init_db() recorded when it created the table. Safe to re-run.
+    if not _SessionLocal:
+        return 0
+    counted = 0
+    with _SessionLocal() as session:
+        while True:
+            mark = session.get(RedactionStatsBackfill, 1, with_for_update=True)
+            if mark is None or mark.done_log_id >= mark.upto_log_id:
+                break
+            batch = (
+                session.query(
+                    RedactionLog.id,
+                    RedactionLog.user_id,
+                    RedactionLog.content_type,
+                    RedactionLog.total_pii,
+                    RedactionLog.pii_counts,
+                    RedactionLog.created_at,
+                )
+                .filter(RedactionLog.id > mark.done_log_id)
+                .filter(RedactionLog.id <= mark.upto_log_id)
+                .order_by(RedactionLog.id)
+                .limit(batch_size)
+                .all()
+            )
+            _add_stats(session, batch)
+            mark.done_log_id = batch[-1].id if batch else mark.upto_log_id
+            session.commit()
+            counted += len(batch)
+    return counted
+
+
+STAT_GROUPS = ("day", "user", "pii_type", "content_type")
+
+
+def fetch_stats(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    group_by: List[str] | None = None,
+    pii_type: str | None = None,
+    user_id: int | None = None,
+) -> List[dict]:
+    # Without pii_type grouping or filtering the per-file rows are summed
+    # ("files" = uploads, "pii" = items found); otherwise the per-type rows
+    # ("files" = uploads containing the type).
+    if not _SessionLocal:
+        return []
+    group_by = list(group_by or ["day"])
+    columns = {
+        "day": RedactionStat.day,
+        "user": RedactionStat.user_id,
+        "pii_type": RedactionStat.pii_type,
+        "content_type": RedactionStat.content_type,
+    }
+    group_cols = [columns[name].label(name) for name in group_by]
+    query = select(
+        *group_cols,
+        func.sum(RedactionStat.files).label("files"),
+        func.sum(RedactionStat.pii).label("pii"),
+    )
+    if pii_type:
+        query = query.where(RedactionStat.pii_type == pii_type)
+    elif "pii_type" in group_by:
+        query = query.where(RedactionStat.pii_type != "")
+    else:
+        query = query.where(RedactionStat.pii_type == "")
+    if user_id is not None:
+        query = query.where(RedactionStat.user_id == user_id)
+    if date_from:
+        query = query.where(RedactionStat.day >= date_from)
+    if date_to:
+        query = query.where(RedactionStat.day <= date_to)
+    if group_cols:
+        query = query.group_by(*group_cols).order_by(*group_cols)
+    with _SessionLocal() as session:
+        rows = session.execute(query).all()
+    data = []
+    for row in rows:
+        item = {name: getattr(row, name) for name in group_by}
+        if "day" in item:
+            item["day"] = item["day"].isoformat()
+        if "user" in item:
+            item["user_id"] = item.pop("user") or None
+        item["files"] = int(row.files or 0)
+        item["pii"] = int(row.pii or 0)
+        data.append(item)
+    return data
+
+
+def log_redaction(event: RedactionLogData) -> Optional[int]:
+    if not _SessionLocal:
+        return None
+    with _SessionLocal() as session:
+        log_ids = _add_logs(session, [event])
         session.commit()
-        session.refresh(entry)
-        return entry.id
+        return log_ids[0]
+
+
+def log_redactions(events: List[RedactionLogData]) -> int:
+    if not _SessionLocal or not events:
+        return 0
+    with _SessionLocal() as session:
+        log_ids = _add_logs(session, events)
+        session.commit()
+    return len(log_ids)
+
+
+async def log_redactions_async(events: List[RedactionLogData]) -> int:
+    if not _AsyncSessionLocal or not events:
+        return 0
+    async with _AsyncSessionLocal() as session:
+        log_ids = await session.run_sync(_add_logs, events)
+        await session.commit()
+    return len(log_ids)
+
+
+def backfill_log_pii(batch_size: int = 1000) -> int:
+    # Writes redaction_log_pii rows for log entries created before the table
+    # existed. Safe to re-run: entries that already have rows are skipped.
+    if not _SessionLocal:
+        return 0
+    written = 0
+    last_id = 0
+    with _SessionLocal() as session:
+        while True:
+            has_rows = exists().where(RedactionLogPii.log_id == RedactionLog.id)
+            batch = (
+                session.query(RedactionLog.id, RedactionLog.pii_counts, RedactionLog.created_at)
+                .filter(RedactionLog.id > last_id)
+                .filter(~has_rows)
+                .order_by(RedactionLog.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            pii_rows = [row for entry in batch for row in _pii_rows(*entry)]
+            if pii_rows:
+                session.execute(insert(RedactionLogPii), pii_rows)
+            session.commit()
+            written += len(pii_rows)
+            last_id = batch[-1].id
+    return written
+
+
+# Above this many matches, count="estimate" stops counting and reports the cap.
+_COUNT_CAP = 10000
+
+_LOG_SORT_COLUMNS = {
+    "created_at": RedactionLog.created_at,
+    "size_bytes": RedactionLog.size_bytes,
+    "total_pii": RedactionLog.total_pii,
+    "filename": RedactionLog.filename,
+}
+
+
+@dataclass
+class LogPage:
+    logs: List[dict]
+    total: Optional[int]
+    total_exact: bool
+    next_cursor: Optional[str]
+
+
+def _encode_cursor(sort_key: str, sort_dir: str, row: RedactionLog) -> str:
+    value = getattr(row, sort_key)
+    if isinstance(value, datetime):
+        value = _as_utc(value).isoformat()
+    payload = json.dumps([sort_key, sort_dir, value, row.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_key: str, sort_dir: str) -> Tuple[object, int]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, direction, value, log_id = json.loads(payload)
+        if sort_key == "created_at":
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if key != sort_key or direction != sort_dir or not isinstance(log_id, int):
+        raise ValueError("Cursor does not match sort_by and sort_dir")
+    return value, log_id
+
+
+def _filter_logs(query, filename, pii_type, date_from, date_to, user_id):
+    if pii_type:
+        # At most one row per (log, type), so the join adds no duplicates.
+        query = query.join(RedactionLogPii, RedactionLogPii.log_id == RedactionLog.id).filter(
+            RedactionLogPii.pii_type == pii_type
+        )
+    # With a type filter the date range is applied on the per-type rows so
+    # the (pii_type, created_at) index can serve both.
+    created_col = RedactionLogPii.created_at if pii_type else RedactionLog.created_at
+    if user_id is not None:
+        query = query.filter(RedactionLog.user_id == user_id)
+    if filename:
+        query = query.filter(RedactionLog.filename.like(f"%{filename}%"))
+    if date_from:
+        query = query.filter(created_col >= date_from)
+    if date_to:
+        query = query.filter(created_col <= date_to)
+    return query
+
+
+_LOG_COLUMNS = (
+    "id",
+    "user_id",
+    "username",
+    "filename",
+    "content_type",
+    "size_bytes",
+    "total_pii",
+    "pii_counts",
+    "created_at",
+)
+
+
+def _log_dict(row) -> dict:
+    data = {name: getattr(row, name) for name in _LOG_COLUMNS}
+    data["created_at"] = row.created_at.isoformat()
+    return data
 
 
 def fetch_logs(
@@ -115,61 +606,106 @@ def fetch_logs(
     sort_by: str | None = None,
     sort_dir: str | None = None,
     user_id: int | None = None,
-):
+    cursor: str | None = None,
+    count: str = "exact",
+) -> LogPage:
+    # With a cursor (the next_cursor of the previous page) offset is ignored
+    # and the page starts right after the cursor's (sort value, id). count is
+    # "exact", "estimate" (stops at _COUNT_CAP) or "none".
+    sort_key = (sort_by or "created_at").lower()
+    if sort_key not in _LOG_SORT_COLUMNS:
+        sort_key = "created_at"
+    sort_dir = "desc" if (sort_dir or "desc").lower() == "desc" else "asc"
+    after = _decode_cursor(cursor, sort_key, sort_dir) if cursor else None
     if not _SessionLocal:
-        return [], 0
+        return LogPage([], 0, True, None)
     with _SessionLocal() as session:
-        query = session.query(RedactionLog)
-        if user_id is not None:
-            query = query.filter(RedactionLog.user_id == user_id)
-        if filename:
-            query = query.filter(RedactionLog.filename.like(f"%{filename}%"))
-        if date_from:
-            query = query.filter(RedactionLog.created_at >= date_from)
-        if date_to:
-            query = query.filter(RedactionLog.created_at <= date_to)
-
-        sort_key = (sort_by or "created_at").lower()
-        sort_dir = (sort_dir or "desc").lower()
-        sort_col = {
-            "created_at": RedactionLog.created_at,
-            "size_bytes": RedactionLog.size_bytes,
-            "total_pii": RedactionLog.total_pii,
-            "filename": RedactionLog.filename,
-        }.get(sort_key, RedactionLog.created_at)
-
-        order = desc(sort_col) if sort_dir == "desc" else sort_col
-        if pii_type:
-            all_rows = query.order_by(order).all()
-            filtered = [
-                row for row in all_rows if (row.pii_counts or {}).get(pii_type, 0) > 0
-            ]
-            total = len(filtered)
-            rows = filtered[offset : offset + limit]
+        query = _filter_logs(
+            session.query(RedactionLog), filename, pii_type, date_from, date_to, user_id
+        )
+
+        total_exact = count == "exact"
+        if count == "none":
+            total = None
+        elif count == "estimate":
+            capped = query.with_entities(RedactionLog.id).limit(_COUNT_CAP + 1).subquery()
+            total = session.query(func.count()).select_from(capped).scalar()
+            total_exact = total <= _COUNT_CAP
+            total = min(total, _COUNT_CAP)
         else:
             total = query.count()
-            rows = (
-                query.order_by(order)
-                .offset(offset)
-                .limit(limit)
-                .all()
-            )
 
-        data = [
-            {
-                "id": row.id,
-                "user_id": row.user_id,
-                "username": row.username,
-                "filename": row.filename,
-                "content_type": row.content_type,
-                "size_bytes": row.size_bytes,
-                "total_pii": row.total_pii,
-                "pii_counts": row.pii_counts,
-                "created_at": row.created_at.isoformat(),
-            }
-            for row in rows
-        ]
-        return data, total
+        sort_col = _LOG_SORT_COLUMNS[sort_key]
+        if after is not None:
+            value, last_id = after
+            if sort_dir == "desc":
+                query = query.filter(
+                    or_(sort_col < value, and_(sort_col == value, RedactionLog.id < last_id))
+                )
+            else:
+                query = query.filter(
+                    or_(sort_col > value, and_(sort_col == value, RedactionLog.id > last_id))
+                )
+            offset = 0
+        if sort_dir == "desc":
+            order = (desc(sort_col), desc(RedactionLog.id))
+        else:
+            order = (sort_col, RedactionLog.id)
+        rows = (
+            query.order_by(*order)
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+
+        data = [_log_dict(row) for row in rows]
+        next_cursor = _encode_cursor(sort_key, sort_dir, rows[-1]) if len(rows) == limit else None
+        return LogPage(data, total, total_exact, next_cursor)
+
+
+def iter_logs(
+    filename: str | None = None,
+    pii_type: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    user_id: int | None = None,
+    batch_size: int = 1000,
+) -> Iterator[dict]:
+    # Streams matching logs in id order through a server-side cursor, holding
+    # at most batch_size rows. Rows inserted after the export started are left
+    # out so the export is a consistent cut even without snapshot isolation.
+    if not _SessionLocal:
+        return
+    with _SessionLocal() as session:
+        last_id = session.query(func.max(RedactionLog.id)).scalar()
+        if last_id is None:
+            return
+        columns = [getattr(RedactionLog, name) for name in _LOG_COLUMNS]
+        query = _filter_logs(
+            session.query(*columns), filename, pii_type, date_from, date_to, user_id
+        )
+        query = (
+            query.filter(RedactionLog.id <= last_id)
+            .order_by(RedactionLog.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for row in query:
+            yield _log_dict(row)
+
+
+def referenced_blob_hashes(since: datetime) -> Optional[set]:
+    # Upload hashes still referenced by a log entry inside the retention window.
+    if not _SessionLocal:
+        return None
+    with _SessionLocal() as session:
+        rows = (
+            session.query(RedactionLog.content_sha256)
+            .filter(RedactionLog.content_sha256.isnot(None))
+            .filter(RedactionLog.created_at >= since)
+            .distinct()
+            .all()
+        )
+        return {row[0] for row in rows}
 
 
 def fetch_log_by_id(log_id: int):
@@ -179,17 +715,7 @@ def fetch_log_by_id(log_id: int):
         row = session.query(RedactionLog).filter(RedactionLog.id == log_id).first()
         if not row:
             return None
-        return {
-            "id": row.id,
-            "user_id": row.user_id,
-            "username": row.username,
-            "filename": row.filename,
-            "content_type": row.content_type,
-            "size_bytes": row.size_bytes,
-            "total_pii": row.total_pii,
-            "pii_counts": row.pii_counts,
-            "created_at": row.created_at.isoformat(),
-        }
+        return _log_dict(row)
 
 
 def create_user(username: str, password: str, email: Optional[str] = None) -> Optional[dict]:
@@ -235,6 +761,8 @@ def login_user(username: str, password: str) -> Optional[dict]:
         user.api_token = token
         user.token_expires_at = expires_at
         session.commit()
+        # The previous token stops working in the database; drop it here too.
+        _TOKEN_CACHE.invalidate_user(user.id)
         session.refresh(user)
         return {
             "id": user.id,
@@ -244,19 +772,47 @@ def login_user(username: str, password: str) -> Optional[dict]:
         }
 
 
+def cached_user_for_token(token: str) -> Optional[dict]:
+    # Cache-only lookup, cheap enough to call from the event loop.
+    if not _SessionLocal or not token:
+        return None
+    return _TOKEN_CACHE.get(token)
+
+
 def get_user_by_token(token: str) -> Optional[dict]:
     if not _SessionLocal or not token:
         return None
+    cached = _TOKEN_CACHE.get(token)
+    if cached is not None:
+        return cached
     with _SessionLocal() as session:
-        user = session.query(User).filter(User.api_token == token).first()
-        if not user:
-            return None
-        if user.token_expires_at and datetime.now(timezone.utc) >= user.token_expires_at:
-            user.api_token = None
-            user.token_expires_at = None
-            session.commit()
-            return None
-        return {"id": user.id, "username": user.username}
+        return _user_for_token(session, token)
+
+
+async def get_user_by_token_async(token: str) -> Optional[dict]:
+    if not _AsyncSessionLocal or not token:
+        return None
+    cached = _TOKEN_CACHE.get(token)
+    if cached is not None:
+        return cached
+    async with _AsyncSessionLocal() as session:
+        return await session.run_sync(_user_for_token, token)
+
+
+def _user_for_token(session, token: str) -> Optional[dict]:
+    generation = _TOKEN_CACHE.generation
+    user = session.query(User).filter(User.api_token == token).first()
+    if not user:
+        return None
+    expires_at = _as_utc(user.token_expires_at)
+    if expires_at and datetime.now(timezone.utc) >= expires_at:
+        user.api_token = None
+        user.token_expires_at = None
+        session.commit()
+        return None
+    result = {"id": user.id, "username": user.username}
+    _TOKEN_CACHE.put(token, result, expires_at, generation=generation)
+    return result
 
 
 def logout_user(token: str) -> bool:
@@ -264,12 +820,13 @@ def logout_user(token: str) -> bool:
         return False
     with _SessionLocal() as session:
         user = session.query(User).filter(User.api_token == token).first()
-        if not user:
-            return False
-        user.api_token = None
-        user.token_expires_at = None
-        session.commit()
-        return True
+        if user:
+            user.api_token = None
+            user.token_expires_at = None
+            session.commit()
+    # Only after the commit: a lookup in between would cache the old row again.
+    _TOKEN_CACHE.invalidate_token(token)
+    return user is not None
 
 
 def change_password(token: str, old_password: str, new_password: str) -> bool:
@@ -286,6 +843,7 @@ def change_password(token: str, old_password: str, new_password: str) -> bool:
         user.api_token = None
         user.token_expires_at = None
         session.commit()
+        _TOKEN_CACHE.invalidate_user(user.id)
         return True
 
 
@@ -301,6 +859,7 @@ def reset_password_admin(username: str, new_password: str) -> bool:
         user.api_token = None
         user.token_expires_at = None
         session.commit()
+        _TOKEN_CACHE.invalidate_user(user.id)
         return True
 
 
@@ -343,7 +902,7 @@ def reset_password_with_token(raw_token: str, new_password: str) -> bool:
         )
         if not entry or entry.used_at is not None:
             return False
-        if entry.expires_at and datetime.now(timezone.utc) >= entry.expires_at:
+        if entry.expires_at and datetime.now(timezone.utc) >= _as_utc(entry.expires_at):
             return False
         user = session.query(User).filter(User.id == entry.user_id).first()
         if not user:
@@ -354,4 +913,142 @@ def reset_password_with_token(raw_token: str, new_password: str) -> bool:
         user.token_expires_at = None
         entry.used_at = datetime.now(timezone.utc)
         session.commit()
+        _TOKEN_CACHE.invalidate_user(user.id)
+        return True
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_EXPIRED = "expired"
+
+
+def _job_to_dict(job: ProcessingJob) -> dict:
+    return {
+        "id": job.id,
+        "user_id": job.user_id,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "priority": job.priority,
+        "filename": job.filename,
+        "content_type": job.content_type,
+        "params": job.params,
+        "result_path": job.result_path,
+        "result_media_type": job.result_media_type,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+        "expires_at": job.expires_at.isoformat() if job.expires_at else None,
+    }
+
+
+def create_job(
+    job_id: str,
+    user_id: Optional[int],
+    filename: str,
+    content_type: str,
+    params: Dict[str, object],
+    priority: int = 0,
+) -> Optional[dict]:
+    if not _SessionLocal:
+        return None
+    now = datetime.now(timezone.utc)
+    with _SessionLocal() as session:
+        job = ProcessingJob(
+            id=job_id,
+            user_id=user_id,
+            status=JOB_QUEUED,
+            stage=None,
+            progress=0,
+            priority=priority,
+            filename=filename,
+            content_type=content_type,
+            params=params,
+            created_at=now,
+            updated_at=now,
+        )
+        session.add(job)
+        session.commit()
+        return _job_to_dict(job)
+
+
+def update_job(job_id: str, **fields) -> bool:
+    if not _SessionLocal:
+        return False
+    with _SessionLocal() as session:
+        job = session.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+        if not job:
+            return False
+        for key, value in fields.items():
+            setattr(job, key, value)
+        job.updated_at = datetime.now(timezone.utc)
+        session.commit()
         return True
+
+
+def fetch_job(job_id: str) -> Optional[dict]:
+    if not _SessionLocal:
+        return None
+    with _SessionLocal() as session:
+        job = session.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+        if not job:
+            return None
+        return _job_to_dict(job)
+
+
+def touch_jobs(job_ids: List[str]) -> int:
+    if not _SessionLocal or not job_ids:
+        return 0
+    with _SessionLocal() as session:
+        count = (
+            session.query(ProcessingJob)
+            .filter(ProcessingJob.id.in_(job_ids))
+            .filter(ProcessingJob.status.in_([JOB_QUEUED, JOB_RUNNING]))
+            .update({ProcessingJob.updated_at: datetime.now(timezone.utc)}, synchronize_session=False)
+        )
+        session.commit()
+        return count
+
+
+def fail_stale_jobs(updated_before: datetime) -> int:
+    if not _SessionLocal:
+        return 0
+    with _SessionLocal() as session:
+        count = (
+            session.query(ProcessingJob)
+            .filter(ProcessingJob.status.in_([JOB_QUEUED, JOB_RUNNING]))
+            .filter(ProcessingJob.updated_at < updated_before)
+            .update(
+                {
+                    ProcessingJob.status: JOB_FAILED,
+                    ProcessingJob.error: "Job was interrupted",
+                    ProcessingJob.updated_at: datetime.now(timezone.utc),
+                },
+                synchronize_session=False,
+            )
+        )
+        session.commit()
+        return count
+
+
+def expire_jobs(now: Optional[datetime] = None) -> List[str]:
+    if not _SessionLocal:
+        return []
+    now = now or datetime.now(timezone.utc)
+    with _SessionLocal() as session:
+        jobs = (
+            session.query(ProcessingJob)
+            .filter(ProcessingJob.expires_at.isnot(None))
+            .filter(ProcessingJob.expires_at <= now)
+            .filter(ProcessingJob.status != JOB_EXPIRED)
+            .all()
+        )
+        paths = [job.result_path for job in jobs if job.result_path]
+        for job in jobs:
+            job.status = JOB_EXPIRED
+            job.result_path = None
+            job.updated_at = now
+        session.commit()
+        return paths
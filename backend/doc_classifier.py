@@ -0,0 +1,144 @@
+import re
+from dataclasses import dataclass
+from typing import FrozenSet, Optional, Tuple
+
+
+# Relative field region: (x, y, w, h) as fractions of the page size.
+Region = Tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class DocumentProfile:
+    name: str
+    keywords: Tuple[str, ...]
+    pii_types: Optional[FrozenSet[str]]
+    regions: Tuple[Region, ...] = ()
+    # The document's own ID number format, matched against the original case.
+    id_pattern: Optional[str] = None
+
+
+GENERIC = DocumentProfile(name="GENERIC", keywords=(), pii_types=None)
+
+PROFILES = (
+    DocumentProfile(
+        name="AADHAAR",
+        keywords=(
+            "aadhaar",
+            "aadhar",
+            "unique identification authority",
+            "mera aadhaar",
+            "enrolment no",
+            "vid",
+        ),
+        pii_types=frozenset({"AADHAAR", "DOB", "ADDRESS", "PERSON", "PHONE"}),
+        id_pattern=r"\b\d{4}\s\d{4}\s\d{4}\b",
+        regions=(
+            (0.25, 0.20, 0.75, 0.50),  # name, DOB, gender
+            (0.10, 0.70, 0.80, 0.25),  # Aadhaar number band
+        ),
+    ),
+    DocumentProfile(
+        name="PAN",
+        keywords=(
+            "income tax department",
+            "permanent account number",
+            "income tax",
+            "pan card",
+        ),
+        pii_types=frozenset({"PAN", "DOB", "PERSON"}),
+        id_pattern=r"\b[A-Z]{5}[0-9]{4}[A-Z]\b",
+        regions=((0.00, 0.20, 0.75, 0.75),),
+    ),
+    DocumentProfile(
+        name="DL",
+        keywords=(
+            "driving licence",
+            "driving license",
+            "transport department",
+            "licence no",
+            "license no",
+            "dl no",
+            "valid till",
+        ),
+        pii_types=frozenset({"DL", "DOB", "ADDRESS", "PERSON"}),
+        id_pattern=r"\b[A-Z]{2}\d{2}\s?\d{11}\b",
+    ),
+    DocumentProfile(
+        name="VOTER_ID",
+        keywords=(
+            "election commission",
+            "elector",
+            "electors photo identity card",
+            "epic",
+        ),
+        pii_types=frozenset({"VOTER_ID", "DOB", "ADDRESS", "PERSON"}),
+        id_pattern=r"\b[A-Z]{3}[0-9]{7}\b",
+    ),
+)
+
+# A profile is trusted on two distinct keyword hits, or one plus a match of
+# its ID number format; anything weaker falls back to GENERIC so no pattern is
+# ever skipped on a guess (an official letter naming the issuer is not an ID).
+_MIN_SCORE = 2
+# OCR limited to a profile's field regions skips the rest of the page, so it
+# needs more evidence than choosing the profile does.
+REGION_OCR_MIN_SCORE = _MIN_SCORE + 1
+
+
+def _keyword_pattern(keyword: str) -> "re.Pattern":
+    return re.compile(r"\b" + r"\s+".join(map(re.escape, keyword.split())) + r"\b")
+
+
+# Longest first, so "income tax department" is counted before "income tax".
+_KEYWORD_PATTERNS = {
+    profile.name: [
+        (kw, _keyword_pattern(kw)) for kw in sorted(profile.keywords, key=len, reverse=True)
+    ]
+    for profile in PROFILES
+}
+
+_ID_PATTERNS = {
+    profile.name: re.compile(profile.id_pattern) for profile in PROFILES if profile.id_pattern
+}
+
+
+def _score(profile: DocumentProfile, lowered: str, text: str) -> int:
+    # Distinct keywords count once each; one that is part of a longer keyword
+    # already found ("income tax" in "income tax department") adds nothing.
+    found = []
+    for keyword, pattern in _KEYWORD_PATTERNS[profile.name]:
+        if any(f" {keyword} " in f" {longer} " for longer in found):
+            continue
+        if pattern.search(lowered):
+            found.append(keyword)
+    score = len(found)
+    id_pattern = _ID_PATTERNS.get(profile.name)
+    if score and id_pattern is not None and id_pattern.search(text):
+        score += 1
+    return score
+
+
+def classify_with_score(text: str) -> Tuple[DocumentProfile, int]:
+    lowered = (text or "").lower()
+    if not lowered.strip():
+        return GENERIC, 0
+
+    scores = [(_score(profile, lowered, text), profile) for profile in PROFILES]
+    scores.sort(key=lambda item: item[0], reverse=True)
+    best_score, best = scores[0]
+    if best_score < _MIN_SCORE:
+        return GENERIC, 0
+    if len(scores) > 1 and scores[1][0] == best_score:
+        return GENERIC, 0
+    return best, best_score
+
+
+def classify_text(text: str) -> DocumentProfile:
+    return classify_with_score(text)[0]
+
+
+def profile_by_name(name: Optional[str]) -> DocumentProfile:
+    for profile in PROFILES:
+        if profile.name == name:
+            return profile
+    return GENERIC
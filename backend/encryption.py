@@ -1,6 +1,7 @@
 import base64
 import os
 
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 
@@ -33,6 +34,25 @@ def encrypt_bytes(data: bytes) -> bytes:
     return nonce + ciphertext
 
 
+class StreamEncryptor:
+    # Chunked AES-256-GCM producing the same nonce + ciphertext + tag layout
+    # as encrypt_bytes, so decrypt_bytes can read either.
+
+    def __init__(self):
+        key = _get_key()
+        self.nonce = os.urandom(12)
+        self._encryptor = Cipher(algorithms.AES(key), modes.GCM(self.nonce)).encryptor()
+
+    def header(self) -> bytes:
+        return self.nonce
+
+    def update(self, chunk: bytes) -> bytes:
+        return self._encryptor.update(chunk)
+
+    def finalize(self) -> bytes:
+        return self._encryptor.finalize() + self._encryptor.tag
+
+
 def decrypt_bytes(data: bytes) -> bytes:
     key = _get_key()
     if len(data) < 13:
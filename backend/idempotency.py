@@ -0,0 +1,132 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class IdempotencyConflict(Exception):
+    pass
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: bytes
+    media_type: Optional[str]
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    expires_at: float = 0.0
+    pending: Optional[asyncio.Future] = None
+    response: Optional[StoredResponse] = None
+
+
+class IdempotencyCache:
+    # Responses remembered per idempotency key. A request arriving while the
+    # first one with its key is still running waits for that result instead
+    # of starting its own; later retries get the stored response until
+    # `ttl_seconds` pass. Bounded by entry count and by total body bytes,
+    # least recently used first. `max_entries=0` disables the cache.
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._size = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def run(
+        self,
+        key: Hashable,
+        fingerprint: str,
+        compute: Callable[[], Awaitable[StoredResponse]],
+    ) -> Tuple[StoredResponse, bool]:
+        # Returns the response and whether it was replayed from an earlier
+        # request. Reusing a key for a different request raises
+        # IdempotencyConflict.
+        if not self.enabled:
+            return await compute(), False
+
+        self._purge_expired()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                raise IdempotencyConflict("Idempotency-Key was used for a different request")
+            self._entries.move_to_end(key)
+            if entry.response is not None:
+                return entry.response, True
+            # shield: a waiter giving up must not cancel the shared computation.
+            return await asyncio.shield(entry.pending), True
+
+        loop = asyncio.get_running_loop()
+        entry = _Entry(fingerprint=fingerprint)
+        entry.pending = loop.create_future()
+        self._entries[key] = entry
+        try:
+            response = await compute()
+        except BaseException as exc:
+            # Failures are not remembered, so a retry runs again; requests
+            # that were waiting on this one see the same error.
+            self._forget(key, entry)
+            if not entry.pending.done():
+                if isinstance(exc, asyncio.CancelledError):
+                    entry.pending.cancel()
+                else:
+                    entry.pending.set_exception(exc)
+                    # Retrieved here so an unawaited future does not warn.
+                    entry.pending.exception()
+            raise
+        entry.pending.set_result(response)
+        entry.pending = None
+        self._store(key, entry, response)
+        return response, False
+
+    def _store(self, key: Hashable, entry: _Entry, response: StoredResponse) -> None:
+        if self._entries.get(key) is not entry:
+            return
+        if len(response.body) > self.max_bytes:
+            # Too large to keep; only the concurrent duplicates share it.
+            self._forget(key, entry)
+            return
+        entry.response = response
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        self._size += len(response.body)
+        while self._size > self.max_bytes or len(self._entries) > self.max_entries:
+            if not self._evict_oldest():
+                break
+
+    def _evict_oldest(self) -> bool:
+        for key, entry in self._entries.items():
+            # In-flight entries are never evicted; their waiters need them.
+            if entry.response is not None:
+                self._forget(key, entry)
+                return True
+        return False
+
+    def _forget(self, key: Hashable, entry: _Entry) -> None:
+        if self._entries.get(key) is not entry:
+            return
+        del self._entries[key]
+        if entry.response is not None:
+            self._size -= len(entry.response.body)
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [
+            (key, entry)
+            for key, entry in self._entries.items()
+            if entry.response is not None and entry.expires_at <= now
+        ]
+        for key, entry in expired:
+            self._forget(key, entry)
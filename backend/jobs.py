@@ -0,0 +1,199 @@
+import asyncio
+import itertools
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from db import (
+    JOB_FAILED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    expire_jobs,
+    fail_stale_jobs,
+    touch_jobs,
+    update_job,
+)
+from workers import run_io
+
+
+logger = logging.getLogger(__name__)
+
+# (job_id, payload, report_progress) -> (result_path, media_type)
+JobRunner = Callable[[str, object, Callable[[str, int], None]], Awaitable[Tuple[str, str]]]
+
+
+class QueueFullError(Exception):
+    pass
+
+
+@dataclass(order=True)
+class _QueuedJob:
+    sort_key: Tuple[int, int]
+    job_id: str = field(compare=False)
+    payload: object = field(compare=False)
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _remove_result(path: str) -> None:
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+class JobManager:
+    # Bounded in-process job queue. Higher `priority` runs first; equal
+    # priorities run in submission order. Job state is persisted via db.py.
+
+    def __init__(
+        self,
+        runner: JobRunner,
+        workers: int,
+        max_queue: int,
+        result_ttl_minutes: int,
+        sweep_interval_seconds: float = 60.0,
+        stale_seconds: float = 300.0,
+        release: Optional[Callable[[object], None]] = None,
+    ):
+        # `release` frees a payload's resources once its job is finished,
+        # whether or not the runner got to it.
+        self._runner = runner
+        self._release = release
+        self._workers = max(1, workers)
+        self._max_queue = max(1, max_queue)
+        self._result_ttl = timedelta(minutes=max(1, result_ttl_minutes))
+        self._sweep_interval = sweep_interval_seconds
+        # Each sweep is a heartbeat for the jobs this process holds, so a job
+        # only goes stale after several missed sweeps.
+        self._stale_after = timedelta(seconds=max(stale_seconds, 3 * sweep_interval_seconds))
+        self._held: Set[str] = set()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._counter = itertools.count()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue(maxsize=self._max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self._workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._queue is not None:
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                self._held.discard(item.job_id)
+                self._release_payload(item)
+        self._queue = None
+
+    def submit(self, job_id: str, payload: object, priority: int = 0) -> None:
+        if self._queue is None:
+            raise RuntimeError("Job manager is not running")
+        item = _QueuedJob(sort_key=(-priority, next(self._counter)), job_id=job_id, payload=payload)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            raise QueueFullError("Job queue is full")
+        self._held.add(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self._queue.get()
+            try:
+                await self._run(item)
+            except Exception:
+                # A database error outside the runner must not take the
+                # worker down with it.
+                logger.exception("Job %s failed", item.job_id)
+                try:
+                    await self._mark_failed(item.job_id, "Job failed")
+                except Exception:
+                    logger.exception("Could not mark job %s as failed", item.job_id)
+            finally:
+                self._held.discard(item.job_id)
+                self._release_payload(item)
+                self._queue.task_done()
+
+    def _release_payload(self, item: _QueuedJob) -> None:
+        if self._release is None:
+            return
+        try:
+            self._release(item.payload)
+        except Exception:
+            logger.exception("Releasing job %s failed", item.job_id)
+
+    async def _mark_failed(self, job_id: str, error: str) -> None:
+        await run_io(
+            update_job,
+            job_id,
+            status=JOB_FAILED,
+            error=error[:1000],
+            expires_at=datetime.now(timezone.utc) + self._result_ttl,
+        )
+
+    async def _run(self, item: _QueuedJob) -> None:
+        job_id = item.job_id
+        loop = asyncio.get_running_loop()
+        pending: List[asyncio.Future] = []
+
+        def report(stage: str, percent: int) -> None:
+            update = run_io(update_job, job_id, stage=stage, progress=percent)
+            pending.append(loop.create_task(update))
+
+        await run_io(update_job, job_id, status=JOB_RUNNING, stage="started", progress=0)
+        try:
+            result_path, media_type = await self._runner(job_id, item.payload, report)
+        except Exception as exc:
+            await asyncio.gather(*pending, return_exceptions=True)
+            detail = getattr(exc, "detail", None) or str(exc) or exc.__class__.__name__
+            logger.warning("Job %s failed: %s", job_id, detail)
+            await self._mark_failed(job_id, str(detail))
+            return
+
+        # Progress writes are fire-and-forget; let them land before the final
+        # state so a late one cannot overwrite it.
+        await asyncio.gather(*pending, return_exceptions=True)
+        await run_io(
+            update_job,
+            job_id,
+            status=JOB_SUCCEEDED,
+            stage="done",
+            progress=100,
+            result_path=result_path,
+            result_media_type=media_type,
+            expires_at=datetime.now(timezone.utc) + self._result_ttl,
+        )
+
+    async def sweep(self) -> int:
+        # Queued jobs only live in the memory of the process that accepted
+        # them. Every process refreshes the jobs it holds, so ones that stop
+        # being refreshed were lost with their process.
+        await run_io(touch_jobs, sorted(self._held))
+        await run_io(fail_stale_jobs, datetime.now(timezone.utc) - self._stale_after)
+        paths = await run_io(expire_jobs)
+        for path in paths:
+            await run_io(_remove_result, path)
+        return len(paths)
+
+    async def _sweeper(self) -> None:
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Job result sweep failed")
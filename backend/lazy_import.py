@@ -0,0 +1,41 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Callable, Optional
+
+
+class LazyModule:
+    # Stands in for a heavy module until an attribute is first read, then
+    # imports it (running `setup` once) and forwards to it. Attributes set on
+    # the proxy, such as test monkeypatches, shadow the real module's.
+
+    def __init__(self, name: str, setup: Optional[Callable[[ModuleType], None]] = None):
+        self._name = name
+        self._setup = setup
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._module is not None:
+            return self._module
+        with self._lock:
+            if self._module is None:
+                module = importlib.import_module(self._name)
+                if self._setup is not None:
+                    self._setup(module)
+                self._module = module
+        return self._module
+
+    def __getattr__(self, attr: str):
+        # Only reached for names the proxy itself does not have.
+        if attr in ("_name", "_setup", "_module", "_lock"):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name: str, setup: Optional[Callable[[ModuleType], None]] = None) -> LazyModule:
+    return LazyModule(name, setup)
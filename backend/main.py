@@ -1,45 +1,174 @@
+import asyncio
+import csv
+import functools
 import io
+import json
+import logging
 import os
 import re
 import smtplib
+import tempfile
 import uuid
-from typing import List, Optional
+import zipfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, List, Optional, Tuple
 from email.message import EmailMessage
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
-from fastapi.responses import FileResponse, Response
+from fastapi import FastAPI, File, Header, HTTPException, Query, UploadFile
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 
 from config import CONFIG
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 from db import (
+    JOB_EXPIRED,
+    JOB_FAILED,
+    JOB_SUCCEEDED,
+    STAT_GROUPS,
     RedactionLogData,
+    async_db_enabled,
+    cached_user_for_token,
+    create_job,
     create_user,
     create_password_reset_token,
     change_password,
+    fetch_job,
     fetch_log_by_id,
     fetch_logs,
+    fetch_stats,
+    iter_logs,
     get_user_by_token,
+    get_user_by_token_async,
     log_redaction,
+    log_redactions,
+    log_redactions_async,
     login_user,
+    referenced_blob_hashes,
     logout_user,
     reset_password_admin,
     reset_password_with_token,
+    start_async_db,
+    stop_async_db,
+    update_job,
+)
+from audit_writer import AuditWriter
+from admission import AdmissionController, AdmissionRejected, AdmissionTicket
+from output_cache import OutputCache
+from idempotency import IdempotencyCache, IdempotencyConflict, StoredResponse
+from jobs import JobManager, QueueFullError, new_job_id
+from blob_store import (
+    blob_name,
+    collect_garbage,
+    config_fingerprint,
+    load_result,
+    result_path,
+    save_result,
+)
+from doc_classifier import (
+    GENERIC,
+    REGION_OCR_MIN_SCORE,
+    DocumentProfile,
+    classify_text,
+    classify_with_score,
+    profile_by_name,
+)
+from ocr import (
+    PAGE_SEPARATOR,
+    extract_pdf_page,
+    extract_text_and_boxes,
+    pdf_page_count,
+    read_header_text,
 )
-from ocr import extract_text_and_boxes
 from pdf_generator import generate_redacted_pdf
 from pii_detector import detect_pii
 from redaction import redact_text
 from encryption import decrypt_bytes, encrypt_bytes
 from media_redaction import redact_image_bytes, redact_pdf_with_boxes
-from docx import Document
-
-app = FastAPI()
+from lazy_import import lazy_module
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as METRICS
+from timing import StageTimer, activate, stage
+from word_table import BoxTable, WordTable
+from uploads import SpooledUpload, UploadSizeLimitMiddleware, UploadTooLarge, spool_upload
+from warmup import WarmupState, run_warmup
+from workers import run_cpu, run_io, shutdown_pools, start_pools
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    start_pools()
+    await start_async_db()
+    if CONFIG.audit_async:
+        await _AUDIT.start()
+    await _JOBS.start()
+    blob_gc = asyncio.create_task(_blob_gc_loop())
+    warm_up = asyncio.create_task(_warm_up())
+    yield
+    blob_gc.cancel()
+    warm_up.cancel()
+    await asyncio.gather(blob_gc, warm_up, return_exceptions=True)
+    await _JOBS.stop()
+    # After the jobs so their final log events are flushed too.
+    await _AUDIT.stop()
+    await stop_async_db()
+    shutdown_pools()
+
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(lifespan=_lifespan)
 
 os.makedirs(CONFIG.uploads_dir, exist_ok=True)
 os.makedirs(CONFIG.output_dir, exist_ok=True)
 
+_IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg"}
+
+docx = lazy_module("docx")
+
+_RESULT_FINGERPRINT = config_fingerprint(CONFIG)
+
+_OUTPUTS = OutputCache(
+    max_bytes=CONFIG.output_cache_mb * 1024 * 1024,
+    ttl_seconds=CONFIG.output_cache_ttl_seconds,
+)
+
+_ADMISSION = AdmissionController(
+    max_active=CONFIG.admission_max_active,
+    max_queue=CONFIG.admission_max_queue,
+    max_queue_per_user=CONFIG.admission_max_queue_per_user,
+    retry_after_seconds=CONFIG.admission_retry_after_seconds,
+)
+
+_WARMUP = WarmupState()
+
+_IDEMPOTENCY = IdempotencyCache(
+    max_entries=CONFIG.idempotency_max_entries,
+    max_bytes=CONFIG.idempotency_max_mb * 1024 * 1024,
+    ttl_seconds=CONFIG.idempotency_ttl_seconds,
+)
+
+
+async def _write_audit_batch(events: List[RedactionLogData]) -> int:
+    if async_db_enabled():
+        return await log_redactions_async(events)
+    return await run_io(log_redactions, events)
+
+
+_AUDIT = AuditWriter(
+    _write_audit_batch,
+    max_queue=CONFIG.audit_max_queue,
+    batch_size=CONFIG.audit_batch_size,
+    flush_interval=CONFIG.audit_flush_interval_ms / 1000,
+    enqueue_timeout=CONFIG.audit_enqueue_timeout_ms / 1000,
+)
+
 
 class UserCredentials(BaseModel):
     username: str
@@ -72,11 +201,15 @@ class ResetPasswordTokenRequest(BaseModel):
 
 
 
-def _safe_filename(original_name: str) -> str:
-    ext = os.path.splitext(original_name)[1].lower()
+def _validated_extension(original_name: Optional[str]) -> str:
+    ext = os.path.splitext(original_name or "")[1].lower()
     if ext not in set(CONFIG.allowed_extensions):
         raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext}")
-    return f"{uuid.uuid4().hex}{ext}"
+    return ext
+
+
+def _safe_filename(original_name: str) -> str:
+    return f"{uuid.uuid4().hex}{_validated_extension(original_name)}"
 
 
 def _validate_content_type(content_type: Optional[str]) -> None:
@@ -88,19 +221,98 @@ def _validate_content_type(content_type: Optional[str]) -> None:
         raise HTTPException(status_code=400, detail=f"Unsupported content type: {content_type}")
 
 
-def _enforce_size_limit(data: bytes) -> None:
-    max_bytes = CONFIG.max_upload_mb * 1024 * 1024
-    if len(data) > max_bytes:
+def _max_upload_bytes() -> int:
+    return CONFIG.max_upload_mb * 1024 * 1024
+
+
+# Slack for multipart boundaries and headers on top of the file bytes.
+_MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _request_body_limit(path: str) -> Optional[int]:
+    if path in {"/process/", "/jobs"}:
+        return _max_upload_bytes() + _MULTIPART_OVERHEAD
+    if path == "/process/batch":
+        return (_max_upload_bytes() + _MULTIPART_OVERHEAD) * CONFIG.max_batch_files
+    return None
+
+
+app.add_middleware(UploadSizeLimitMiddleware, limit_for_path=_request_body_limit)
+
+
+async def _spool_request_file(file: UploadFile, ext: str) -> SpooledUpload:
+    # Uploads are stored content-addressed under their SHA-256, so a repeat
+    # upload of the same bytes reuses the existing blob.
+    encrypt = CONFIG.encryption_enabled
+    try:
+        upload = await run_io(
+            spool_upload,
+            file.file,
+            _max_upload_bytes(),
+            CONFIG.upload_spool_memory_mb * 1024 * 1024,
+            CONFIG.uploads_dir if encrypt else None,
+        )
+    except UploadTooLarge:
         raise HTTPException(status_code=413, detail="File too large")
+    except ValueError as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+    path = os.path.join(CONFIG.uploads_dir, blob_name(upload.sha256, ext, encrypt))
+    try:
+        await run_io(upload.store, path, encrypt)
+    except ValueError as exc:
+        upload.close()
+        raise HTTPException(status_code=500, detail=str(exc))
+    except BaseException:
+        upload.close()
+        raise
+    return upload
+
+
+async def _blob_gc_loop() -> None:
+    if CONFIG.storage_retention_days <= 0:
+        return
+    while True:
+        await asyncio.sleep(CONFIG.storage_gc_interval_minutes * 60)
+        try:
+            await _collect_blob_garbage()
+        except Exception:
+            pass
+
+
+async def _warm_up() -> None:
+    # Runs where requests run: on the CPU pool. Pool processes also warm up
+    # in their initializer, so with a process pool this mostly measures a
+    # warm worker.
+    if CONFIG.warmup_enabled:
+        try:
+            state = await run_cpu(run_warmup)
+            _WARMUP.timings, _WARMUP.errors = state.timings, state.errors
+        except Exception as exc:
+            _WARMUP.errors["warmup"] = str(exc)
+            logger.exception("Warmup failed")
+    _WARMUP.ready = True
+
+
+async def _collect_blob_garbage(now: Optional[datetime] = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    retention = timedelta(days=CONFIG.storage_retention_days)
+    referenced = await run_io(referenced_blob_hashes, now - retention)
+    return await run_io(
+        collect_garbage,
+        CONFIG.uploads_dir,
+        retention.total_seconds(),
+        referenced,
+        now.timestamp(),
+    )
 
 
 def _normalize_token(token: str) -> str:
     return token.strip().strip(".,;:()[]{}<>\"'").lower()
 
 
-def _find_matching_indices(words: List[dict], pii_value: str) -> List[int]:
+def _find_matching_indices(words: WordTable, pii_value: str) -> List[int]:
     tokens = [t for t in (_normalize_token(t) for t in pii_value.split()) if t]
-    word_norms = [_normalize_token(w["text"]) for w in words]
+    word_norms = [_normalize_token(w) for w in words.text]
 
     if not tokens:
         return []
@@ -117,13 +329,23 @@ def _find_matching_indices(words: List[dict], pii_value: str) -> List[int]:
         return indices
 
     # Fallback: substring match
-    for i, w in enumerate(words):
-        if tokens[0] in _normalize_token(w["text"]):
+    for i, w in enumerate(words.text):
+        if tokens[0] in _normalize_token(w):
             return [i]
 
     return []
 
 
+def _pii_word_indices(words: WordTable, pii: dict) -> List[int]:
+    start = pii.get("start")
+    end = pii.get("end")
+    if start is not None and end is not None and end > start:
+        indices = words.span_indices(start, end)
+        if len(indices):
+            return list(indices)
+    return _find_matching_indices(words, pii["value"])
+
+
 def _validate_password(password: str) -> Optional[str]:
     if len(password) < 8:
         return "Password must be at least 8 characters"
@@ -192,6 +414,20 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def readiness_check():
+    # Liveness is /health; this turns 200 only once warmup has finished so a
+    # load balancer holds traffic off a cold worker.
+    status_code = 200 if _WARMUP.ready else 503
+    return JSONResponse(_WARMUP.to_payload(), status_code=status_code)
+
+
+@app.get("/metrics")
+def metrics(token: Optional[str] = None):
+    _require_admin_token(token)
+    return PlainTextResponse(METRICS.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.post("/auth/register")
 def register_user(creds: RegisterRequest):
     password_error = _validate_password(creds.password)
@@ -307,6 +543,8 @@ def config_debug(token: Optional[str] = None):
         "enable_decrypt_endpoint": CONFIG.enable_decrypt_endpoint,
         "use_preprocess": CONFIG.use_preprocess,
         "pdf_dpi": CONFIG.pdf_dpi,
+        "classify_documents": CONFIG.classify_documents,
+        "region_ocr": CONFIG.region_ocr,
         "ner_model_path": CONFIG.ner_model_path,
         "db_url": CONFIG.db_url,
         "db_echo": CONFIG.db_echo,
@@ -332,33 +570,141 @@ def get_logs(
     date_to: Optional[str] = None,
     sort_by: Optional[str] = None,
     sort_dir: Optional[str] = None,
+    cursor: Optional[str] = None,
+    count: str = "exact",
     token: Optional[str] = None,
     user_token: Optional[str] = None,
 ):
     _require_api_token(token)
     if CONFIG.admin_token:
         _require_admin_token(token)
+    if count not in {"exact", "estimate", "none"}:
+        raise HTTPException(status_code=400, detail="count must be exact, estimate or none")
     user = _resolve_user(user_token)
     limit = max(1, min(limit, 1000))
-    offset = max(0, offset)
-    rows, total = fetch_logs(
-        limit=limit,
-        offset=offset,
+    offset = 0 if cursor else max(0, offset)
+    try:
+        page = fetch_logs(
+            limit=limit,
+            offset=offset,
+            filename=filename,
+            pii_type=pii_type,
+            date_from=_parse_date(date_from),
+            date_to=_parse_date(date_to),
+            sort_by=sort_by,
+            sort_dir=sort_dir,
+            user_id=user["id"] if user else None,
+            cursor=cursor,
+            count=count,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {
+        "count": len(page.logs),
+        "count_total": page.total,
+        "count_exact": page.total_exact,
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": page.next_cursor,
+        "logs": page.logs,
+    }
+
+
+_EXPORT_COLUMNS = (
+    "id",
+    "user_id",
+    "username",
+    "filename",
+    "content_type",
+    "size_bytes",
+    "total_pii",
+    "pii_counts",
+    "created_at",
+)
+
+
+def _export_chunks(rows, fmt: str, rows_per_chunk: int = 500):
+    # Rows are written out in chunks so memory stays flat however many the
+    # export covers.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(_EXPORT_COLUMNS)
+    for count, row in enumerate(rows, 1):
+        if writer is not None:
+            values = [row[name] for name in _EXPORT_COLUMNS]
+            values[_EXPORT_COLUMNS.index("pii_counts")] = json.dumps(row["pii_counts"])
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(row))
+            buffer.write("\n")
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+@app.get("/logs/export")
+def export_logs(
+    format: str = "ndjson",
+    filename: Optional[str] = None,
+    pii_type: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    token: Optional[str] = None,
+    user_token: Optional[str] = None,
+):
+    _require_api_token(token)
+    if CONFIG.admin_token:
+        _require_admin_token(token)
+    if format not in {"csv", "ndjson"}:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    user = _resolve_user(user_token)
+    rows = iter_logs(
         filename=filename,
         pii_type=pii_type,
         date_from=_parse_date(date_from),
         date_to=_parse_date(date_to),
-        sort_by=sort_by,
-        sort_dir=sort_dir,
         user_id=user["id"] if user else None,
     )
-    return {
-        "count": len(rows),
-        "count_total": total,
-        "limit": limit,
-        "offset": offset,
-        "logs": rows,
-    }
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_chunks(rows, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="redaction_logs.{format}"'},
+    )
+
+
+@app.get("/logs/stats")
+def get_log_stats(
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    group_by: str = "day",
+    pii_type: Optional[str] = None,
+    token: Optional[str] = None,
+    user_token: Optional[str] = None,
+):
+    _require_api_token(token)
+    if CONFIG.admin_token:
+        _require_admin_token(token)
+    groups = [name.strip() for name in group_by.split(",") if name.strip()]
+    unknown = [name for name in groups if name not in STAT_GROUPS]
+    if not groups or unknown:
+        raise HTTPException(
+            status_code=400, detail=f"group_by must be a list of: {', '.join(STAT_GROUPS)}"
+        )
+    user = _resolve_user(user_token)
+    start = _parse_date(date_from)
+    end = _parse_date(date_to)
+    stats = fetch_stats(
+        date_from=start.date() if start else None,
+        date_to=end.date() if end else None,
+        group_by=groups,
+        pii_type=pii_type,
+        user_id=user["id"] if user else None,
+    )
+    return {"group_by": groups, "count": len(stats), "stats": stats}
 
 
 @app.get("/logs/{log_id}")
@@ -375,15 +721,33 @@ def get_log_by_id(log_id: int, token: Optional[str] = None, user_token: Optional
     return row
 
 
-def _read_docx_text(path: str) -> str:
-    doc = Document(path)
-    paragraphs = [p.text for p in doc.paragraphs if p.text]
-    return "\n".join(paragraphs)
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as buffer:
+        buffer.write(data)
+
+
+def _remove_file(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
 
 
-def _read_docx_text_bytes(data: bytes) -> str:
-    with io.BytesIO(data) as buf:
-        doc = Document(buf)
+@asynccontextmanager
+async def _plain_source(upload: SpooledUpload, path: str, ext: str):
+    # OCR and PDF rendering need a plaintext file with the right extension;
+    # the stored upload is reused unless it was encrypted.
+    if upload.plain_path is not None:
+        yield upload.plain_path
+        return
+    temp_path = f"{path}.tmp{ext}"
+    await run_io(upload.copy_to, temp_path)
+    try:
+        yield temp_path
+    finally:
+        await run_io(_remove_file, temp_path)
+
+
+def _read_docx_text_upload(upload: SpooledUpload) -> str:
+    doc = docx.Document(upload.open())
     paragraphs = [p.text for p in doc.paragraphs if p.text]
     return "\n".join(paragraphs)
 
@@ -411,6 +775,20 @@ def _resolve_user(user_token: Optional[str]) -> Optional[dict]:
     return user
 
 
+async def _resolve_user_async(user_token: Optional[str]) -> Optional[dict]:
+    # Tokens seen recently resolve from the in-process cache without a
+    # thread hop; only a miss goes to the database on the I/O pool.
+    cached = cached_user_for_token(user_token) if user_token else None
+    if cached is not None:
+        return cached
+    if user_token and async_db_enabled():
+        user = await get_user_by_token_async(user_token)
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid user token")
+        return user
+    return await run_io(_resolve_user, user_token)
+
+
 def _require_user(user_token: Optional[str]) -> dict:
     if not user_token:
         raise HTTPException(status_code=401, detail="user_token required")
@@ -446,125 +824,882 @@ def decrypt_file(filename: str, token: Optional[str] = None):
     )
 
 
-@app.post("/process/")
-async def process_file(
-    file: UploadFile = File(...),
-    return_pdf: bool = False,
-    return_redacted_file: bool = False,
-    token: Optional[str] = None,
-    user_token: Optional[str] = None,
-):
-    _require_api_token(token)
-    user = _resolve_user(user_token)
-    _validate_content_type(file.content_type)
-    safe_name = _safe_filename(file.filename)
-    path = os.path.join(CONFIG.uploads_dir, safe_name)
+@dataclass
+class _Analysis:
+    profile: DocumentProfile
+    redacted_text: str
+    pii_data: List[dict]
+    boxes: BoxTable
+
+    def to_payload(self) -> dict:
+        return {
+            "total_pii_detected": len(self.pii_data),
+            "document_type": self.profile.name,
+            "redacted_text": self.redacted_text,
+            "boxes": self.boxes.to_records(),
+            "pii": self.pii_data,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "_Analysis":
+        return cls(
+            profile=profile_by_name(payload.get("document_type")),
+            redacted_text=payload["redacted_text"],
+            pii_data=payload["pii"],
+            boxes=BoxTable.from_records(payload["boxes"]),
+        )
+
 
-    data = await file.read()
-    _enforce_size_limit(data)
+@dataclass
+class _RenderedFile:
+    media_type: str
+    filename: str
+    content: bytes
 
-    ext = os.path.splitext(path)[1].lower()
+
+def _no_progress(stage: str, percent: int) -> None:
+    return None
+
+
+async def _extract_upload(
+    upload: SpooledUpload, ext: str, path: str
+) -> Tuple[DocumentProfile, str, WordTable]:
+    profile = GENERIC
     if ext == ".txt":
-        text = data.decode("utf-8", errors="ignore")
-        words = []
+        with stage("decode"):
+            text = (await run_io(upload.read)).decode("utf-8", errors="ignore")
+        words = WordTable.empty()
     elif ext == ".docx":
-        text = _read_docx_text_bytes(data)
-        words = []
+        with stage("decode"):
+            text = await run_io(_read_docx_text_upload, upload)
+        words = WordTable.empty()
     else:
-        temp_path = path + ".tmp"
-        with open(temp_path, "wb") as buffer:
-            buffer.write(data)
+        async with _plain_source(upload, path, ext) as source_path:
+            classify = CONFIG.classify_documents and ext in _IMAGE_EXTENSIONS
+            regions = None
+            if classify and CONFIG.region_ocr:
+                header_text = await run_cpu(read_header_text, source_path)
+                profile, score = classify_with_score(header_text)
+                if score >= REGION_OCR_MIN_SCORE:
+                    regions = profile.regions or None
+
+            text, words = await run_cpu(
+                extract_text_and_boxes,
+                source_path,
+                use_preprocess=CONFIG.use_preprocess,
+                regions=regions,
+            )
+            if regions is not None and not await run_cpu(
+                detect_pii, text, pii_types=profile.pii_types
+            ):
+                # Nothing in the expected fields: the card may be misclassified
+                # or laid out differently, so read the whole page instead.
+                text, words = await run_cpu(
+                    extract_text_and_boxes, source_path, use_preprocess=CONFIG.use_preprocess
+                )
+            if classify and profile is GENERIC:
+                profile = classify_text(text)
+    return profile, text, words
+
+
+def _map_boxes(words: WordTable, pii_data: List[dict]) -> BoxTable:
+    with stage("box_mapping"):
+        box_indices = []
+        box_types = []
+        for pii in pii_data:
+            indices = _pii_word_indices(words, pii)
+            box_indices.extend(indices)
+            box_types.extend([pii["type"]] * len(indices))
+        return words.take(box_indices, box_types)
+
+
+async def _analyze_upload(
+    upload: SpooledUpload,
+    ext: str,
+    path: str,
+    progress: Callable[[str, int], None] = _no_progress,
+) -> _Analysis:
+    # Results are reused for byte-identical uploads processed under the same
+    # OCR/NER/policy settings; the cache lives beside the blobs and is
+    # encrypted like them.
+    cache_path = None
+    if CONFIG.reuse_results:
+        cache_path = result_path(
+            CONFIG.uploads_dir, upload.sha256, ext, _RESULT_FINGERPRINT, upload.encrypted
+        )
+        if upload.deduplicated:
+            cached = await run_io(load_result, cache_path, upload.encrypted)
+            if cached is not None:
+                progress("reused", 70)
+                return _Analysis.from_payload(cached)
+
+    progress("extracting", 10)
+    profile, text, words = await _extract_upload(upload, ext, path)
+
+    progress("detecting", 50)
+    pii_data = await run_cpu(detect_pii, text, pii_types=profile.pii_types)
+    redacted_text = await run_cpu(redact_text, text, pii_data)
+
+    progress("mapping", 70)
+    boxes = _map_boxes(words, pii_data)
+
+    analysis = _Analysis(
+        profile=profile,
+        redacted_text=redacted_text,
+        pii_data=pii_data,
+        boxes=boxes,
+    )
+    if cache_path is not None:
+        try:
+            await run_io(save_result, cache_path, analysis.to_payload(), upload.encrypted)
+        except (OSError, ValueError):
+            pass
+    return analysis
+
+
+async def _iter_pages(
+    upload: SpooledUpload, ext: str, path: str
+) -> AsyncIterator[Tuple[DocumentProfile, int, str, WordTable]]:
+    # PDFs are rasterised and OCR'd one page at a time; every other type is a
+    # single page. Word offsets are relative to each page's text.
+    if ext != ".pdf":
+        profile, text, words = await _extract_upload(upload, ext, path)
+        yield profile, 0, text, words
+        return
+    async with _plain_source(upload, path, ext) as source_path:
+        page_count = await run_cpu(pdf_page_count, source_path)
+        for page_index in range(page_count):
+            text, words = await run_cpu(
+                extract_pdf_page, source_path, page_index, use_preprocess=CONFIG.use_preprocess
+            )
+            yield GENERIC, page_index, text, words
 
-        text, words = extract_text_and_boxes(temp_path, use_preprocess=CONFIG.use_preprocess)
 
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+_FILES_PROCESSED = METRICS.counter(
+    "pii_files_processed_total", "Files processed, by extension", ["extension"]
+)
+_PII_DETECTED = METRICS.counter("pii_detected_total", "PII items detected, by type", ["type"])
+_BATCH_ABANDONED = METRICS.counter(
+    "pii_batch_abandoned_total", "Batch items cancelled because the client disconnected"
+)
 
-    if CONFIG.encryption_enabled:
+
+def _new_timer(debug_timing: bool = False) -> Optional[StageTimer]:
+    # With stage timing off and no debug request, stage() and run_cpu see no
+    # active timer and skip all bookkeeping.
+    return StageTimer() if CONFIG.stage_timing or debug_timing else None
+
+
+def _record_metrics(ext: str, pii_data: List[dict], timer: Optional[StageTimer]) -> None:
+    _FILES_PROCESSED.inc(extension=ext.lstrip(".") or "none")
+    for item in pii_data:
+        _PII_DETECTED.inc(type=item["type"])
+    if timer is not None and CONFIG.stage_timing:
+        timer.observe()
+
+
+async def _admit(user: Optional[dict]) -> AdmissionTicket:
+    # Anonymous callers share one fairness bucket.
+    key = user["id"] if user else None
+    try:
+        return await _ADMISSION.acquire(key)
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after)}
+        )
+
+
+async def _stream_pages(
+    upload: SpooledUpload,
+    ext: str,
+    path: str,
+    make_event: Callable[[List[dict]], RedactionLogData],
+    ticket: AdmissionTicket,
+    timer: Optional[StageTimer],
+    debug_timing: bool = False,
+):
+    with activate(timer):
+        all_pii = []
+        profile = GENERIC
+        offset = 0
+        pages = 0
         try:
-            encrypted = encrypt_bytes(data)
-        except ValueError as exc:
-            raise HTTPException(status_code=500, detail=str(exc))
-        with open(path, "wb") as buffer:
-            buffer.write(encrypted)
-    else:
-        with open(path, "wb") as buffer:
-            buffer.write(data)
-
-    pii_data = detect_pii(text)
-    redacted_text = redact_text(text, pii_data)
-
-    boxes = []
-    for pii in pii_data:
-        indices = _find_matching_indices(words, pii["value"])
-        for idx in indices:
-            word = words[idx]
-            boxes.append(
-                {
-                    "x": word["x"],
-                    "y": word["y"],
-                    "w": word["w"],
-                    "h": word["h"],
-                    "page": word.get("page", 0),
-                    "type": pii["type"],
-                    "start": word.get("start"),
-                    "end": word.get("end"),
+            async for profile, page_index, text, words in _iter_pages(upload, ext, path):
+                page_pii = await run_cpu(detect_pii, text, pii_types=profile.pii_types)
+                redacted_text = await run_cpu(redact_text, text, page_pii)
+                # Report spans in whole-document offsets, matching the joined text
+                # the non-streaming response is built from.
+                pii_data = [
+                    dict(item, start=item["start"] + offset, end=item["end"] + offset)
+                    for item in page_pii
+                ]
+                words.shift_offsets(offset)
+                record = {
+                    "type": "page",
+                    "page": page_index,
+                    "offset": offset,
+                    "length": len(text),
+                    "redacted_text": redacted_text,
+                    "pii": pii_data,
+                    "boxes": _map_boxes(words, pii_data).to_records(),
                 }
-            )
+                yield json.dumps(record) + "\n"
+                all_pii.extend(pii_data)
+                offset += len(text) + len(PAGE_SEPARATOR)
+                pages += 1
+        except HTTPException as exc:
+            yield json.dumps({"type": "error", "status_code": exc.status_code, "error": exc.detail}) + "\n"
+            return
+        except Exception:
+            yield json.dumps({"type": "error", "status_code": 500, "error": "Processing failed"}) + "\n"
+            return
+        finally:
+            upload.close()
+            ticket.release()
+
+        await _log_upload(make_event(all_pii))
+    _record_metrics(ext, all_pii, timer)
+    summary = {
+        "type": "summary",
+        "pages": pages,
+        "document_type": profile.name,
+        "total_pii_detected": len(all_pii),
+    }
+    if debug_timing and timer is not None:
+        summary["timings"] = timer.to_payload()
+    yield json.dumps(summary) + "\n"
+
 
+def _log_event(
+    user: Optional[dict],
+    upload: SpooledUpload,
+    content_type: Optional[str],
+    pii_data: List[dict],
+) -> RedactionLogData:
     pii_counts = {}
     for item in pii_data:
         pii_counts[item["type"]] = pii_counts.get(item["type"], 0) + 1
+    return RedactionLogData(
+        user_id=user["id"] if user else None,
+        username=user["username"] if user else None,
+        filename=os.path.basename(upload.stored_path),
+        content_type=content_type or "",
+        size_bytes=upload.size,
+        total_pii=len(pii_data),
+        pii_counts=pii_counts,
+        content_sha256=upload.sha256,
+    )
+
+
+async def _log_upload(event: RedactionLogData) -> None:
     try:
-        log_redaction(
-            RedactionLogData(
-                user_id=user["id"] if user else None,
-                username=user["username"] if user else None,
-                filename=safe_name,
-                content_type=file.content_type or "",
-                size_bytes=len(data),
-                total_pii=len(pii_data),
-                pii_counts=pii_counts,
+        with stage("db_log"):
+            if not await _AUDIT.submit(event):
+                await run_io(log_redaction, event)
+    except Exception:
+        pass
+
+
+async def _render_file(
+    analysis: _Analysis,
+    upload: SpooledUpload,
+    ext: str,
+    path: str,
+    return_pdf: bool,
+    return_redacted_file: bool,
+) -> Optional[_RenderedFile]:
+    if not return_pdf and not return_redacted_file:
+        return None
+
+    with stage("render"):
+        if return_pdf:
+            pdf_bytes = await run_cpu(generate_redacted_pdf, analysis.redacted_text, output_path=None)
+            return _RenderedFile(media_type="application/pdf", filename="redacted.pdf", content=pdf_bytes)
+
+        if ext in _IMAGE_EXTENSIONS:
+            data = await run_io(upload.read)
+            redacted_bytes = await run_cpu(redact_image_bytes, data, analysis.boxes)
+            return _RenderedFile(media_type="image/png", filename="redacted.png", content=redacted_bytes)
+        if ext == ".pdf":
+            async with _plain_source(upload, path, ext) as source_path:
+                pdf_bytes = await run_cpu(redact_pdf_with_boxes, source_path, analysis.boxes)
+            return _RenderedFile(media_type="application/pdf", filename="redacted.pdf", content=pdf_bytes)
+        raise HTTPException(status_code=400, detail="Redaction file output not supported for this type")
+
+
+def _file_response(rendered: _RenderedFile, output_id: Optional[str] = None) -> Response:
+    headers = {"Content-Disposition": f"attachment; filename={rendered.filename}"}
+    if output_id:
+        headers["X-Output-Id"] = output_id
+    return Response(content=rendered.content, media_type=rendered.media_type, headers=headers)
+
+
+def _validate_output_request(ext: str, return_pdf: bool, return_redacted_file: bool) -> None:
+    if return_pdf or not return_redacted_file:
+        return
+    if ext not in _IMAGE_EXTENSIONS and ext != ".pdf":
+        raise HTTPException(status_code=400, detail="Redaction file output not supported for this type")
+
+
+def _idempotency_fingerprint(
+    file: UploadFile,
+    upload: SpooledUpload,
+    return_pdf: bool,
+    return_redacted_file: bool,
+    debug_timing: bool,
+) -> str:
+    # What must match for a retry to count as the same request, body included.
+    return json.dumps(
+        [
+            file.filename,
+            file.content_type,
+            upload.sha256,
+            return_pdf,
+            return_redacted_file,
+            debug_timing,
+        ]
+    )
+
+
+def _stored_response(response: Response) -> StoredResponse:
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name.lower() not in ("content-length", "content-type")
+    }
+    return StoredResponse(
+        status_code=response.status_code,
+        body=bytes(response.body),
+        media_type=response.media_type,
+        headers=headers,
+    )
+
+
+def _replayed_response(stored: StoredResponse) -> Response:
+    headers = dict(stored.headers)
+    # Timings describe the original request, not this one.
+    headers.pop("server-timing", None)
+    headers["Idempotent-Replayed"] = "true"
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type=stored.media_type,
+        headers=headers,
+    )
+
+
+async def _process_upload(
+    file: UploadFile,
+    ext: str,
+    user: Optional[dict],
+    return_pdf: bool,
+    return_redacted_file: bool,
+    debug_timing: bool,
+    upload: Optional[SpooledUpload] = None,
+    ticket: Optional[AdmissionTicket] = None,
+) -> Response:
+    timer = _new_timer(debug_timing)
+    if ticket is None:
+        ticket = await _admit(user)
+    try:
+        with activate(timer):
+            if upload is None:
+                upload = await _spool_request_file(file, ext)
+            path = upload.stored_path
+            analysis = await _analyze_upload(upload, ext, path)
+            await _log_upload(_log_event(user, upload, file.content_type, analysis.pii_data))
+
+            rendered = await _render_file(
+                analysis, upload, ext, path, return_pdf, return_redacted_file
             )
+    finally:
+        if upload is not None:
+            upload.close()
+        ticket.release()
+    _record_metrics(ext, analysis.pii_data, timer)
+    if rendered is not None:
+        output_id = _OUTPUTS.put(
+            rendered.content, rendered.media_type, rendered.filename, user["id"] if user else None
+        )
+        response = _file_response(rendered, output_id)
+    else:
+        payload = analysis.to_payload()
+        if debug_timing:
+            payload["timings"] = timer.to_payload()
+        response = JSONResponse(payload)
+    if timer is not None:
+        response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
+
+@app.post("/process/")
+async def process_file(
+    file: UploadFile = File(...),
+    return_pdf: bool = False,
+    return_redacted_file: bool = False,
+    stream: bool = False,
+    debug_timing: bool = False,
+    token: Optional[str] = None,
+    user_token: Optional[str] = None,
+    idempotency_key: Optional[str] = Header(None),
+):
+    _require_api_token(token)
+    if debug_timing:
+        _require_admin_token(token)
+    user = await _resolve_user_async(user_token)
+    _validate_content_type(file.content_type)
+    ext = _validated_extension(file.filename)
+    if stream and (return_pdf or return_redacted_file):
+        raise HTTPException(status_code=400, detail="stream cannot be combined with file output")
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key must be 1-255 characters")
+
+    if stream:
+        timer = _new_timer(debug_timing)
+        ticket = await _admit(user)
+        try:
+            with activate(timer):
+                upload = await _spool_request_file(file, ext)
+        except BaseException:
+            ticket.release()
+            raise
+        make_event = functools.partial(_log_event, user, upload, file.content_type)
+        # The ticket is released when the body finishes; the background task
+        # covers clients that disconnect before the first page is sent.
+        return StreamingResponse(
+            _stream_pages(upload, ext, upload.stored_path, make_event, ticket, timer, debug_timing),
+            media_type="application/x-ndjson",
+            background=BackgroundTask(ticket.release),
+        )
+
+    process = functools.partial(
+        _process_upload, file, ext, user, return_pdf, return_redacted_file, debug_timing
+    )
+    # Keys are scoped per user so one caller cannot replay another's result;
+    # anonymous callers cannot be told apart, so their keys are ignored.
+    if idempotency_key is None or user is None:
+        return await process()
+
+    # The body is hashed up front so reusing a key with different bytes is a
+    # conflict rather than a replay. Spooling is work, so it is admitted first.
+    ticket = await _admit(user)
+    try:
+        upload = await _spool_request_file(file, ext)
+    except BaseException:
+        ticket.release()
+        raise
+
+    async def compute() -> StoredResponse:
+        return _stored_response(await process(upload=upload, ticket=ticket))
+
+    key = (user["id"], idempotency_key)
+    fingerprint = _idempotency_fingerprint(
+        file, upload, return_pdf, return_redacted_file, debug_timing
+    )
+    try:
+        stored, replayed = await _IDEMPOTENCY.run(key, fingerprint, compute)
+    except IdempotencyConflict as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    finally:
+        upload.close()
+        ticket.release()
+    if replayed:
+        return _replayed_response(stored)
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type=stored.media_type,
+        headers=stored.headers,
+    )
+
+
+@app.get("/outputs/{output_id}")
+def fetch_output(output_id: str, token: Optional[str] = None, user_token: Optional[str] = None):
+    _require_api_token(token)
+    user = _resolve_user(user_token)
+    entry = _OUTPUTS.get(output_id)
+    if entry is None or (entry.user_id and (not user or user["id"] != entry.user_id)):
+        raise HTTPException(status_code=404, detail="Output not found or expired")
+    return _file_response(_RenderedFile(entry.media_type, entry.filename, entry.content))
+
+
+@dataclass
+class _BatchItem:
+    index: int
+    filename: str
+    record: dict
+    event: Optional[RedactionLogData] = None
+    rendered: Optional[_RenderedFile] = None
+
+
+def _batch_error(index: int, filename: str, status_code: int, detail) -> _BatchItem:
+    record = {
+        "index": index,
+        "filename": filename,
+        "status": "error",
+        "status_code": status_code,
+        "error": detail,
+    }
+    return _BatchItem(index=index, filename=filename, record=record)
+
+
+async def _process_batch_item(
+    index: int,
+    upload: UploadFile,
+    user: Optional[dict],
+    want_files: bool,
+    return_pdf: bool,
+    semaphore: asyncio.Semaphore,
+) -> _BatchItem:
+    filename = os.path.basename(upload.filename or f"file_{index}")
+    try:
+        _validate_content_type(upload.content_type)
+        ext = _validated_extension(filename)
+
+        timer = _new_timer()
+        async with semaphore:
+            # Each item takes a slot like a single upload, so batches count
+            # against max_active and are shed with 429 under overload.
+            ticket = await _admit(user)
+            try:
+                with activate(timer):
+                    spooled = await _spool_request_file(upload, ext)
+                    path = spooled.stored_path
+                    try:
+                        analysis = await _analyze_upload(spooled, ext, path)
+                        rendered = None
+                        if want_files:
+                            as_media = not return_pdf and (
+                                ext in _IMAGE_EXTENSIONS or ext == ".pdf"
+                            )
+                            rendered = await _render_file(
+                                analysis, spooled, ext, path, return_pdf, as_media
+                            )
+                    finally:
+                        spooled.close()
+            finally:
+                ticket.release()
+    except HTTPException as exc:
+        return _batch_error(index, filename, exc.status_code, exc.detail)
+    except Exception:
+        # One unreadable file must not abort the rest of the batch.
+        return _batch_error(index, filename, 500, "Processing failed")
+
+    if want_files and rendered is None:
+        rendered = _RenderedFile(
+            media_type="text/plain",
+            filename="redacted.txt",
+            content=analysis.redacted_text.encode("utf-8"),
         )
+    _record_metrics(ext, analysis.pii_data, timer)
+    stored_as = os.path.basename(spooled.stored_path)
+    record = {"index": index, "filename": filename, "stored_as": stored_as, "status": "ok"}
+    record.update(analysis.to_payload())
+    return _BatchItem(
+        index=index,
+        filename=filename,
+        record=record,
+        event=_log_event(user, spooled, upload.content_type, analysis.pii_data),
+        rendered=rendered,
+    )
+
+
+async def _log_batch(items: List[_BatchItem]) -> None:
+    events = [item.event for item in items if item.event is not None]
+    try:
+        with activate(_new_timer()) as timer:
+            with stage("db_log"):
+                if not await _AUDIT.submit_many(events):
+                    await run_io(log_redactions, events)
+        if timer is not None:
+            timer.observe()
     except Exception:
         pass
 
-    if return_pdf:
-        output_path = os.path.join(CONFIG.output_dir, f"{uuid.uuid4().hex}.pdf")
-        generate_redacted_pdf(redacted_text, output_path=output_path)
-        return FileResponse(
-            output_path,
-            media_type="application/pdf",
-            filename="redacted.pdf",
+
+def _zip_entry_name(item: _BatchItem) -> str:
+    stem = os.path.splitext(item.filename)[0] or "file"
+    suffix = os.path.splitext(item.rendered.filename)[1]
+    return f"{item.index:04d}_{stem}_redacted{suffix}"
+
+
+# Summary fields copied into results.ndjson; raw PII values are left out.
+_MANIFEST_KEYS = ("index", "filename", "status", "error", "document_type", "total_pii_detected")
+
+
+def _build_zip(items: List[_BatchItem]):
+    archive = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+    manifest = []
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for item in sorted(items, key=lambda i: i.index):
+            entry = {
+                key: item.record[key] for key in _MANIFEST_KEYS if key in item.record
+            }
+            if item.rendered is not None:
+                name = _zip_entry_name(item)
+                zf.writestr(name, item.rendered.content)
+                entry["entry"] = name
+            manifest.append(json.dumps(entry))
+        zf.writestr("results.ndjson", "\n".join(manifest) + "\n")
+    archive.seek(0)
+    return archive
+
+
+def _iter_file(handle, chunk_size: int = 64 * 1024):
+    try:
+        while True:
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        handle.close()
+
+
+@app.post("/process/batch")
+async def process_batch(
+    files: List[UploadFile] = File(...),
+    output_format: str = Query("ndjson", alias="format"),
+    return_pdf: bool = False,
+    token: Optional[str] = None,
+    user_token: Optional[str] = None,
+):
+    _require_api_token(token)
+    user = await _resolve_user_async(user_token)
+    output_format = output_format.lower()
+    if output_format not in {"ndjson", "zip"}:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {output_format}")
+    if len(files) > CONFIG.max_batch_files:
+        raise HTTPException(
+            status_code=413, detail=f"Too many files (max {CONFIG.max_batch_files})"
         )
 
-    if return_redacted_file:
-        if ext in {".png", ".jpg", ".jpeg"}:
-            redacted_bytes = redact_image_bytes(data, boxes)
-            return Response(
-                content=redacted_bytes,
-                media_type="image/png",
-                headers={"Content-Disposition": "attachment; filename=redacted.png"},
-            )
-        if ext == ".pdf":
-            temp_pdf = path + ".tmp.pdf"
-            with open(temp_pdf, "wb") as f:
-                f.write(data)
-            output_path = os.path.join(CONFIG.output_dir, f"{uuid.uuid4().hex}.pdf")
-            redact_pdf_with_boxes(temp_pdf, boxes, output_path=output_path)
-            if os.path.exists(temp_pdf):
-                os.remove(temp_pdf)
-            return FileResponse(
-                output_path,
-                media_type="application/pdf",
-                filename="redacted.pdf",
+    semaphore = asyncio.Semaphore(CONFIG.batch_concurrency)
+    want_files = output_format == "zip"
+    tasks = [
+        asyncio.ensure_future(
+            _process_batch_item(index, upload, user, want_files, return_pdf, semaphore)
+        )
+        for index, upload in enumerate(files)
+    ]
+
+    if want_files:
+        items = await asyncio.gather(*tasks)
+        await _log_batch(items)
+        archive = await run_io(_build_zip, items)
+        return StreamingResponse(
+            _iter_file(archive),
+            media_type="application/zip",
+            headers={"Content-Disposition": "attachment; filename=redacted_batch.zip"},
+        )
+
+    async def stream_results():
+        items = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                items.append(item)
+                yield json.dumps(item.record) + "\n"
+        finally:
+            # After a disconnect, items that finished but were never sent are
+            # still logged; unfinished ones are cancelled and counted so the
+            # truncation is on record.
+            sent = {item.index for item in items}
+            abandoned = 0
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                    abandoned += 1
+                elif not task.cancelled() and task.result().index not in sent:
+                    items.append(task.result())
+            if abandoned:
+                _BATCH_ABANDONED.inc(abandoned)
+                logger.warning(
+                    "Batch of %d files truncated by client disconnect; %d not processed",
+                    len(tasks),
+                    abandoned,
+                )
+            await _log_batch(items)
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@dataclass
+class _JobInput:
+    upload: SpooledUpload
+    timer: Optional[StageTimer]
+    ext: str
+    content_type: Optional[str]
+    user: Optional[dict]
+    return_pdf: bool
+    return_redacted_file: bool
+
+
+def _jobs_dir() -> str:
+    path = os.path.join(CONFIG.output_dir, "jobs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _write_job_result(path: str, data: bytes) -> str:
+    # Results hold raw PII values (and unredacted-source renders), so they are
+    # encrypted at rest like uploads; the ".enc" suffix records it per file.
+    if CONFIG.encryption_enabled:
+        data = encrypt_bytes(data)
+        path = f"{path}.enc"
+    _write_file(path, data)
+    return path
+
+
+def _read_job_result(path: str) -> bytes:
+    with open(path, "rb") as f:
+        data = f.read()
+    return decrypt_bytes(data) if path.endswith(".enc") else data
+
+
+async def _run_job(
+    job_id: str, job: _JobInput, progress: Callable[[str, int], None]
+) -> Tuple[str, str]:
+    # Jobs skip admission control: a 429 here would only fail a job that was
+    # already accepted. JOBS_WORKERS bounds how many run at once and
+    # JOBS_MAX_QUEUE sheds load at submission instead.
+    try:
+        path = job.upload.stored_path
+        with activate(job.timer):
+            analysis = await _analyze_upload(job.upload, job.ext, path, progress=progress)
+            await _log_upload(_log_event(job.user, job.upload, job.content_type, analysis.pii_data))
+
+            progress("rendering", 85)
+            rendered = await _render_file(
+                analysis, job.upload, job.ext, path, job.return_pdf, job.return_redacted_file
             )
-        raise HTTPException(status_code=400, detail="Redaction file output not supported for this type")
+    finally:
+        job.upload.close()
+    _record_metrics(job.ext, analysis.pii_data, job.timer)
+    if rendered is None:
+        result_path = os.path.join(_jobs_dir(), f"{job_id}.json")
+        content = json.dumps(analysis.to_payload()).encode("utf-8")
+        return await run_io(_write_job_result, result_path, content), "application/json"
+    suffix = os.path.splitext(rendered.filename)[1]
+    result_path = os.path.join(_jobs_dir(), f"{job_id}{suffix}")
+    return await run_io(_write_job_result, result_path, rendered.content), rendered.media_type
+
+
+_JOBS = JobManager(
+    _run_job,
+    workers=CONFIG.job_workers,
+    max_queue=CONFIG.job_max_queue,
+    result_ttl_minutes=CONFIG.job_result_ttl_minutes,
+    stale_seconds=CONFIG.job_stale_seconds,
+    release=lambda job: job.upload.close(),
+)
+
+
+def _job_for_user(job_id: str, user: Optional[dict]) -> dict:
+    job = fetch_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.get("user_id") and (not user or user["id"] != job["user_id"]):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    file: UploadFile = File(...),
+    return_pdf: bool = False,
+    return_redacted_file: bool = False,
+    priority: int = 0,
+    token: Optional[str] = None,
+    user_token: Optional[str] = None,
+):
+    _require_api_token(token)
+    user = await _resolve_user_async(user_token)
+    _validate_content_type(file.content_type)
+    ext = _validated_extension(file.filename)
+    _validate_output_request(ext, return_pdf, return_redacted_file)
+
+    if not _JOBS.running:
+        raise HTTPException(status_code=503, detail="Job queue not running")
+    priority = max(-10, min(priority, 10))
+
+    timer = _new_timer()
+    with activate(timer):
+        upload = await _spool_request_file(file, ext)
+    job_id = new_job_id()
+    job = await run_io(
+        create_job,
+        job_id,
+        user["id"] if user else None,
+        os.path.basename(upload.stored_path),
+        file.content_type or "",
+        {"return_pdf": return_pdf, "return_redacted_file": return_redacted_file},
+        priority,
+    )
+    if not job:
+        upload.close()
+        raise HTTPException(status_code=500, detail="Database not configured")
+
+    job_input = _JobInput(
+        upload=upload,
+        timer=timer,
+        ext=ext,
+        content_type=file.content_type,
+        user=user,
+        return_pdf=return_pdf,
+        return_redacted_file=return_redacted_file,
+    )
+    try:
+        _JOBS.submit(job_id, job_input, priority=priority)
+    except QueueFullError as exc:
+        upload.close()
+        await run_io(update_job, job_id, status=JOB_FAILED, error=str(exc))
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "30"})
 
+    return {"job_id": job_id, "status": job["status"], "priority": priority}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, token: Optional[str] = None, user_token: Optional[str] = None):
+    _require_api_token(token)
+    user = await _resolve_user_async(user_token)
+    job = await run_io(_job_for_user, job_id, user)
     return {
-        "total_pii_detected": len(pii_data),
-        "redacted_text": redacted_text,
-        "boxes": boxes,
-        "pii": pii_data,
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "priority": job["priority"],
+        "filename": job["filename"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "expires_at": job["expires_at"],
+        "result_url": f"/jobs/{job['id']}/result" if job["status"] == JOB_SUCCEEDED else None,
     }
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, token: Optional[str] = None, user_token: Optional[str] = None):
+    _require_api_token(token)
+    user = await _resolve_user_async(user_token)
+    job = await run_io(_job_for_user, job_id, user)
+    if job["status"] == JOB_EXPIRED:
+        raise HTTPException(status_code=410, detail="Job result expired")
+    if job["status"] == JOB_FAILED:
+        raise HTTPException(status_code=409, detail=f"Job failed: {job['error']}")
+    if job["status"] != JOB_SUCCEEDED:
+        raise HTTPException(status_code=409, detail="Job not finished")
+
+    result_path = job["result_path"]
+    if not result_path or not os.path.exists(result_path):
+        raise HTTPException(status_code=410, detail="Job result expired")
+    content = await run_io(_read_job_result, result_path)
+    if job["result_media_type"] == "application/json":
+        return Response(content=content, media_type="application/json")
+    suffix = os.path.splitext(result_path.removesuffix(".enc"))[1]
+    return Response(
+        content=content,
+        media_type=job["result_media_type"],
+        headers={"Content-Disposition": f'attachment; filename="redacted{suffix}"'},
+    )
@@ -0,0 +1,169 @@
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+from typing import Dict, List, Optional
+
+
+_SAMPLE = b"Name: Ravi Kumar\nPAN: ABCDE1234F\nEmail: ravi@example.com\nPhone: 9876543210\n"
+
+
+def _smaps(pid: int) -> Dict[str, int]:
+    # Sizes in kB from the kernel's per-process rollup (Linux 4.14+).
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+        "shared": values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0),
+    }
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields resume after its ")".
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        if ppid == pid:
+            children.append(int(name))
+    return sorted(children)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+    except OSError:
+        return 0
+
+
+def _wait_ready(base_url: str, workers: int, timeout: float) -> None:
+    # /ready lands on an arbitrary worker; several 200s in a row make it
+    # likely every worker has finished warming up.
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while streak < workers * 3:
+        if time.monotonic() > deadline:
+            raise TimeoutError("server did not become ready")
+        streak = streak + 1 if _get(f"{base_url}/ready") == 200 else 0
+        time.sleep(0.05)
+
+
+def _post_sample(base_url: str, token: Optional[str]) -> None:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="sample.txt"\r\n'
+        "Content-Type: text/plain\r\n\r\n"
+    ).encode() + _SAMPLE + f"\r\n--{boundary}--\r\n".encode()
+    url = f"{base_url}/process/" + (f"?token={token}" if token else "")
+    request = urllib.request.Request(
+        url,
+        data=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+
+
+def measure(workers: int, preload: bool, requests: int, token: Optional[str], timeout: float) -> List[dict]:
+    port = _free_port()
+    command = [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port)]
+    command += ["--workers", str(workers), "--log-level", "warning"]
+    if not preload:
+        command.append("--no-preload")
+    here = os.path.dirname(os.path.abspath(__file__))
+    # Sample uploads and their outputs stay out of the checkout, and no audit
+    # rows go to the configured database.
+    scratch = tempfile.TemporaryDirectory(prefix="pii-memory-")
+    env = dict(
+        os.environ,
+        APP_UPLOADS_DIR=os.path.join(scratch.name, "uploads"),
+        APP_OUTPUT_DIR=os.path.join(scratch.name, "outputs"),
+        DB_URL="",
+    )
+    server = subprocess.Popen(command, cwd=here, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base_url, workers, timeout)
+        # Real traffic touches model pages; measure after some of it.
+        for _ in range(requests):
+            _post_sample(base_url, token)
+        rows = [dict(_smaps(server.pid), role="master", pid=server.pid)]
+        for pid in _children(server.pid):
+            rows.append(dict(_smaps(pid), role="worker", pid=pid))
+        return rows
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+        scratch.cleanup()
+
+
+def _report(workers: int, preload: bool, rows: List[dict]) -> None:
+    mode = "preload" if preload else "no-preload"
+    print(f"\n{workers} workers, {mode} (MiB)")
+    print(f"{'role':>7} {'pid':>8} {'rss':>8} {'pss':>8} {'unique':>8} {'shared':>8}")
+    for row in rows:
+        print(
+            f"{row['role']:>7} {row['pid']:>8} {row['rss'] / 1024:>8.1f} {row['pss'] / 1024:>8.1f} "
+            f"{row['uss'] / 1024:>8.1f} {row['shared'] / 1024:>8.1f}"
+        )
+    worker_rows = [row for row in rows if row["role"] == "worker"]
+    total_pss = sum(row["pss"] for row in rows) / 1024
+    mean_uss = sum(row["uss"] for row in worker_rows) / max(1, len(worker_rows)) / 1024
+    print(f"total pss {total_pss:.1f} MiB, mean unique per worker {mean_uss:.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Start serve.py with N workers and report unique/shared memory per worker."
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--token", default=None, help="APP_API_TOKEN, if the server needs one")
+    parser.add_argument("--compare", action="store_true", help="also run with --no-preload")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("needs Linux /proc/<pid>/smaps_rollup")
+    modes = [True, False] if args.compare else [True]
+    for workers in args.workers:
+        for preload in modes:
+            rows = measure(workers, preload, args.requests, args.token, args.timeout)
+            _report(workers, preload, rows)
+
+
+if __name__ == "__main__":
+    main()
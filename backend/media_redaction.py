@@ -1,55 +1,66 @@
 from io import BytesIO
-from typing import List
+from typing import List, Optional, Union
 
-import cv2
 import numpy as np
-from pdf2image import convert_from_path
-from PIL import Image
 
 from config import CONFIG
+from lazy_import import lazy_module
+from timing import stage
+from word_table import BoxTable, as_box_table
 
 
-def redact_image_bytes(image_bytes: bytes, boxes: List[dict]) -> bytes:
-    image_array = np.frombuffer(image_bytes, dtype=np.uint8)
-    image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
+cv2 = lazy_module("cv2")
+pdf2image = lazy_module("pdf2image")
+pil_image = lazy_module("PIL.Image")
+
+
+def _fill_rects(image: np.ndarray, boxes: BoxTable, page: Optional[int] = None) -> None:
+    for x, y, w, h in boxes.rects(page):
+        cv2.rectangle(image, (x, y), (x + w, y + h), (0, 0, 0), thickness=-1)
+
+
+def redact_image_bytes(image_bytes: bytes, boxes: Union[BoxTable, List[dict]]) -> bytes:
+    with stage("redact_decode"):
+        image_array = np.frombuffer(image_bytes, dtype=np.uint8)
+        image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
     if image is None:
         return image_bytes
 
-    for box in boxes:
-        x = int(box.get("x", 0))
-        y = int(box.get("y", 0))
-        w = int(box.get("w", 0))
-        h = int(box.get("h", 0))
-        if w > 0 and h > 0:
-            cv2.rectangle(image, (x, y), (x + w, y + h), (0, 0, 0), thickness=-1)
+    with stage("redact_fill"):
+        _fill_rects(image, as_box_table(boxes))
 
-    ok, encoded = cv2.imencode(".png", image)
+    with stage("redact_encode"):
+        ok, encoded = cv2.imencode(".png", image)
     if not ok:
         return image_bytes
     return encoded.tobytes()
 
 
-def redact_pdf_with_boxes(pdf_path: str, boxes: List[dict], output_path: str) -> str:
-    pages = convert_from_path(pdf_path, dpi=CONFIG.pdf_dpi)
+def redact_pdf_with_boxes(
+    pdf_path: str, boxes: Union[BoxTable, List[dict]], output_path: Optional[str] = None
+) -> Union[str, bytes]:
+    # Without an output_path the redacted PDF is returned as bytes.
+    with stage("redact_decode"):
+        pages = pdf2image.convert_from_path(pdf_path, dpi=CONFIG.pdf_dpi)
     redacted_pages = []
+    boxes = as_box_table(boxes)
 
-    for page_index, page in enumerate(pages):
-        image = cv2.cvtColor(np.array(page), cv2.COLOR_RGB2BGR)
-        page_boxes = [b for b in boxes if b.get("page", 0) == page_index]
-        for box in page_boxes:
-            x = int(box.get("x", 0))
-            y = int(box.get("y", 0))
-            w = int(box.get("w", 0))
-            h = int(box.get("h", 0))
-            if w > 0 and h > 0:
-                cv2.rectangle(image, (x, y), (x + w, y + h), (0, 0, 0), thickness=-1)
+    with stage("redact_fill"):
+        for page_index, page in enumerate(pages):
+            image = cv2.cvtColor(np.array(page), cv2.COLOR_RGB2BGR)
+            _fill_rects(image, boxes, page=page_index)
 
-        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        redacted_pages.append(Image.fromarray(rgb))
+            rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            redacted_pages.append(pil_image.fromarray(rgb))
 
     if not redacted_pages:
-        return output_path
+        return output_path if output_path is not None else b""
 
-    first, rest = redacted_pages[0], redacted_pages[1:]
-    first.save(output_path, save_all=True, append_images=rest)
-    return output_path
+    with stage("redact_encode"):
+        first, rest = redacted_pages[0], redacted_pages[1:]
+        if output_path is not None:
+            first.save(output_path, save_all=True, append_images=rest)
+            return output_path
+        buffer = BytesIO()
+        first.save(buffer, format="PDF", save_all=True, append_images=rest)
+        return buffer.getvalue()
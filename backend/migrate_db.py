@@ -1,6 +1,6 @@
 from sqlalchemy import inspect, text
 
-from db import get_engine, init_db
+from db import RedactionLog, backfill_log_pii, backfill_stats, get_engine, init_db
 
 
 def _ensure_column(engine, table: str, column: str, ddl: str) -> None:
@@ -14,6 +14,16 @@ def _ensure_column(engine, table: str, column: str, ddl: str) -> None:
         conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {ddl}"))
 
 
+def _ensure_index(engine, table: str, name: str, columns: str) -> None:
+    inspector = inspect(engine)
+    if table not in inspector.get_table_names():
+        return
+    if name in {index["name"] for index in inspector.get_indexes(table)}:
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+
+
 def main() -> None:
     init_db()
     engine = get_engine()
@@ -26,6 +36,23 @@ def main() -> None:
     _ensure_column(engine, "users", "api_token", "api_token VARCHAR(64) NULL")
     _ensure_column(engine, "users", "token_expires_at", "token_expires_at DATETIME NULL")
     _ensure_column(engine, "users", "email", "email VARCHAR(255) NULL")
+    _ensure_column(
+        engine, "redaction_logs", "content_sha256", "content_sha256 VARCHAR(64) NULL"
+    )
+    _ensure_index(
+        engine, "redaction_logs", "ix_redaction_logs_content_sha256", "content_sha256"
+    )
+    _ensure_index(engine, "users", "ix_users_api_token", "api_token")
+    for index in RedactionLog.__table__.indexes:
+        columns = ", ".join(column.name for column in index.columns)
+        _ensure_index(engine, "redaction_logs", index.name, columns)
+    # init_db() created redaction_log_pii; fill it for existing log entries.
+    backfilled = backfill_log_pii()
+    if backfilled:
+        print(f"Backfilled {backfilled} redaction_log_pii rows.")
+    counted = backfill_stats()
+    if counted:
+        print(f"Built redaction_stats_daily from {counted} log entries.")
     print("Database migration complete.")
 
 
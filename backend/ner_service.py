@@ -0,0 +1,228 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from config import CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+# label, start_char, end_char
+Entity = Tuple[str, int, int]
+
+_HEADER = struct.Struct("!I")
+
+
+class NerServiceError(Exception):
+    pass
+
+
+def load_model():
+    import spacy
+
+    try:
+        return spacy.load(CONFIG.ner_model_path)
+    except Exception:
+        try:
+            return spacy.load("en_core_web_sm")
+        except Exception:
+            return None
+
+
+def _encode(payload: dict) -> bytes:
+    data = json.dumps(payload).encode("utf-8")
+    return _HEADER.pack(len(data)) + data
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("NER service closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class NerClient:
+    # Blocking client used from detect_pii, which already runs on a worker
+    # thread or pool process. Each thread keeps one connection with one
+    # request in flight; the service batches across all of them.
+
+    def __init__(self, socket_path: str, timeout: float):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        # A connection inherited across fork would be shared with the parent.
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._drop()
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock, self._local.pid = sock, os.getpid()
+        return sock
+
+    def _drop(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def entities(self, text: str) -> List[Entity]:
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                sock.sendall(_encode({"text": text}))
+                (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+                reply = json.loads(_recv_exactly(sock, size).decode("utf-8"))
+                break
+            except OSError:
+                self._drop()
+                # One retry covers a connection left stale by a service restart.
+                if attempt:
+                    raise
+        if "error" in reply:
+            raise NerServiceError(reply["error"])
+        return [(label, start, end) for label, start, end in reply["ents"]]
+
+
+class NerServer:
+    # Collects requests from every connected API worker and runs them through
+    # nlp.pipe together: a batch closes once it holds `max_batch` texts or
+    # `max_wait` seconds after its first text arrived. Inference runs on one
+    # thread, so texts arriving meanwhile queue up for the next batch.
+
+    def __init__(self, nlp, max_batch: int = 32, max_wait: float = 0.005):
+        self.nlp = nlp
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batch_sizes: List[int] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ner")
+
+    async def start(self, socket_path: str) -> None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batches())
+        self._server = await asyncio.start_unix_server(self._handle, path=socket_path)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                body = await reader.readexactly(size)
+                try:
+                    text = json.loads(body.decode("utf-8"))["text"]
+                    if not isinstance(text, str):
+                        raise TypeError("text must be a string")
+                except (ValueError, KeyError, TypeError) as exc:
+                    # The frame was read whole, so the connection stays usable.
+                    writer.write(_encode({"error": f"Bad request: {exc!r}"}))
+                    await writer.drain()
+                    continue
+                future = loop.create_future()
+                await self._queue.put((text, future))
+                writer.write(_encode(await future))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _run_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self.batch_sizes.append(len(batch))
+            texts = [text for text, _ in batch]
+            replies = await loop.run_in_executor(self._executor, self._infer, texts)
+            for (_, future), reply in zip(batch, replies):
+                if not future.done():
+                    future.set_result(reply)
+
+    def _infer(self, texts: List[str]) -> List[dict]:
+        try:
+            docs = list(self.nlp.pipe(texts, batch_size=len(texts)))
+        except Exception:
+            # One bad text (say, over spaCy's max_length) must not fail the
+            # others that happened to share its batch.
+            return [self._infer_one(text) for text in texts]
+        return [self._reply(doc) for doc in docs]
+
+    def _infer_one(self, text: str) -> dict:
+        try:
+            return self._reply(self.nlp(text))
+        except Exception as exc:
+            return {"error": str(exc) or type(exc).__name__}
+
+    @staticmethod
+    def _reply(doc) -> dict:
+        return {"ents": [[ent.label_, ent.start_char, ent.end_char] for ent in doc.ents]}
+
+
+async def _serve(socket_path: str, max_batch: int, max_wait: float) -> None:
+    started = time.perf_counter()
+    nlp = load_model()
+    if nlp is None:
+        raise SystemExit(f"Could not load NER model {CONFIG.ner_model_path}")
+    logger.info("Loaded NER model in %.0f ms", (time.perf_counter() - started) * 1000)
+    server = NerServer(nlp, max_batch=max_batch, max_wait=max_wait)
+    await server.start(socket_path)
+    logger.info("NER service listening on %s (max_batch=%d)", socket_path, max_batch)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared NER inference service.")
+    parser.add_argument("--socket", default=CONFIG.ner_service_socket or "/tmp/pii-ner.sock")
+    parser.add_argument("--max-batch", type=int, default=CONFIG.ner_service_max_batch)
+    parser.add_argument("--max-wait-ms", type=int, default=CONFIG.ner_service_max_wait_ms)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    try:
+        asyncio.run(_serve(args.socket, max(1, args.max_batch), max(0, args.max_wait_ms) / 1000))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,27 @@
 import os
-from typing import List, Tuple
+from typing import Optional, Sequence, Tuple
 
-import cv2
 import numpy as np
-import pytesseract
-from pdf2image import convert_from_path
-from pytesseract import Output
 
 from config import CONFIG
+from doc_classifier import Region
+from lazy_import import lazy_module
+from timing import stage
+from word_table import WordTable
 
 
-if CONFIG.tesseract_cmd:
-    pytesseract.pytesseract.tesseract_cmd = CONFIG.tesseract_cmd
+PAGE_SEPARATOR = "\n\n"
+
+
+def _configure_tesseract(module) -> None:
+    if CONFIG.tesseract_cmd:
+        module.pytesseract.tesseract_cmd = CONFIG.tesseract_cmd
+
+
+# Loaded on first OCR call (or by warmup), not when the API imports this module.
+cv2 = lazy_module("cv2")
+pytesseract = lazy_module("pytesseract", setup=_configure_tesseract)
+pdf2image = lazy_module("pdf2image")
 
 
 def preprocess_image(image: np.ndarray) -> np.ndarray:
@@ -27,69 +37,109 @@ def preprocess_image(image: np.ndarray) -> np.ndarray:
     return thresh
 
 
-def _extract_from_image(image: np.ndarray, page_index: int, use_preprocess: bool) -> Tuple[str, List[dict]]:
+def _extract_from_image(
+    image: np.ndarray,
+    page_index: int,
+    use_preprocess: bool,
+    regions: Optional[Sequence[Region]] = None,
+) -> Tuple[str, WordTable]:
     if use_preprocess:
         image = preprocess_image(image)
 
-    data = pytesseract.image_to_data(image, output_type=Output.DICT)
+    as_dict = pytesseract.Output.DICT
+    if not regions:
+        data = pytesseract.image_to_data(image, output_type=as_dict)
+        words = WordTable.from_tesseract(data, page_index, base_offset=0)
+        return " ".join(words.text), words
 
-    words = []
-    full_text_parts = []
+    # Only OCR the known field regions; box coordinates are shifted back into
+    # full-page space so redaction still lands on the original image.
+    height, width = image.shape[:2]
+    tables = []
     current_index = 0
-    n_boxes = len(data["text"])
-    for i in range(n_boxes):
-        word = data["text"][i]
-        if word.strip() != "":
-            if full_text_parts:
-                full_text_parts.append(" ")
-                current_index += 1
-
-            start = current_index
-            end = start + len(word)
-            current_index = end
-
-            words.append(
-                {
-                    "text": word,
-                    "x": data["left"][i],
-                    "y": data["top"][i],
-                    "w": data["width"][i],
-                    "h": data["height"][i],
-                    "page": page_index,
-                    "start": start,
-                    "end": end,
-                }
-            )
-
-            full_text_parts.append(word)
-
-    full_text = "".join(full_text_parts)
-    return full_text, words
-
-
-def extract_text_and_boxes(file_path: str, use_preprocess: bool = True) -> Tuple[str, List[dict]]:
+    for rx, ry, rw, rh in regions:
+        x0 = max(0, int(rx * width))
+        y0 = max(0, int(ry * height))
+        x1 = min(width, int((rx + rw) * width))
+        y1 = min(height, int((ry + rh) * height))
+        if x1 <= x0 or y1 <= y0:
+            continue
+        data = pytesseract.image_to_data(image[y0:y1, x0:x1], output_type=as_dict)
+        table = WordTable.from_tesseract(data, page_index, current_index, dx=x0, dy=y0)
+        if len(table):
+            tables.append(table)
+            current_index = int(table.end[-1])
+
+    words = WordTable.concat(tables)
+    return " ".join(words.text), words
+
+
+def read_header_text(file_path: str, band: float = 0.3, scale: float = 0.5) -> str:
+    # Cheap OCR of the top band only; ID card headers carry the issuer name.
+    with stage("decode"):
+        image = cv2.imread(file_path)
+    if image is None:
+        return ""
+    with stage("classify"):
+        height = image.shape[0]
+        header = image[: max(1, int(height * band))]
+        if scale and scale != 1.0:
+            header = cv2.resize(header, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(header, cv2.COLOR_BGR2GRAY)
+        return pytesseract.image_to_string(gray)
+
+
+def pdf_page_count(file_path: str) -> int:
+    return int(pdf2image.pdfinfo_from_path(file_path)["Pages"])
+
+
+def extract_pdf_page(
+    file_path: str, page_index: int, use_preprocess: bool = True
+) -> Tuple[str, WordTable]:
+    # Rasterises a single page so callers can report pages as they finish.
+    # Word offsets are relative to the returned page text.
+    with stage("decode"):
+        pages = pdf2image.convert_from_path(
+            file_path, dpi=CONFIG.pdf_dpi, first_page=page_index + 1, last_page=page_index + 1
+        )
+        if not pages:
+            return "", WordTable.empty()
+        image = cv2.cvtColor(np.array(pages[0]), cv2.COLOR_RGB2BGR)
+    with stage("ocr_page"):
+        return _extract_from_image(image, page_index, use_preprocess)
+
+
+def extract_text_and_boxes(
+    file_path: str,
+    use_preprocess: bool = True,
+    regions: Optional[Sequence[Region]] = None,
+) -> Tuple[str, WordTable]:
     ext = os.path.splitext(file_path)[1].lower()
 
     if ext == ".pdf":
-        pages = convert_from_path(file_path, dpi=CONFIG.pdf_dpi)
-        all_words = []
+        with stage("decode"):
+            pages = pdf2image.convert_from_path(file_path, dpi=CONFIG.pdf_dpi)
+        page_tables = []
         page_texts = []
         offset = 0
         for page_index, page in enumerate(pages):
             image = cv2.cvtColor(np.array(page), cv2.COLOR_RGB2BGR)
-            text, words = _extract_from_image(image, page_index, use_preprocess)
-            for word in words:
-                word["start"] += offset
-                word["end"] += offset
+            with stage("ocr_page"):
+                text, words = _extract_from_image(image, page_index, use_preprocess)
+            words.shift_offsets(offset)
             page_texts.append(text)
-            all_words.extend(words)
-            offset += len(text) + 2
+            page_tables.append(words)
+            offset += len(text) + len(PAGE_SEPARATOR)
 
-        full_text = "\n\n".join(page_texts)
-        return full_text, all_words
+        full_text = PAGE_SEPARATOR.join(page_texts)
+        return full_text, WordTable.concat(page_tables)
 
-    image = cv2.imread(file_path)
+    with stage("decode"):
+        image = cv2.imread(file_path)
     if image is None:
-        return "", []
+        return "", WordTable.empty()
 
-    return _extract_from_image(image, page_index=0, use_preprocess=use_preprocess)
+    with stage("ocr_page"):
+        return _extract_from_image(
+            image, page_index=0, use_preprocess=use_preprocess, regions=regions
+        )
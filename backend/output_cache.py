@@ -0,0 +1,80 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CachedOutput:
+    content: bytes
+    media_type: str
+    filename: str
+    user_id: Optional[int]
+    expires_at: float
+
+
+class OutputCache:
+    # Rendered files kept in memory for a short while so a client can fetch
+    # the same output again without reprocessing. Entries expire after
+    # `ttl_seconds`; the least recently used ones are evicted once the total
+    # size passes `max_bytes`. `max_bytes=0` disables the cache.
+
+    def __init__(self, max_bytes: int, ttl_seconds: int):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedOutput]" = OrderedDict()
+        self._size = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def put(
+        self, content: bytes, media_type: str, filename: str, user_id: Optional[int] = None
+    ) -> Optional[str]:
+        if not self.enabled or len(content) > self.max_bytes:
+            return None
+        output_id = uuid.uuid4().hex
+        entry = CachedOutput(
+            content=content,
+            media_type=media_type,
+            filename=filename,
+            user_id=user_id,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._purge_expired()
+            self._entries[output_id] = entry
+            self._size += len(content)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.content)
+        return output_id
+
+    def get(self, output_id: str) -> Optional[CachedOutput]:
+        with self._lock:
+            entry = self._entries.get(output_id)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._drop(output_id)
+                return None
+            self._entries.move_to_end(output_id)
+            return entry
+
+    def _drop(self, output_id: str) -> None:
+        entry = self._entries.pop(output_id)
+        self._size -= len(entry.content)
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            self._drop(key)
@@ -1,10 +1,15 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Preformatted
-from reportlab.lib.styles import getSampleStyleSheet
+from io import BytesIO
 
 
 def generate_redacted_pdf(text, output_path="redacted_output.pdf"):
-    doc = SimpleDocTemplate(output_path, pagesize=letter)
+    # reportlab is imported here so only processes that render pay for it.
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Preformatted
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    # output_path=None renders into memory and returns the PDF bytes.
+    buffer = BytesIO() if output_path is None else None
+    doc = SimpleDocTemplate(buffer if buffer is not None else output_path, pagesize=letter)
     elements = []
 
     styles = getSampleStyleSheet()
@@ -15,4 +20,6 @@ def generate_redacted_pdf(text, output_path="redacted_output.pdf"):
 
     doc.build(elements)
 
+    if buffer is not None:
+        return buffer.getvalue()
     return output_path
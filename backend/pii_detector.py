@@ -1,22 +1,47 @@
+import logging
 import re
-from typing import Optional
-
-import spacy
+import threading
+from typing import List
 
 from config import CONFIG
+from ner_service import Entity, NerClient, NerServiceError, load_model
+from timing import stage
 
 
-def _load_model() -> Optional["spacy.language.Language"]:
-    try:
-        return spacy.load(CONFIG.ner_model_path)
-    except Exception:
-        try:
-            return spacy.load("en_core_web_sm")
-        except Exception:
-            return None
+logger = logging.getLogger(__name__)
+
+# With a shared NER service configured, API workers never load the model.
+_NER_CLIENT = (
+    NerClient(CONFIG.ner_service_socket, CONFIG.ner_service_timeout_seconds)
+    if CONFIG.ner_service_socket
+    else None
+)
+_NLP = None
+_NLP_LOADED = False
+_NLP_LOCK = threading.Lock()
 
 
-_NLP = _load_model()
+def get_nlp():
+    # spaCy and the model load on first use (or during warmup / pool worker
+    # start), so importing this module stays cheap.
+    global _NLP, _NLP_LOADED
+    if not _NLP_LOADED:
+        with _NLP_LOCK:
+            if not _NLP_LOADED:
+                _NLP = None if _NER_CLIENT is not None else load_model()
+                _NLP_LOADED = True
+    return _NLP
+
+
+def _ner_entities(text: str) -> List[Entity]:
+    if _NER_CLIENT is not None:
+        try:
+            return _NER_CLIENT.entities(text)
+        except (OSError, NerServiceError) as exc:
+            # Same best-effort contract as a model that failed to load.
+            logger.warning("NER service unavailable: %s", exc)
+            return []
+    return [(ent.label_, ent.start_char, ent.end_char) for ent in _NLP(text).ents]
 
 
 def _normalize_address(value: str) -> str:
@@ -46,41 +71,46 @@ _PATTERNS = [
 ]
 
 
-def detect_pii(text):
+def detect_pii(text, pii_types=None):
     pii_list = []
 
-    for pii_type, pattern, group_index in _PATTERNS:
-        for match in pattern.finditer(text):
-            if group_index:
-                value = _normalize_address(match.group(group_index))
-                start = match.start(group_index)
-                end = match.end(group_index)
-            else:
-                value = match.group(0)
-                start = match.start()
-                end = match.end()
-
-            pii_list.append(
-                {
-                    "type": pii_type,
-                    "value": value,
-                    "start": start,
-                    "end": end,
-                    "source": "regex",
-                }
-            )
+    with stage("regex"):
+        for pii_type, pattern, group_index in _PATTERNS:
+            if pii_types is not None and pii_type not in pii_types:
+                continue
+            for match in pattern.finditer(text):
+                if group_index:
+                    value = _normalize_address(match.group(group_index))
+                    start = match.start(group_index)
+                    end = match.end(group_index)
+                else:
+                    value = match.group(0)
+                    start = match.start()
+                    end = match.end()
+
+                pii_list.append(
+                    {
+                        "type": pii_type,
+                        "value": value,
+                        "start": start,
+                        "end": end,
+                        "source": "regex",
+                    }
+                )
 
     # NER detection (best-effort)
-    if _NLP is not None:
-        doc = _NLP(text)
-        for ent in doc.ents:
-            if ent.label_ == "PERSON":
+    has_ner = _NER_CLIENT is not None or get_nlp() is not None
+    if has_ner and (pii_types is None or "PERSON" in pii_types):
+        with stage("ner"):
+            entities = _ner_entities(text)
+        for label, start, end in entities:
+            if label == "PERSON":
                 pii_list.append(
                     {
                         "type": "PERSON",
-                        "value": ent.text,
-                        "start": ent.start_char,
-                        "end": ent.end_char,
+                        "value": text[start:end],
+                        "start": start,
+                        "end": end,
                         "source": "ner",
                     }
                 )
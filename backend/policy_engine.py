@@ -1,5 +1,4 @@
 from config import CONFIG
-from rag_service import decide_action_rag
 
 policy_rules = {
     "AADHAAR": "REDACT",
@@ -26,6 +25,9 @@ def rag_policy_stub(pii_item, text):
 
 def decide_action(pii_item, text=None):
     if CONFIG.enable_rag_stub:
+        # chromadb and openai are only imported when RAG is switched on.
+        from rag_service import decide_action_rag
+
         return decide_action_rag(pii_item, text or "")
 
     pii_type = pii_item.get("type") if isinstance(pii_item, dict) else pii_item
@@ -1,4 +1,7 @@
+import time
+
 from policy_engine import decide_action
+from timing import record, stage
 
 def mask_value(value):
     if "@" in value:
@@ -32,10 +35,18 @@ def _apply_span_replacements(text, replacements):
 
 
 def redact_text(text, pii_list):
+    with stage("redact_text"):
+        return _redact_text(text, pii_list)
+
+
+def _redact_text(text, pii_list):
     span_replacements = []
+    policy_seconds = 0.0
 
     for item in pii_list:
+        started = time.perf_counter()
         action = decide_action(item, text=text)
+        policy_seconds += time.perf_counter() - started
         value = item["value"]
         start = item.get("start")
         end = item.get("end")
@@ -56,4 +67,6 @@ def redact_text(text, pii_list):
     if span_replacements:
         text = _apply_span_replacements(text, span_replacements)
 
+    if pii_list:
+        record("policy", policy_seconds)
     return text
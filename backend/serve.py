@@ -0,0 +1,149 @@
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+from typing import Dict, Optional
+
+
+logger = logging.getLogger("serve")
+
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _load_app(warmup: bool):
+    # Importing main compiles the regex patterns and builds the policy table
+    # and document profiles; preload() adds the NER model and the OCR and
+    # rendering libraries, which main only imports on first use. Running the
+    # warmup here too makes spaCy build its lazy per-pipeline state before
+    # the fork, so it lands in shared pages instead of once per worker.
+    from main import app
+
+    if warmup:
+        from config import CONFIG
+        from warmup import preload, run_warmup
+
+        if CONFIG.warmup_enabled:
+            run_warmup()
+        else:
+            preload()
+    return app
+
+
+def _run_worker(sock: socket.socket, app, log_level: str) -> None:
+    import uvicorn
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, signal.SIG_DFL)
+    gc.enable()
+    if app is None:
+        app = _load_app(warmup=False)
+    else:
+        from db import get_engine
+
+        # Never reuse a connection the master may have opened.
+        engine = get_engine()
+        if engine is not None:
+            engine.dispose(close=False)
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(sock: socket.socket, app, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(sock, app, log_level)
+        except BaseException:
+            logger.exception("Worker %s crashed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve(host: str, port: int, workers: int, preload: bool = True, log_level: str = "info") -> None:
+    sock = _bind(host, port)
+    app = None
+    if preload:
+        # No collections while the models load, then move everything that
+        # survived into the permanent generation: the collector never writes
+        # to those objects again, so their pages stay shared after fork.
+        gc.disable()
+        app = _load_app(warmup=True)
+        gc.freeze()
+        logger.info("Loaded app in master (%d objects frozen)", gc.get_freeze_count())
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(workers):
+        children[_spawn(sock, app, log_level)] = slot
+    logger.info(
+        "Serving on %s:%d with %d workers (%s)",
+        host,
+        port,
+        workers,
+        "preloaded" if preload else "per-worker load",
+    )
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        # A replacement forks from the same master, so it shares the same pages.
+        logger.warning("Worker %d exited with status %d; restarting", pid, status)
+        children[_spawn(sock, app, log_level)] = slot
+    sock.close()
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Pre-forking server: loads models once and shares them copy-on-write."
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--no-preload",
+        action="store_true",
+        help="load the app in each worker after fork (for comparison)",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(name)s %(message)s")
+    if not hasattr(os, "fork"):
+        sys.exit("serve.py needs os.fork(); use uvicorn directly on this platform")
+    serve(args.host, args.port, max(1, args.workers), not args.no_preload, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,9 +19,13 @@ def _build_app(monkeypatch, tmp_path, extra_env=None):
             monkeypatch.setenv(key, value)
 
     import config as config_module
+    import db as db_module
+    import jobs as jobs_module
     import main as main_module
 
     importlib.reload(config_module)
+    importlib.reload(db_module)
+    importlib.reload(jobs_module)
     importlib.reload(main_module)
 
     return main_module.app
@@ -33,3 +37,29 @@ def app_factory(monkeypatch, tmp_path):
         return _build_app(monkeypatch, tmp_path, extra_env=extra_env)
 
     return _factory
+
+
+@pytest.fixture
+def db_app(app_factory, tmp_path):
+    # An app backed by a fresh sqlite database with its tables created.
+    def _factory(extra_env=None):
+        env = {"DB_URL": f"sqlite:///{tmp_path / 'app.db'}"}
+        env.update(extra_env or {})
+        app = app_factory(env)
+        import db
+
+        db.init_db()
+        return app
+
+    return _factory
+
+
+@pytest.fixture
+def make_user():
+    # Registers and logs in through the API; returns the user's token.
+    def _make(client, username="asha", password="Str0ng!pass"):
+        creds = {"username": username, "password": password}
+        assert client.post("/auth/register", json=creds).status_code == 200
+        return client.post("/auth/login", json=creds).json()["token"]
+
+    return _make
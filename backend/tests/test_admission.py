@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+
+from admission import AdmissionController, AdmissionRejected
+
+
+def test_admission_hands_slots_out_round_robin_across_users():
+    order = []
+
+    async def request(controller, user, label):
+        ticket = await controller.acquire(user)
+        order.append(label)
+        await asyncio.sleep(0)
+        ticket.release()
+
+    async def scenario():
+        controller = AdmissionController(
+            max_active=1, max_queue=10, max_queue_per_user=10, retry_after_seconds=1
+        )
+        holder = await controller.acquire("holder")
+        # "a" floods the queue before "b" arrives; b should not wait behind all of a.
+        tasks = [asyncio.create_task(request(controller, "a", f"a{i}")) for i in range(3)]
+        tasks.append(asyncio.create_task(request(controller, "b", "b0")))
+        await asyncio.sleep(0)
+        assert controller.queue_depth() == 4
+        holder.release()
+        await asyncio.gather(*tasks)
+        assert controller.active == 0
+        assert controller.queue_depth() == 0
+
+    asyncio.run(scenario())
+    assert order == ["a0", "b0", "a1", "a2"]
+
+
+def test_admission_rejects_when_queues_are_full():
+    async def scenario():
+        controller = AdmissionController(
+            max_active=1, max_queue=2, max_queue_per_user=1, retry_after_seconds=7
+        )
+        holder = await controller.acquire("holder")
+        waiter = asyncio.create_task(controller.acquire("a"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as per_user:
+            await controller.acquire("a")
+        assert per_user.value.retry_after == 7
+
+        other = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire("c")
+
+        # A waiter that gives up must not leak its place in the queue.
+        other.cancel()
+        await asyncio.gather(other, return_exceptions=True)
+        assert controller.queue_depth() == 1
+
+        holder.release()
+        ticket = await waiter
+        ticket.release()
+        ticket.release()
+        assert controller.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_process_returns_429_when_busy(app_factory, monkeypatch):
+    app = app_factory(
+        {
+            "ADMISSION_MAX_ACTIVE": "1",
+            "ADMISSION_MAX_QUEUE": "0",
+            "ADMISSION_RETRY_AFTER_SECONDS": "3",
+            "APP_ADMIN_TOKEN": "secret",
+        }
+    )
+    import main
+    from word_table import WordTable
+
+    ocr_started = threading.Event()
+
+    def slow_extract(path, use_preprocess=True, regions=None):
+        ocr_started.set()
+        time.sleep(0.5)
+        return "", WordTable.empty()
+
+    monkeypatch.setattr(main, "extract_text_and_boxes", slow_extract)
+
+    with TestClient(app) as client:
+        results = {}
+
+        def upload():
+            files = {"file": ("scan.png", BytesIO(b"img"), "image/png")}
+            results["first"] = client.post("/process/", files=files).status_code
+
+        worker = threading.Thread(target=upload)
+        worker.start()
+        assert ocr_started.wait(timeout=5)
+
+        files = {"file": ("sample.txt", BytesIO(b"hello"), "text/plain")}
+        busy = client.post("/process/", files=files)
+        worker.join(timeout=10)
+
+        assert results["first"] == 200
+        assert busy.status_code == 429
+        assert busy.headers["retry-after"] == "3"
+
+        assert client.get("/metrics").status_code == 403
+        metrics = client.get("/metrics?token=secret")
+        assert metrics.status_code == 200
+        assert 'pii_admission_rejected_total{reason="queue_full"}' in metrics.text
+        assert "pii_admission_queue_depth 0" in metrics.text
+        assert "pii_admission_wait_seconds_count" in metrics.text
+
+
+def test_batch_items_go_through_admission(app_factory, monkeypatch):
+    import json
+
+    app = app_factory({"ADMISSION_MAX_ACTIVE": "1", "ADMISSION_MAX_QUEUE": "8"})
+    import main
+
+    running = []
+    peak = []
+    analyze = main._analyze_upload
+
+    async def tracking_analyze(*args, **kwargs):
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.05)
+        try:
+            return await analyze(*args, **kwargs)
+        finally:
+            running.pop()
+
+    monkeypatch.setattr(main, "_analyze_upload", tracking_analyze)
+
+    def post_batch(client, count):
+        files = [
+            ("files", (f"f{i}.txt", BytesIO(b"Email: john@gmail.com"), "text/plain"))
+            for i in range(count)
+        ]
+        response = client.post("/process/batch", files=files)
+        return [json.loads(line) for line in response.text.splitlines() if "index" in line]
+
+    with TestClient(app) as client:
+        records = post_batch(client, 4)
+        assert [r["status"] for r in records] == ["ok"] * 4
+        assert max(peak) == 1
+
+    app = app_factory({"ADMISSION_MAX_ACTIVE": "1", "ADMISSION_MAX_QUEUE": "0"})
+    import main
+
+    monkeypatch.setattr(main, "_analyze_upload", tracking_analyze)
+    with TestClient(app) as client:
+        # The batch's second item finds the only slot taken and no queue room.
+        records = post_batch(client, 2)
+        assert sorted(r.get("status_code", 200) for r in records) == [200, 429]
+
+
+def test_idempotent_request_is_admitted_before_spooling(db_app, make_user, monkeypatch):
+    app = db_app({"ADMISSION_MAX_ACTIVE": "1", "ADMISSION_MAX_QUEUE": "0"})
+    import main
+
+    spooled = []
+    spool = main._spool_request_file
+
+    async def tracking_spool(*args, **kwargs):
+        spooled.append(1)
+        return await spool(*args, **kwargs)
+
+    monkeypatch.setattr(main, "_spool_request_file", tracking_spool)
+    with TestClient(app) as client:
+        token = make_user(client)
+
+        def post():
+            files = {"file": ("sample.txt", BytesIO(b"hello"), "text/plain")}
+            return client.post(
+                f"/process/?user_token={token}", files=files, headers={"Idempotency-Key": "k"}
+            )
+
+        ticket = client.portal.call(main._ADMISSION.acquire, None)
+        assert post().status_code == 429
+        assert spooled == []
+        ticket.release()
+        assert post().status_code == 200
+        assert main._ADMISSION.active == 0
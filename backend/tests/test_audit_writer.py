@@ -0,0 +1,135 @@
+import asyncio
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+from audit_writer import AuditWriter
+from db import RedactionLogData
+
+
+def _recorder(batches):
+    async def write(events):
+        batches.append(events)
+        return len(events)
+
+    return write
+
+
+def _event(name: str) -> RedactionLogData:
+    return RedactionLogData(
+        user_id=None,
+        username=None,
+        filename=name,
+        content_type="text/plain",
+        size_bytes=1,
+        total_pii=0,
+        pii_counts={},
+    )
+
+
+def test_writer_flushes_on_batch_size_and_interval():
+    batches = []
+
+    async def scenario():
+        writer = AuditWriter(_recorder(batches), batch_size=3, flush_interval=0.2)
+        await writer.start()
+        for name in "abc":
+            assert await writer.submit(_event(name))
+        await asyncio.sleep(0.05)
+        # A full batch goes out without waiting for the interval.
+        assert [[e.filename for e in batch] for batch in batches] == [["a", "b", "c"]]
+
+        await writer.submit(_event("d"))
+        await asyncio.sleep(0.05)
+        assert len(batches) == 1
+        await asyncio.sleep(0.3)
+        assert [e.filename for e in batches[1]] == ["d"]
+        await writer.stop()
+
+    asyncio.run(scenario())
+
+
+def test_writer_drops_when_full_and_flushes_on_stop():
+    batches = []
+
+    async def scenario():
+        writer = AuditWriter(
+            _recorder(batches),
+            max_queue=2,
+            batch_size=10,
+            flush_interval=60,
+            enqueue_timeout=0,
+        )
+        await writer.start()
+        for name in "abc":
+            assert await writer.submit(_event(name))
+        assert len(writer) == 2
+        await writer.stop()
+        assert not await writer.submit(_event("d"))
+
+    asyncio.run(scenario())
+    assert [[e.filename for e in batch] for batch in batches] == [["a", "b"]]
+
+
+def test_writer_counts_failed_batches():
+    import audit_writer
+
+    async def fail(events):
+        raise RuntimeError("database is down")
+
+    async def scenario():
+        writer = AuditWriter(fail, batch_size=1, flush_interval=60)
+        await writer.start()
+        await writer.submit(_event("a"))
+        await writer.stop()
+
+    before = audit_writer._FAILED.value()
+    asyncio.run(scenario())
+    assert audit_writer._FAILED.value() == before + 1
+
+
+
+def test_writer_retries_failed_batch_one_event_at_a_time():
+    import audit_writer
+
+    batches = []
+
+    async def write(events):
+        if len(events) > 1 or events[0].filename == "bad":
+            raise RuntimeError("constraint violation")
+        batches.append(events)
+        return len(events)
+
+    async def scenario():
+        writer = AuditWriter(write, batch_size=3, flush_interval=60)
+        await writer.start()
+        for name in ("a", "bad", "c"):
+            await writer.submit(_event(name))
+        await writer.stop()
+
+    failed = audit_writer._FAILED.value()
+    written = audit_writer._WRITTEN.value()
+    asyncio.run(scenario())
+    assert audit_writer._FAILED.value() == failed + 1
+    assert audit_writer._WRITTEN.value() == written + 2
+    assert [[e.filename for e in batch] for batch in batches] == [["a"], ["c"]]
+
+
+def test_process_logs_through_background_writer(db_app, monkeypatch):
+    app = db_app({"AUDIT_FLUSH_INTERVAL_MS": "60000"})
+    import db
+    import main
+
+    inline = []
+    monkeypatch.setattr(main, "log_redaction", inline.append)
+    files = {"file": ("sample.txt", BytesIO(b"Email: john@gmail.com"), "text/plain")}
+    with TestClient(app) as client:
+        assert client.post("/process/", files=files).status_code == 200
+        assert len(main._AUDIT) == 1
+        assert db.fetch_logs().total == 0
+    assert inline == []
+
+    # Shutdown flushes what is still queued.
+    page = db.fetch_logs()
+    assert page.total == 1
+    assert page.logs[0]["filename"].endswith(".txt")
@@ -0,0 +1,106 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from token_cache import TokenCache
+
+
+def _client_with_user(db_app, make_user):
+    client = TestClient(db_app({"APP_ADMIN_TOKEN": "secret"}))
+    import db
+
+    return client, db, make_user(client)
+
+
+def _count_queries(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_token_lookup_is_cached_until_logout(db_app, make_user):
+    client, db, token = _client_with_user(db_app, make_user)
+    statements = _count_queries(db.get_engine())
+
+    assert client.get(f"/auth/me?user_token={token}").json()["username"] == "asha"
+    first = len(statements)
+    assert first > 0
+    for _ in range(3):
+        assert client.get(f"/auth/me?user_token={token}").status_code == 200
+    assert len(statements) == first
+
+    assert client.post(f"/auth/logout?user_token={token}").status_code == 200
+    assert client.get(f"/auth/me?user_token={token}").status_code == 401
+
+
+def test_password_changes_evict_cached_tokens(db_app, make_user):
+    client, _, token = _client_with_user(db_app, make_user)
+    assert client.get(f"/auth/me?user_token={token}").status_code == 200
+
+    response = client.post(
+        f"/auth/change-password?user_token={token}",
+        json={"old_password": "Str0ng!pass", "new_password": "N3w!password"},
+    )
+    assert response.status_code == 200
+    assert client.get(f"/auth/me?user_token={token}").status_code == 401
+
+    token = client.post("/auth/login", json={"username": "asha", "password": "N3w!password"}).json()[
+        "token"
+    ]
+    assert client.get(f"/auth/me?user_token={token}").status_code == 200
+    response = client.post(
+        "/auth/reset-password?token=secret",
+        json={"username": "asha", "new_password": "An0ther!pass"},
+    )
+    assert response.status_code == 200
+    assert client.get(f"/auth/me?user_token={token}").status_code == 401
+
+
+def test_token_cache_respects_size_and_token_expiry():
+    from datetime import datetime, timedelta, timezone
+
+    cache = TokenCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", {"id": 1, "username": "a"})
+    cache.put("b", {"id": 2, "username": "b"})
+    assert cache.get("a") is not None
+    cache.put("c", {"id": 3, "username": "c"})
+    # "b" was least recently used.
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+    cache.put("d", {"id": 4, "username": "d"}, token_expires_at=expired)
+    assert cache.get("d") is None
+
+    cache.invalidate_user(1)
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+
+
+def test_logout_evicts_token_after_commit(db_app, make_user, monkeypatch):
+    client, db, token = _client_with_user(db_app, make_user)
+    real_commit = db._SessionLocal.class_.commit
+
+    def commit_after_concurrent_lookup(session):
+        # A request resolving the token just before logout commits.
+        db._TOKEN_CACHE.put(token, {"id": 1, "username": "asha"})
+        real_commit(session)
+
+    monkeypatch.setattr(db._SessionLocal.class_, "commit", commit_after_concurrent_lookup)
+    assert db.logout_user(token) is True
+    monkeypatch.undo()
+    assert db.get_user_by_token(token) is None
+
+
+def test_lookup_does_not_recache_token_evicted_during_read(db_app, make_user, monkeypatch):
+    client, db, token = _client_with_user(db_app, make_user)
+    db._TOKEN_CACHE.clear()
+    real_as_utc = db._as_utc
+
+    def logout_between_read_and_cache(value):
+        # A logout commits and evicts after the lookup has read the row.
+        db._TOKEN_CACHE.invalidate_token(token)
+        return real_as_utc(value)
+
+    monkeypatch.setattr(db, "_as_utc", logout_between_read_and_cache)
+    assert db.get_user_by_token(token) is not None
+    assert db.cached_user_for_token(token) is None
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import time
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+from blob_store import blob_name, collect_garbage
+
+
+def _fake_ocr(calls):
+    from word_table import WordTable
+
+    def fake_extract(path, use_preprocess=True, regions=None):
+        calls.append(path)
+        words = WordTable(
+            text=["PAN", "ABCDE1234F"],
+            x=[10, 60],
+            y=[5, 5],
+            w=[40, 90],
+            h=[12, 12],
+            page=[0, 0],
+            start=[0, 4],
+            end=[3, 14],
+        )
+        return "PAN ABCDE1234F", words
+
+    return fake_extract
+
+
+def test_duplicate_upload_reuses_blob_and_result(app_factory, monkeypatch, tmp_path):
+    client = TestClient(app_factory())
+    import main
+
+    calls = []
+    monkeypatch.setattr(main, "extract_text_and_boxes", _fake_ocr(calls))
+    data = b"same-image-bytes"
+
+    first = client.post("/process/", files={"file": ("a.png", BytesIO(data), "image/png")})
+    blob = tmp_path / "uploads" / blob_name(hashlib.sha256(data).hexdigest(), ".png", False)
+    assert blob.exists()
+    first_inode = os.stat(blob).st_ino
+
+    second = client.post("/process/", files={"file": ("b.png", BytesIO(data), "image/png")})
+    assert second.json() == first.json()
+    assert len(calls) == 1
+    assert os.stat(blob).st_ino == first_inode
+
+
+
+def test_encrypted_upload_is_written_in_the_spooling_pass(app_factory, tmp_path):
+    from encryption import decrypt_bytes, generate_key
+
+    app_factory({"APP_ENCRYPTION_ENABLED": "true", "APP_ENCRYPTION_KEY": generate_key()})
+    from uploads import spool_upload
+
+    data = b"same-image-bytes"
+    path = str(tmp_path / "blob.png.enc")
+
+    def temp_blobs():
+        return [name for name in os.listdir(tmp_path) if name.startswith(".part-")]
+
+    first = spool_upload(BytesIO(data), 1024, encrypt_dir=str(tmp_path))
+    (temp,) = temp_blobs()
+    temp_inode = os.stat(tmp_path / temp).st_ino
+    assert first.store(path, True)
+    # The encrypted copy from the spooling pass is renamed, not rewritten.
+    assert os.stat(path).st_ino == temp_inode
+    assert decrypt_bytes(open(path, "rb").read()) == data
+    first.close()
+
+    duplicate = spool_upload(BytesIO(data), 1024, encrypt_dir=str(tmp_path))
+    assert not duplicate.store(path, True)
+    assert temp_blobs() == []
+    duplicate.close()
+
+
+def test_result_reuse_depends_on_config(app_factory, monkeypatch):
+    calls = []
+    data = b"same-image-bytes"
+    for preprocess in ("true", "false"):
+        client = TestClient(app_factory({"OCR_USE_PREPROCESS": preprocess}))
+        import main
+
+        monkeypatch.setattr(main, "extract_text_and_boxes", _fake_ocr(calls))
+        files = {"file": ("a.png", BytesIO(data), "image/png")}
+        assert client.post("/process/", files=files).status_code == 200
+    assert len(calls) == 2
+
+
+def test_collect_garbage_keeps_referenced_and_recent_blobs(tmp_path):
+    old = time.time() - 10 * 86400
+    names = {
+        "referenced": blob_name("a" * 64, ".pdf", False),
+        "orphan": blob_name("b" * 64, ".png", True),
+        "recent": blob_name("c" * 64, ".txt", False),
+    }
+    for key, name in names.items():
+        path = tmp_path / name
+        path.write_bytes(b"x")
+        if key != "recent":
+            os.utime(path, (old, old))
+    (tmp_path / "results").mkdir()
+    (tmp_path / "results" / f"{'b' * 64}-png-abc.json").write_text("{}")
+    (tmp_path / "legacy.pdf").write_bytes(b"x")
+    os.utime(tmp_path / "legacy.pdf", (old, old))
+
+    removed = collect_garbage(str(tmp_path), 86400, referenced={"a" * 64})
+    assert removed == 1
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [names["referenced"], names["recent"], "legacy.pdf", "results"]
+    )
+    assert os.listdir(tmp_path / "results") == []
+
+
+def test_blob_gc_uses_redaction_log_references(db_app, tmp_path):
+    db_app({"STORAGE_RETENTION_DAYS": "1"})
+    import asyncio
+
+    import db
+    import main
+
+    uploads = tmp_path / "uploads"
+    kept = uploads / blob_name("d" * 64, ".txt", False)
+    dropped = uploads / blob_name("e" * 64, ".txt", False)
+    old = time.time() - 2 * 86400
+    for path in (kept, dropped):
+        path.write_bytes(b"x")
+        os.utime(path, (old, old))
+    db.log_redaction(
+        db.RedactionLogData(
+            user_id=None,
+            username=None,
+            filename=kept.name,
+            content_type="text/plain",
+            size_bytes=1,
+            total_pii=0,
+            pii_counts={},
+            content_sha256="d" * 64,
+        )
+    )
+
+    removed = asyncio.run(main._collect_blob_garbage())
+    assert removed == 1
+    assert kept.exists()
+    assert not dropped.exists()
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+
+def test_health_latency_flat_while_ocr_runs(app_factory, monkeypatch):
+    app = app_factory()
+    import main
+    from word_table import WordTable
+
+    ocr_started = threading.Event()
+
+    def slow_extract(path, use_preprocess=True, regions=None):
+        ocr_started.set()
+        time.sleep(1.5)
+        return "", WordTable.empty()
+
+    monkeypatch.setattr(main, "extract_text_and_boxes", slow_extract)
+
+    # A single TestClient context shares one event loop across threads, like
+    # a uvicorn worker does, so a blocking stage would stall /health too.
+    with TestClient(app) as client:
+        results = {}
+
+        def upload():
+            files = {"file": ("scan.png", BytesIO(b"img"), "image/png")}
+            results["process"] = client.post("/process/", files=files).status_code
+
+        worker = threading.Thread(target=upload)
+        worker.start()
+        assert ocr_started.wait(timeout=5)
+
+        latencies = []
+        for _ in range(5):
+            began = time.perf_counter()
+            assert client.get("/health").status_code == 200
+            latencies.append(time.perf_counter() - began)
+        worker.join(timeout=10)
+
+    assert results["process"] == 200
+    assert max(latencies) < 0.5
+
+
+def test_run_cpu_uses_process_pool(monkeypatch):
+    monkeypatch.setenv("WORKERS_PROCESS_POOL_SIZE", "1")
+    import importlib
+    import os
+
+    import config as config_module
+    import workers
+
+    importlib.reload(config_module)
+    try:
+        from pii_detector import detect_pii
+
+        found = asyncio.run(workers.run_cpu(detect_pii, "PAN ABCDE1234F"))
+        worker_pid = asyncio.run(workers.run_cpu(workers._worker_pid))
+    finally:
+        workers.shutdown_pools()
+        monkeypatch.delenv("WORKERS_PROCESS_POOL_SIZE")
+        importlib.reload(config_module)
+
+    assert {item["value"] for item in found} >= {"ABCDE1234F"}
+    assert worker_pid != os.getpid()
+
+
+def test_run_cpu_without_process_pool_keeps_io_threads_free():
+    import workers
+
+    def thread_name():
+        return threading.current_thread().name
+
+    async def scenario():
+        cpu = await workers.run_cpu(thread_name)
+        io = await workers.run_io(thread_name)
+        return cpu, io
+
+    try:
+        cpu, io = asyncio.run(scenario())
+    finally:
+        workers.shutdown_pools()
+    assert cpu.startswith("pii-cpu")
+    assert io.startswith("pii-io")
@@ -0,0 +1,56 @@
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def test_pool_settings_only_apply_to_server_databases(db_app):
+    db_app({"DB_POOL_SIZE": "3"})
+    import db
+
+    assert "pool_size" not in db._engine_options("sqlite:///x.db")
+    options = db._engine_options("mysql+mysqlconnector://u:p@localhost/app")
+    assert options["pool_size"] == 3
+    assert options["pool_pre_ping"] is True
+    assert db._async_url("mysql+mysqlconnector://u:p@localhost/app") == (
+        "mysql+aiomysql://u:p@localhost/app"
+    )
+    with pytest.raises(ValueError):
+        db._async_url("oracle://u:p@localhost/app")
+
+
+def test_async_engine_serves_token_lookups_and_audit_writes(db_app, make_user, monkeypatch):
+    pytest.importorskip("aiosqlite")
+    app = db_app({"DB_ASYNC": "true", "APP_TOKEN_CACHE_SIZE": "0"})
+    import db
+    import main
+
+    def no_sync_lookup(user_token):
+        raise AssertionError("token lookup went through the thread pool")
+
+    monkeypatch.setattr(main, "_resolve_user", no_sync_lookup)
+    files = {"file": ("sample.txt", BytesIO(b"Email: john@gmail.com"), "text/plain")}
+    with TestClient(app) as client:
+        assert db.async_db_enabled()
+        token = make_user(client)
+        assert client.post(f"/process/?user_token={token}", files=files).status_code == 200
+        assert client.post("/process/?user_token=wrong", files=files).status_code == 401
+    assert not db.async_db_enabled()
+
+    page = db.fetch_logs()
+    assert page.total == 1
+    assert page.logs[0]["username"] == "asha"
+    assert db.fetch_stats(group_by=["pii_type"]) == [{"pii_type": "EMAIL", "files": 1, "pii": 1}]
+
+
+def test_async_db_without_its_packages_fails_clearly(db_app, monkeypatch):
+    import asyncio
+    import sys
+
+    db_app({"DB_ASYNC": "true"})
+    import db
+
+    monkeypatch.setitem(sys.modules, "sqlalchemy.ext.asyncio", None)
+    with pytest.raises(RuntimeError, match="requirements-async.txt"):
+        asyncio.run(db.start_async_db())
+    assert not db.async_db_enabled()
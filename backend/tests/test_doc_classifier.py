@@ -0,0 +1,65 @@
+import numpy as np
+
+import ocr
+from doc_classifier import GENERIC, classify_text
+from pii_detector import detect_pii
+
+
+def test_classify_pan_card():
+    text = "INCOME TAX DEPARTMENT GOVT. OF INDIA Permanent Account Number ABCDE1234F"
+    assert classify_text(text).name == "PAN"
+
+
+def test_classify_aadhaar_card():
+    text = "Government of India Unique Identification Authority of India Aadhaar 1234 5678 9012"
+    assert classify_text(text).name == "AADHAAR"
+
+
+def test_classify_weak_evidence_falls_back_to_generic():
+    assert classify_text("Invoice for epic") is GENERIC
+    assert classify_text("") is GENERIC
+
+
+def test_detect_pii_restricted_to_profile_types():
+    text = "Permanent Account Number ABCDE1234F Phone 9876543210"
+    profile = classify_text("Income Tax Department " + text)
+    found = detect_pii(text, pii_types=profile.pii_types)
+    types = {item["type"] for item in found}
+
+    assert "PAN" in types
+    assert "PHONE" not in types
+
+
+def test_region_ocr_shifts_boxes_into_page_space(monkeypatch):
+    calls = []
+
+    def fake_image_to_data(image, output_type=None):
+        calls.append(image.shape)
+        return {"text": ["ABCDE1234F"], "left": [5], "top": [7], "width": [40], "height": [10]}
+
+    monkeypatch.setattr(ocr.pytesseract, "image_to_data", fake_image_to_data)
+    image = np.zeros((100, 200, 3), dtype=np.uint8)
+
+    text, words = ocr._extract_from_image(
+        image, page_index=0, use_preprocess=False, regions=[(0.5, 0.5, 0.5, 0.5)]
+    )
+
+    assert calls == [(50, 100, 3)]
+    assert text == "ABCDE1234F"
+    assert words.to_records() == [
+        {"text": "ABCDE1234F", "x": 105, "y": 57, "w": 40, "h": 10, "page": 0, "start": 0, "end": 10}
+    ]
+
+
+def test_letter_naming_the_issuer_stays_generic():
+    text = (
+        "Income Tax Department notice regarding your income tax refund. "
+        "Contact 9876543210 or refunds@corp.com, account 123456789012, IFSC HDFC0001234."
+    )
+    profile = classify_text(text)
+    assert profile is GENERIC
+    found = detect_pii(text, pii_types=profile.pii_types)
+    assert {"PHONE", "EMAIL", "ACCOUNT", "IFSC"} <= {item["type"] for item in found}
+
+    # One phrase plus the PAN number format is enough.
+    assert classify_text("Income Tax Department ABCDE1234F").name == "PAN"
@@ -2,7 +2,8 @@ from io import BytesIO
 
 from docx import Document
 
-from main import _read_docx_text_bytes
+from main import _read_docx_text_upload
+from uploads import spool_upload
 
 
 def test_docx_in_memory_extraction():
@@ -13,6 +14,11 @@ def test_docx_in_memory_extraction():
     buf = BytesIO()
     doc.save(buf)
 
-    text = _read_docx_text_bytes(buf.getvalue())
+    buf.seek(0)
+    upload = spool_upload(buf, max_bytes=1024 * 1024)
+    try:
+        text = _read_docx_text_upload(upload)
+    finally:
+        upload.close()
     assert "Hello World" in text
     assert "Second line" in text
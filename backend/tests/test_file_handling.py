@@ -23,6 +23,29 @@ def test_generate_redacted_pdf_creates_file(tmp_path):
     assert os.path.exists(result)
 
 
+def test_generate_redacted_pdf_in_memory():
+    result = generate_redacted_pdf("Hello World", output_path=None)
+    assert isinstance(result, bytes)
+    assert result.startswith(b"%PDF")
+
+
+def test_output_cache_evicts_by_size_and_ttl(monkeypatch):
+    import output_cache
+
+    cache = output_cache.OutputCache(max_bytes=10, ttl_seconds=60)
+    first = cache.put(b"12345", "application/pdf", "a.pdf")
+    second = cache.put(b"67890", "application/pdf", "b.pdf")
+    third = cache.put(b"abc", "application/pdf", "c.pdf")
+    assert cache.get(first) is None
+    assert cache.get(second).content == b"67890"
+    assert cache.size == 8
+    assert cache.put(b"x" * 11, "application/pdf", "big.pdf") is None
+
+    now = output_cache.time.monotonic()
+    monkeypatch.setattr(output_cache.time, "monotonic", lambda: now + 61)
+    assert cache.get(third) is None
+
+
 def test_validate_content_type_allows_known():
     _validate_content_type("application/pdf")
 
@@ -0,0 +1,101 @@
+import asyncio
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+
+from idempotency import IdempotencyCache, IdempotencyConflict, StoredResponse
+
+
+def test_concurrent_duplicates_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return StoredResponse(status_code=200, body=b"done", media_type="text/plain")
+
+    async def scenario():
+        cache = IdempotencyCache(max_entries=10, max_bytes=1024, ttl_seconds=60)
+        results = await asyncio.gather(*(cache.run("k", "fp", compute) for _ in range(3)))
+        later = await cache.run("k", "fp", compute)
+        with pytest.raises(IdempotencyConflict):
+            await cache.run("k", "other", compute)
+        return results, later
+
+    results, later = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [replayed for _, replayed in results] == [False, True, True]
+    assert later[0].body == b"done" and later[1] is True
+
+
+def test_failures_are_not_remembered_and_size_is_bounded():
+    async def fail():
+        raise RuntimeError("boom")
+
+    def ok(body):
+        async def compute():
+            return StoredResponse(status_code=200, body=body, media_type=None)
+
+        return compute
+
+    async def scenario():
+        cache = IdempotencyCache(max_entries=2, max_bytes=10, ttl_seconds=60)
+        with pytest.raises(RuntimeError):
+            await cache.run("a", "fp", fail)
+        _, replayed = await cache.run("a", "fp", ok(b"1234"))
+        assert replayed is False
+        await cache.run("b", "fp", ok(b"1234"))
+        # Over both limits: the least recently used entry goes.
+        await cache.run("c", "fp", ok(b"1234"))
+        assert len(cache) == 2
+        _, replayed = await cache.run("a", "fp", ok(b"1234"))
+        assert replayed is False
+        # Larger than the whole cache: served but not kept.
+        await cache.run("big", "fp", ok(b"x" * 11))
+        _, replayed = await cache.run("big", "fp", ok(b"x" * 11))
+        assert replayed is False
+
+    asyncio.run(scenario())
+
+
+def test_process_replays_response_for_repeated_key(db_app, make_user, monkeypatch):
+    client = TestClient(db_app())
+    token = make_user(client)
+    import main
+
+    calls = []
+    analyze = main._analyze_upload
+
+    async def counting_analyze(*args, **kwargs):
+        calls.append(1)
+        return await analyze(*args, **kwargs)
+
+    monkeypatch.setattr(main, "_analyze_upload", counting_analyze)
+    headers = {"Idempotency-Key": "retry-1"}
+
+    def post(name="sample.txt", data=b"Email: john@gmail.com", key_headers=headers, user_token=token):
+        files = {"file": (name, BytesIO(data), "text/plain")}
+        url = f"/process/?user_token={user_token}" if user_token else "/process/"
+        return client.post(url, files=files, headers=key_headers)
+
+    first = post()
+    second = post()
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert len(calls) == 1
+
+    assert post(name="other.txt").status_code == 422
+    # Same name and length, different bytes.
+    assert post(data=b"Email: mary@gmail.com").status_code == 422
+    assert post(key_headers={"Idempotency-Key": "retry-2"}).status_code == 200
+    assert len(calls) == 2
+
+    # Anonymous callers share no key scope: the key is ignored.
+    anonymous = [post(data=data, user_token=None) for data in (b"a@corp.com", b"b@corp.com")]
+    assert [r.status_code for r in anonymous] == [200, 200]
+    assert "idempotent-replayed" not in anonymous[1].headers
+    assert "b@corp.com" in str(anonymous[1].json()["pii"])
+    assert len(calls) == 4
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+from bench_import_time import HEAVY_MODULES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+
+
+def test_importing_main_defers_heavy_dependencies():
+    code = (
+        "import sys, main; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_module_loads_on_first_attribute():
+    from lazy_import import lazy_module
+
+    calls = []
+    module = lazy_module("json", setup=lambda real: calls.append(real.__name__))
+    assert calls == []
+    assert module.dumps([1]) == "[1]"
+    assert module.loads("2") == 2
+    assert calls == ["json"]
@@ -0,0 +1,227 @@
+import asyncio
+import time
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+
+def _wait_for_job(client, job_id, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in {"succeeded", "failed"}:
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_job_lifecycle_returns_json_result(db_app):
+    app = db_app()
+    with TestClient(app) as client:
+        data = b"Email: john@gmail.com Phone: 9876543210"
+        files = {"file": ("sample.txt", BytesIO(data), "text/plain")}
+        response = client.post("/jobs?priority=3", files=files)
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        job = _wait_for_job(client, job_id)
+        assert job["status"] == "succeeded"
+        assert job["progress"] == 100
+        assert job["result_url"] == f"/jobs/{job_id}/result"
+
+        result = client.get(f"/jobs/{job_id}/result")
+        assert result.status_code == 200
+        assert result.json()["total_pii_detected"] >= 2
+
+
+def test_job_result_returns_pdf(db_app):
+    app = db_app()
+    with TestClient(app) as client:
+        files = {"file": ("sample.txt", BytesIO(b"Email: john@gmail.com"), "text/plain")}
+        job_id = client.post("/jobs?return_pdf=true", files=files).json()["job_id"]
+        assert _wait_for_job(client, job_id)["status"] == "succeeded"
+
+        result = client.get(f"/jobs/{job_id}/result")
+        assert result.status_code == 200
+        assert result.headers["content-type"].startswith("application/pdf")
+
+
+def test_job_results_are_encrypted_at_rest(db_app, tmp_path):
+    from encryption import generate_key
+
+    env = {"APP_ENCRYPTION_ENABLED": "true", "APP_ENCRYPTION_KEY": generate_key()}
+    app = db_app(env)
+    with TestClient(app) as client:
+        ids = []
+        for return_pdf in ("false", "true"):
+            files = {"file": ("sample.txt", BytesIO(b"Email: john@gmail.com"), "text/plain")}
+            job_id = client.post(f"/jobs?return_pdf={return_pdf}", files=files).json()["job_id"]
+            assert _wait_for_job(client, job_id)["status"] == "succeeded"
+            ids.append(job_id)
+
+        jobs_dir = tmp_path / "outputs" / "jobs"
+        stored = sorted(path.name for path in jobs_dir.iterdir())
+        assert stored == sorted([f"{ids[0]}.json.enc", f"{ids[1]}.pdf.enc"])
+        assert b"john@gmail.com" not in (jobs_dir / f"{ids[0]}.json.enc").read_bytes()
+
+        assert client.get(f"/jobs/{ids[0]}/result").json()["pii"][0]["value"] == "john@gmail.com"
+        pdf = client.get(f"/jobs/{ids[1]}/result")
+        assert pdf.content.startswith(b"%PDF")
+        assert 'filename="redacted.pdf"' in pdf.headers["content-disposition"]
+
+
+def test_job_unknown_id_and_expiry(db_app):
+    app = db_app()
+    import db
+    import main
+
+    with TestClient(app) as client:
+        assert client.get("/jobs/missing").status_code == 404
+
+        files = {"file": ("sample.txt", BytesIO(b"Email: john@gmail.com"), "text/plain")}
+        job_id = client.post("/jobs", files=files).json()["job_id"]
+        assert _wait_for_job(client, job_id)["status"] == "succeeded"
+
+        from datetime import datetime, timedelta, timezone
+
+        db.update_job(job_id, expires_at=datetime.now(timezone.utc) - timedelta(minutes=1))
+        client.portal.call(main._JOBS.sweep)
+
+        assert client.get(f"/jobs/{job_id}").json()["status"] == "expired"
+        assert client.get(f"/jobs/{job_id}/result").status_code == 410
+
+
+def test_jobs_require_database(app_factory):
+    app = app_factory({"DB_URL": ""})
+    with TestClient(app) as client:
+        files = {"file": ("sample.txt", BytesIO(b"hello"), "text/plain")}
+        response = client.post("/jobs", files=files)
+    assert response.status_code == 500
+
+
+def test_job_manager_runs_higher_priority_first():
+    from jobs import JobManager
+
+    order = []
+
+    async def runner(job_id, payload, progress):
+        order.append(job_id)
+        return "", "application/json"
+
+    async def scenario():
+        manager = JobManager(runner, workers=1, max_queue=10, result_ttl_minutes=1)
+        await manager.start()
+        # Submit before yielding so the single worker sees all three at once.
+        manager.submit("low", None, priority=-1)
+        manager.submit("high", None, priority=5)
+        manager.submit("normal", None, priority=0)
+        while len(order) < 3:
+            await asyncio.sleep(0.01)
+        await manager.stop()
+
+    asyncio.run(scenario())
+    assert order == ["high", "normal", "low"]
+
+
+def test_job_manager_rejects_when_queue_full():
+    from jobs import JobManager, QueueFullError
+
+    async def runner(job_id, payload, progress):
+        await asyncio.sleep(1)
+        return "", "application/json"
+
+    async def scenario():
+        manager = JobManager(runner, workers=1, max_queue=1, result_ttl_minutes=1)
+        await manager.start()
+        try:
+            manager.submit("a", None)
+            try:
+                manager.submit("b", None)
+            except QueueFullError:
+                return True
+            return False
+        finally:
+            await manager.stop()
+
+    assert asyncio.run(scenario())
+
+
+def test_job_worker_survives_database_errors(monkeypatch):
+    import jobs
+    from jobs import JobManager
+
+    done = []
+    released = []
+    failed = []
+
+    def update_job(job_id, **fields):
+        if job_id == "a" and fields.get("status") == "running":
+            raise RuntimeError("database is down")
+        if fields.get("status") == "failed":
+            failed.append(job_id)
+        return True
+
+    async def runner(job_id, payload, progress):
+        done.append(job_id)
+        return "", "application/json"
+
+    monkeypatch.setattr(jobs, "update_job", update_job)
+
+    async def scenario():
+        manager = JobManager(
+            runner, workers=1, max_queue=10, result_ttl_minutes=1, release=released.append
+        )
+        await manager.start()
+        manager.submit("a", "upload-a")
+        manager.submit("b", "upload-b")
+        while len(released) < 2:
+            await asyncio.sleep(0.01)
+        await manager.stop()
+
+    asyncio.run(scenario())
+    assert done == ["b"]
+    assert failed == ["a"]
+    assert released == ["upload-a", "upload-b"]
+
+
+def test_sweep_fails_only_jobs_no_process_holds(db_app):
+    db_app()
+    from datetime import datetime, timedelta, timezone
+
+    import db
+    from jobs import JobManager
+
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    for job_id in ("held", "orphan"):
+        db.create_job(job_id, None, "a.txt", "text/plain", {})
+
+    def backdate():
+        with db._SessionLocal() as session:
+            session.query(db.ProcessingJob).update({db.ProcessingJob.updated_at: long_ago})
+            session.commit()
+
+    backdate()
+
+    async def scenario():
+        started = asyncio.Event()
+        finish = asyncio.Event()
+
+        async def runner(job_id, payload, progress):
+            started.set()
+            await finish.wait()
+            return "", "application/json"
+
+        manager = JobManager(runner, workers=1, max_queue=10, result_ttl_minutes=1)
+        await manager.start()
+        manager.submit("held", None)
+        await started.wait()
+        # A long-running job whose last update predates the cutoff is still
+        # owned by this process.
+        await asyncio.to_thread(backdate)
+        await manager.sweep()
+        statuses = {job_id: db.fetch_job(job_id)["status"] for job_id in ("held", "orphan")}
+        finish.set()
+        await manager.stop()
+        return statuses
+
+    assert asyncio.run(scenario()) == {"held": "running", "orphan": "failed"}
@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+
+def _setup(db_app):
+    client = TestClient(db_app())
+    import db
+
+    return client, db
+
+
+def _event(db, name, pii_counts, created_at=None):
+    return db.RedactionLogData(
+        user_id=None,
+        username=None,
+        filename=name,
+        content_type="text/plain",
+        size_bytes=len(name),
+        total_pii=sum(pii_counts.values()),
+        pii_counts=pii_counts,
+        created_at=created_at,
+    )
+
+
+def test_logs_filter_by_pii_type_in_sql(db_app):
+    client, db = _setup(db_app)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    events = [
+        _event(db, f"f{i}.txt", {"EMAIL": 1, "PHONE": i % 2}, start + timedelta(days=i))
+        for i in range(5)
+    ]
+    db.log_redactions(events)
+    db.log_redaction(_event(db, "none.txt", {}))
+
+    payload = client.get("/logs?pii_type=PHONE&limit=1&sort_dir=asc").json()
+    assert payload["count_total"] == 2
+    assert [log["filename"] for log in payload["logs"]] == ["f1.txt"]
+    payload = client.get("/logs?pii_type=PHONE&limit=1&offset=1&sort_dir=asc").json()
+    assert [log["filename"] for log in payload["logs"]] == ["f3.txt"]
+
+    payload = client.get("/logs?pii_type=EMAIL&date_from=2026-01-02&date_to=2026-01-03").json()
+    assert sorted(log["filename"] for log in payload["logs"]) == ["f1.txt", "f2.txt"]
+    assert client.get("/logs?pii_type=AADHAAR").json()["count_total"] == 0
+    assert client.get("/logs").json()["count_total"] == 6
+
+
+def test_backfill_log_pii_is_idempotent(db_app):
+    _, db = _setup(db_app)
+    now = datetime.now(timezone.utc)
+    with db._SessionLocal() as session:
+        for name, counts in (("old.txt", {"EMAIL": 2, "PAN": 1}), ("clean.txt", {})):
+            session.add(
+                db.RedactionLog(
+                    filename=name,
+                    content_type="text/plain",
+                    size_bytes=1,
+                    total_pii=sum(counts.values()),
+                    pii_counts=counts,
+                    created_at=now,
+                )
+            )
+        session.commit()
+    db.log_redaction(_event(db, "new.txt", {"EMAIL": 1}))
+
+    assert db.fetch_logs(pii_type="PAN").total == 0
+    assert db.backfill_log_pii(batch_size=1) == 2
+    assert db.backfill_log_pii() == 0
+    page = db.fetch_logs(pii_type="EMAIL")
+    assert page.total == 2
+    assert {row["filename"] for row in page.logs} == {"old.txt", "new.txt"}
+    assert db.fetch_logs(pii_type="PAN").logs[0]["filename"] == "old.txt"
+
+
+def test_logs_keyset_pagination(db_app, monkeypatch):
+    client, db = _setup(db_app)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    # Ties on size_bytes are broken by id.
+    db.log_redactions(
+        [_event(db, f"f{i}.txt", {"EMAIL": 1}, start + timedelta(hours=i)) for i in range(7)]
+    )
+
+    seen = []
+    url = "/logs?limit=3&sort_by=size_bytes&sort_dir=asc"
+    payload = client.get(url).json()
+    while True:
+        seen += [log["filename"] for log in payload["logs"]]
+        if not payload["next_cursor"]:
+            break
+        payload = client.get(f"{url}&count=none&cursor={payload['next_cursor']}").json()
+        assert payload["count_total"] is None
+    assert seen == [f"f{i}.txt" for i in range(7)]
+
+    first = client.get("/logs?limit=2").json()
+    assert [log["filename"] for log in first["logs"]] == ["f6.txt", "f5.txt"]
+    second = client.get(f"/logs?limit=2&cursor={first['next_cursor']}").json()
+    assert [log["filename"] for log in second["logs"]] == ["f4.txt", "f3.txt"]
+
+    # A cursor is tied to the sort order it was issued for.
+    assert client.get(f"/logs?sort_by=filename&cursor={first['next_cursor']}").status_code == 400
+    assert client.get("/logs?cursor=not-a-cursor").status_code == 400
+    assert client.get("/logs?count=maybe").status_code == 400
+
+    monkeypatch.setattr(db, "_COUNT_CAP", 5)
+    payload = client.get("/logs?count=estimate").json()
+    assert (payload["count_total"], payload["count_exact"]) == (5, False)
+    payload = client.get("/logs?count=estimate&filename=f1").json()
+    assert (payload["count_total"], payload["count_exact"]) == (1, True)
+
+
+def test_log_stats_rollup(db_app):
+    client, db = _setup(db_app)
+    day1 = datetime(2026, 3, 1, 9, tzinfo=timezone.utc)
+    day2 = day1 + timedelta(days=1)
+    db.log_redactions(
+        [
+            _event(db, "a.txt", {"EMAIL": 2, "PHONE": 1}, day1),
+            _event(db, "b.txt", {"EMAIL": 1}, day1),
+        ]
+    )
+    db.log_redaction(_event(db, "c.txt", {"EMAIL": 1, "PAN": 0}, day2))
+
+    payload = client.get("/logs/stats").json()
+    assert payload["stats"] == [
+        {"day": "2026-03-01", "files": 2, "pii": 4},
+        {"day": "2026-03-02", "files": 1, "pii": 1},
+    ]
+    stats = client.get("/logs/stats?group_by=pii_type&date_from=2026-03-01&date_to=2026-03-01").json()
+    assert stats["stats"] == [
+        {"pii_type": "EMAIL", "files": 2, "pii": 3},
+        {"pii_type": "PHONE", "files": 1, "pii": 1},
+    ]
+    stats = client.get("/logs/stats?group_by=user,content_type&pii_type=EMAIL").json()["stats"]
+    assert stats == [{"user_id": None, "content_type": "text/plain", "files": 3, "pii": 4}]
+    assert client.get("/logs/stats?group_by=hour").status_code == 400
+
+    # A fresh database has nothing to backfill.
+    assert db.backfill_stats() == 0
+
+    # Upgrading a database whose logs predate the rollup: entries up to the
+    # id recorded at creation are backfilled, newer ones count themselves.
+    db.RedactionStat.__table__.drop(db.get_engine())
+    db.RedactionStatsBackfill.__table__.drop(db.get_engine())
+    db.init_db()
+    db.log_redaction(_event(db, "d.txt", {"PHONE": 2}, day2))
+    assert db.backfill_stats(batch_size=2) == 3
+    assert db.backfill_stats() == 0
+    assert db.fetch_stats(group_by=["pii_type"]) == [
+        {"pii_type": "EMAIL", "files": 3, "pii": 4},
+        {"pii_type": "PHONE", "files": 2, "pii": 3},
+    ]
+
+
+def test_logs_export_streams_csv_and_ndjson(db_app):
+    import csv
+    import io
+    import json
+
+    import main
+
+    client, db = _setup(db_app)
+    db.log_redactions([_event(db, f"f{i}.txt", {"EMAIL": i % 2}) for i in range(7)])
+
+    response = client.get("/logs/export?format=ndjson&pii_type=EMAIL")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["filename"] for row in rows] == ["f1.txt", "f3.txt", "f5.txt"]
+
+    response = client.get("/logs/export?format=csv")
+    assert 'filename="redaction_logs.csv"' in response.headers["content-disposition"]
+    records = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(records) == 7
+    assert json.loads(records[1]["pii_counts"]) == {"EMAIL": 1}
+    assert client.get("/logs/export?format=xml").status_code == 400
+
+    chunks = list(main._export_chunks(db.iter_logs(batch_size=2), "ndjson", rows_per_chunk=3))
+    assert [chunk.count("\n") for chunk in chunks] == [3, 3, 1]
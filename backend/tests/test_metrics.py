@@ -0,0 +1,107 @@
+import asyncio
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+from metrics import Registry
+from timing import StageTimer, activate, stage
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("demo_seconds", "Demo", ["stage"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="ocr")
+    histogram.observe(0.5, stage="ocr")
+    histogram.observe(5.0, stage="ocr")
+    counter = registry.counter("demo_total", "Demo", ["type"])
+    counter.inc(type="EMAIL")
+    counter.inc(2, type="EMAIL")
+
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="ocr",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="ocr",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="ocr",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="ocr"} 3' in text
+    assert 'demo_total{type="EMAIL"} 3' in text
+    # Re-registering returns the existing metric instead of a duplicate.
+    assert registry.counter("demo_total", "Demo", ["type"]) is counter
+
+
+def test_stage_timings_cross_the_process_pool(monkeypatch):
+    monkeypatch.setenv("WORKERS_PROCESS_POOL_SIZE", "1")
+    import importlib
+
+    import config as config_module
+    import workers
+
+    importlib.reload(config_module)
+    try:
+        from pii_detector import detect_pii
+
+        async def scenario():
+            timer = StageTimer()
+            with activate(timer):
+                with stage("outer"):
+                    await workers.run_cpu(detect_pii, "PAN ABCDE1234F")
+            return timer
+
+        timer = asyncio.run(scenario())
+    finally:
+        workers.shutdown_pools()
+        monkeypatch.delenv("WORKERS_PROCESS_POOL_SIZE")
+        importlib.reload(config_module)
+
+    assert {"outer", "regex"} <= set(timer.durations)
+
+
+def test_metrics_endpoint_reports_stages_and_counts(app_factory):
+    client = TestClient(app_factory({"APP_ADMIN_TOKEN": "secret"}))
+    data = b"Email: john@gmail.com Phone: 9876543210"
+    files = {"file": ("sample.txt", BytesIO(data), "text/plain")}
+    assert client.post("/process/?return_pdf=true", files=files).status_code == 200
+
+    text = client.get("/metrics?token=secret").text
+    for stage_name in ("upload_read", "decode", "regex", "policy", "box_mapping", "render"):
+        assert f'pii_stage_seconds_count{{stage="{stage_name}"}}' in text
+    assert 'pii_detected_total{type="EMAIL"}' in text
+    assert 'pii_files_processed_total{extension="txt"}' in text
+
+
+def test_process_reports_server_timing_and_debug_payload(app_factory):
+    client = TestClient(app_factory({"APP_ADMIN_TOKEN": "secret"}))
+    data = b"Email: john@gmail.com"
+
+    response = client.post(
+        "/process/", files={"file": ("sample.txt", BytesIO(data), "text/plain")}
+    )
+    assert response.status_code == 200
+    header = response.headers["server-timing"]
+    assert "regex;dur=" in header
+    assert "total;dur=" in header
+    assert "timings" not in response.json()
+
+    denied = client.post(
+        "/process/?debug_timing=true&token=wrong",
+        files={"file": ("sample.txt", BytesIO(data), "text/plain")},
+    )
+    assert denied.status_code == 403
+
+    # Fresh bytes so the request is processed rather than served from the
+    # result cache of the identical upload above.
+    debug = client.post(
+        "/process/?debug_timing=true&token=secret",
+        files={"file": ("other.txt", BytesIO(b"Phone: 9876543210"), "text/plain")},
+    )
+    timings = debug.json()["timings"]
+    assert timings["total_ms"] >= 0
+    assert timings["stages"]["redact_text"]["count"] == 1
+
+
+def test_stage_timing_disabled_skips_timer(app_factory):
+    client = TestClient(app_factory({"METRICS_STAGE_TIMING": "false"}))
+    files = {"file": ("sample.txt", BytesIO(b"Email: john@gmail.com"), "text/plain")}
+
+    response = client.post("/process/", files=files)
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
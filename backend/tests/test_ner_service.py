@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from ner_service import NerClient, NerServer, NerServiceError
+
+
+class _FakeNlp:
+    # Tags every capitalised word as PERSON; "boom" fails the whole batch.
+    def __init__(self):
+        self.pipe_sizes = []
+
+    def _doc(self, text):
+        if "boom" in text:
+            raise ValueError("text too long")
+        ents = []
+        offset = 0
+        for word in text.split(" "):
+            if word[:1].isupper():
+                ents.append(SimpleNamespace(label_="PERSON", start_char=offset, end_char=offset + len(word)))
+            offset += len(word) + 1
+        return SimpleNamespace(ents=ents)
+
+    def __call__(self, text):
+        return self._doc(text)
+
+    def pipe(self, texts, batch_size=None):
+        self.pipe_sizes.append(len(texts))
+        time.sleep(0.02)
+        return [self._doc(text) for text in texts]
+
+
+@pytest.fixture
+def ner_server(tmp_path):
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = NerServer(_FakeNlp(), max_batch=8, max_wait=0.05)
+    path = str(tmp_path / "ner.sock")
+    asyncio.run_coroutine_threadsafe(server.start(path), loop).result()
+    yield server, path
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_concurrent_requests_are_micro_batched(ner_server):
+    server, path = ner_server
+    client = NerClient(path, timeout=5)
+    texts = [f"met Person{i} today" for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(client.entities, texts))
+
+    assert results[3] == [("PERSON", 4, 11)]
+    assert sum(server.batch_sizes) == 8
+    assert max(server.batch_sizes) > 1
+
+
+def test_failing_text_only_fails_itself(ner_server):
+    server, path = ner_server
+    client = NerClient(path, timeout=5)
+
+    def call(text):
+        try:
+            return client.entities(text)
+        except NerServiceError as exc:
+            return str(exc)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(call, ["boom", "hello Asha"]))
+    assert results == ["text too long", [("PERSON", 6, 10)]]
+
+
+
+def test_malformed_request_gets_an_error_reply(ner_server):
+    import json
+    import socket
+
+    from ner_service import _HEADER, _encode, _recv_exactly
+
+    _, path = ner_server
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(5)
+    sock.connect(path)
+
+    def send(frame):
+        sock.sendall(frame)
+        (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+        return json.loads(_recv_exactly(sock, size))
+
+    try:
+        for body in (b"not json", b'{"txt": "hi"}', b'{"text": 5}', b"[1]"):
+            assert "Bad request" in send(_HEADER.pack(len(body)) + body)["error"]
+        # The connection survives a bad frame.
+        assert send(_encode({"text": "hello Asha"})) == {"ents": [["PERSON", 6, 10]]}
+    finally:
+        sock.close()
+
+
+def test_detect_pii_uses_service_and_degrades_without_it(ner_server, monkeypatch, tmp_path):
+    import pii_detector
+
+    _, path = ner_server
+    monkeypatch.setattr(pii_detector, "_NER_CLIENT", NerClient(path, timeout=5))
+    monkeypatch.setattr(pii_detector, "_NLP", None)
+
+    found = pii_detector.detect_pii("contact Ravi at ravi@example.com")
+    assert {"type": "PERSON", "value": "Ravi", "start": 8, "end": 12, "source": "ner"} in found
+
+    monkeypatch.setattr(pii_detector, "_NER_CLIENT", NerClient(str(tmp_path / "missing.sock"), 1))
+    found = pii_detector.detect_pii("contact Ravi at ravi@example.com")
+    assert [item["type"] for item in found] == ["EMAIL"]
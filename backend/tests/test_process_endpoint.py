@@ -29,6 +29,22 @@ def test_process_endpoint_return_pdf(app_factory):
     assert response.headers["content-type"].startswith("application/pdf")
 
 
+def test_process_endpoint_pdf_is_rendered_in_memory(app_factory, tmp_path):
+    client = TestClient(app_factory())
+    files = {"file": ("sample.txt", BytesIO(b"Email: john@gmail.com"), "text/plain")}
+
+    response = client.post("/process/?return_pdf=true", files=files)
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+    assert os.listdir(tmp_path / "outputs") == []
+
+    output_id = response.headers["x-output-id"]
+    again = client.get(f"/outputs/{output_id}")
+    assert again.status_code == 200
+    assert again.content == response.content
+    assert client.get("/outputs/unknown").status_code == 404
+
+
 def test_process_endpoint_docx(app_factory):
     client = TestClient(app_factory())
 
@@ -79,6 +95,35 @@ def test_process_endpoint_rejects_large_upload(app_factory):
     assert response.status_code == 413
 
 
+def test_process_endpoint_rejects_oversized_body_before_parsing(app_factory, tmp_path):
+    client = TestClient(app_factory({"APP_MAX_UPLOAD_MB": "1"}))
+    data = b"x" * (2 * 1024 * 1024)
+    files = {"file": ("sample.txt", BytesIO(data), "text/plain")}
+
+    response = client.post("/process/", files=files)
+    assert response.status_code == 413
+    assert not os.listdir(tmp_path / "uploads")
+
+
+def test_process_endpoint_stores_encrypted_upload(app_factory, tmp_path):
+    key = generate_key()
+    client = TestClient(
+        app_factory({"APP_ENCRYPTION_ENABLED": "true", "APP_ENCRYPTION_KEY": key})
+    )
+    data = b"Email: john@gmail.com " * 1000
+    files = {"file": ("sample.txt", BytesIO(data), "text/plain")}
+
+    response = client.post("/process/", files=files)
+    assert response.status_code == 200
+
+    import hashlib
+
+    from encryption import decrypt_bytes
+
+    stored = tmp_path / "uploads" / f"{hashlib.sha256(data).hexdigest()}.enc.txt"
+    assert decrypt_bytes(stored.read_bytes()) == data
+
+
 def test_decrypt_endpoint_success(app_factory, tmp_path):
     key = generate_key()
     app = app_factory(
@@ -135,3 +180,240 @@ def test_decrypt_endpoint_requires_encryption(app_factory, tmp_path):
     client = TestClient(app)
     response = client.get("/decrypt?filename=sample.txt&token=secret")
     assert response.status_code == 400
+
+
+def test_process_endpoint_image_boxes(app_factory, monkeypatch):
+    client = TestClient(app_factory())
+    import main
+    from word_table import WordTable
+
+    def fake_extract(path, use_preprocess=True, regions=None):
+        words = WordTable(
+            text=["PAN", "ABCDE1234F"],
+            x=[10, 60],
+            y=[5, 5],
+            w=[40, 90],
+            h=[12, 12],
+            page=[0, 0],
+            start=[0, 4],
+            end=[3, 14],
+        )
+        return "PAN ABCDE1234F", words
+
+    monkeypatch.setattr(main, "extract_text_and_boxes", fake_extract)
+    files = {"file": ("card.png", BytesIO(b"not-a-real-png"), "image/png")}
+
+    response = client.post("/process/", files=files)
+    assert response.status_code == 200
+    boxes = response.json()["boxes"]
+    assert boxes == [
+        {"x": 60, "y": 5, "w": 90, "h": 12, "page": 0, "type": "PAN", "start": 4, "end": 14}
+    ]
+
+
+def test_process_endpoint_streams_pdf_pages(app_factory, monkeypatch):
+    import json
+
+    client = TestClient(app_factory())
+    import main
+    from word_table import WordTable
+
+    page_texts = ["PAN ABCDE1234F", "Email: john@gmail.com"]
+
+    def fake_page(path, page_index, use_preprocess=True):
+        text = page_texts[page_index]
+        first, second = text.split(" ")
+        words = WordTable(
+            text=[first, second],
+            x=[10, 60],
+            y=[5, 5],
+            w=[40, 90],
+            h=[12, 12],
+            page=[page_index, page_index],
+            start=[0, len(first) + 1],
+            end=[len(first), len(text)],
+        )
+        return text, words
+
+    monkeypatch.setattr(main, "pdf_page_count", lambda path: len(page_texts))
+    monkeypatch.setattr(main, "extract_pdf_page", fake_page)
+    files = {"file": ("doc.pdf", BytesIO(b"%PDF-1.4"), "application/pdf")}
+
+    response = client.post("/process/?stream=true", files=files)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    records = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [r["type"] for r in records] == ["page", "page", "summary"]
+    first, second, summary = records
+    assert first["offset"] == 0
+    assert second["offset"] == len(page_texts[0]) + 2
+    email = next(p for p in second["pii"] if p["type"] == "EMAIL")
+    assert email["start"] == second["offset"] + 7
+    assert {b["page"] for b in second["boxes"]} == {1}
+    assert all(b["start"] >= second["offset"] for b in second["boxes"])
+    assert summary["pages"] == 2
+    assert summary["total_pii_detected"] == len(first["pii"]) + len(second["pii"])
+
+
+def test_process_endpoint_stream_rejects_file_output(app_factory):
+    client = TestClient(app_factory())
+    files = {"file": ("sample.txt", BytesIO(b"hello"), "text/plain")}
+
+    response = client.post("/process/?stream=true&return_pdf=true", files=files)
+    assert response.status_code == 400
+
+
+def test_process_batch_ndjson(app_factory):
+    import json
+
+    client = TestClient(app_factory())
+    files = [
+        ("files", ("a.txt", BytesIO(b"Email: john@gmail.com"), "text/plain")),
+        ("files", ("b.txt", BytesIO(b"Phone: 9876543210"), "text/plain")),
+        ("files", ("c.exe", BytesIO(b"nope"), "application/octet-stream")),
+    ]
+
+    response = client.post("/process/batch", files=files)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    records = sorted(
+        (json.loads(line) for line in response.text.splitlines() if line),
+        key=lambda r: r["index"],
+    )
+    assert [r["status"] for r in records] == ["ok", "ok", "error"]
+    assert records[0]["total_pii_detected"] >= 1
+    assert records[2]["status_code"] == 400
+
+
+def test_process_batch_zip(app_factory):
+    import json
+    import zipfile
+
+    client = TestClient(app_factory())
+    files = [
+        ("files", ("a.txt", BytesIO(b"Email: john@gmail.com"), "text/plain")),
+        ("files", ("b.txt", BytesIO(b"Phone: 9876543210"), "text/plain")),
+    ]
+
+    response = client.post("/process/batch?format=zip", files=files)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(BytesIO(response.content))
+    names = set(archive.namelist())
+    assert {"0000_a_redacted.txt", "0001_b_redacted.txt", "results.ndjson"} <= names
+    assert b"john@gmail.com" not in archive.read("0000_a_redacted.txt")
+    manifest = [json.loads(line) for line in archive.read("results.ndjson").splitlines()]
+    assert [m["status"] for m in manifest] == ["ok", "ok"]
+
+
+def test_process_batch_logs_with_single_bulk_insert(app_factory, monkeypatch):
+    client = TestClient(app_factory())
+    import main
+
+    calls = []
+    monkeypatch.setattr(main, "log_redactions", lambda events: calls.append(list(events)))
+    files = [
+        ("files", ("a.txt", BytesIO(b"Email: john@gmail.com"), "text/plain")),
+        ("files", ("b.txt", BytesIO(b"Phone: 9876543210"), "text/plain")),
+    ]
+
+    response = client.post("/process/batch", files=files)
+    assert response.status_code == 200
+    assert len(calls) == 1
+    assert sorted(event.filename.rsplit(".", 1)[1] for event in calls[0]) == ["txt", "txt"]
+
+
+def test_region_ocr_falls_back_to_full_page(app_factory, monkeypatch):
+    client = TestClient(app_factory({"OCR_REGION_OCR": "true"}))
+    import main
+    from word_table import WordTable
+
+    calls = []
+
+    def fake_extract(path, use_preprocess=True, regions=None):
+        calls.append(regions)
+        if regions:
+            return "", WordTable.empty()
+        words = WordTable(
+            text=["PAN", "ABCDE1234F"],
+            x=[10, 60],
+            y=[5, 5],
+            w=[40, 90],
+            h=[12, 12],
+            page=[0, 0],
+            start=[0, 4],
+            end=[3, 14],
+        )
+        return "PAN ABCDE1234F", words
+
+    headers = {
+        # Clearly a PAN card, but the regions come back empty.
+        "strong.png": "INCOME TAX DEPARTMENT Permanent Account Number ABCDE1234F",
+        # Enough to pick the profile, too little to skip most of the page.
+        "weak.png": "Income Tax Department ABCDE1234F",
+    }
+    monkeypatch.setattr(main, "extract_text_and_boxes", fake_extract)
+    for name, header in headers.items():
+        monkeypatch.setattr(main, "read_header_text", lambda path, header=header: header)
+        calls.clear()
+        files = {"file": (name, BytesIO(name.encode()), "image/png")}
+        response = client.post("/process/", files=files)
+        assert response.status_code == 200
+        assert response.json()["boxes"][0]["type"] == "PAN"
+        assert calls[-1] is None
+        # Only the confident header gets a region pass before the full page.
+        assert len(calls) == (2 if name == "strong.png" else 1)
+
+
+def test_batch_disconnect_logs_finished_items_and_counts_the_rest(app_factory, monkeypatch):
+    import asyncio
+    import json
+
+    from fastapi import UploadFile
+    from starlette.datastructures import Headers
+
+    app_factory()
+    import main
+
+    logged = []
+    analyze = main._analyze_upload
+
+    async def analyze_or_hang(upload, ext, path, **kwargs):
+        if upload.read() == b"slow":
+            await asyncio.Event().wait()
+        return await analyze(upload, ext, path, **kwargs)
+
+    async def capture_log(items):
+        logged.extend(item.index for item in items)
+
+    monkeypatch.setattr(main, "_analyze_upload", analyze_or_hang)
+    monkeypatch.setattr(main, "_log_batch", capture_log)
+
+    def upload(name, data):
+        headers = Headers({"content-type": "text/plain"})
+        return UploadFile(file=BytesIO(data), filename=name, headers=headers)
+
+    async def scenario():
+        files = [
+            upload("a.txt", b"Email: john@gmail.com"),
+            upload("b.txt", b"hi"),
+            upload("c.txt", b"slow"),
+        ]
+        response = await main.process_batch(
+            files=files, output_format="ndjson", return_pdf=False, token=None, user_token=None
+        )
+        body = response.body_iterator
+        first = json.loads(await body.__anext__())
+        # Let the second item finish unsent, then disconnect.
+        await asyncio.sleep(0.2)
+        await body.aclose()
+        return first
+
+    before = main._BATCH_ABANDONED.value()
+    first = asyncio.run(scenario())
+    assert sorted(logged) == [0, 1]
+    assert first["index"] in (0, 1)
+    assert main._BATCH_ABANDONED.value() == before + 1
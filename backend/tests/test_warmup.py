@@ -0,0 +1,64 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from warmup import WarmupState, run_warmup
+
+
+def test_run_warmup_times_every_stage_and_survives_failures(monkeypatch):
+    import warmup
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("tesseract missing")
+
+    monkeypatch.setattr(warmup, "extract_text_and_boxes", broken)
+    state = run_warmup()
+    assert {"ner", "redact_text", "render_pdf", "ocr_image", "redact_image", "total"} <= set(
+        state.timings
+    )
+    assert state.errors["ocr_image"] == "tesseract missing"
+    assert "ner" not in state.errors
+
+
+def test_ready_turns_200_after_warmup(app_factory, monkeypatch):
+    app = app_factory()
+    import main
+
+    calls = []
+
+    def fake_warmup():
+        calls.append(1)
+        return WarmupState(timings={"ner": 0.01, "total": 0.01})
+
+    monkeypatch.setattr(main, "run_warmup", fake_warmup)
+    client = TestClient(app)
+    # No lifespan has run, so nothing has been warmed.
+    assert client.get("/ready").status_code == 503
+    assert client.get("/health").status_code == 200
+
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 5
+        response = client.get("/ready")
+        while response.status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["warmup_ms"]["ner"] == 10.0
+    assert calls == [1]
+
+
+def test_ready_without_warmup(app_factory, monkeypatch):
+    app = app_factory({"WARMUP_ENABLED": "false"})
+    import main
+
+    def unexpected():
+        raise AssertionError("warmup should be skipped")
+
+    monkeypatch.setattr(main, "run_warmup", unexpected)
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 5
+        while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["warmup_errors"] == {}
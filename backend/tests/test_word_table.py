@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+
+from media_redaction import redact_image_bytes
+from word_table import BoxTable, WordTable
+
+
+def _tesseract_data(words):
+    return {
+        "text": words,
+        "left": [10 * i for i in range(len(words))],
+        "top": [5] * len(words),
+        "width": [8] * len(words),
+        "height": [4] * len(words),
+    }
+
+
+def test_from_tesseract_offsets_match_joined_text():
+    table = WordTable.from_tesseract(_tesseract_data(["Name", "", "John", " ", "Doe"]), 0, 0)
+    text = " ".join(table.text)
+
+    assert text == "Name John Doe"
+    for word, start, end in zip(table.text, table.start.tolist(), table.end.tolist()):
+        assert text[start:end] == word
+
+
+def test_concat_and_shift_offsets_across_pages():
+    first = WordTable.from_tesseract(_tesseract_data(["Page", "one"]), 0, 0)
+    second = WordTable.from_tesseract(_tesseract_data(["Page", "two"]), 1, 0)
+    second.shift_offsets(len("Page one") + 2)
+    table = WordTable.concat([first, second])
+
+    text = "Page one\n\nPage two"
+    assert len(table) == 4
+    assert table.page.tolist() == [0, 0, 1, 1]
+    assert [text[s:e] for s, e in zip(table.start.tolist(), table.end.tolist())] == table.text
+
+
+def test_take_serialises_to_box_json_shape():
+    table = WordTable.from_tesseract(_tesseract_data(["PAN", "ABCDE1234F"]), 2, 0)
+    boxes = table.take([1], ["PAN"])
+
+    assert boxes.to_records() == [
+        {"x": 10, "y": 5, "w": 8, "h": 4, "page": 2, "type": "PAN", "start": 4, "end": 14}
+    ]
+
+
+def test_rects_filters_by_page_and_empty_boxes():
+    boxes = BoxTable(
+        type=["A", "B", "C"], x=[1, 2, 3], y=[1, 2, 3], w=[5, 0, 5], h=[5, 5, 5], page=[0, 0, 1]
+    )
+
+    assert boxes.rects() == [(1, 1, 5, 5), (3, 3, 5, 5)]
+    assert boxes.rects(page=1) == [(3, 3, 5, 5)]
+
+
+def test_redact_image_bytes_accepts_box_table():
+    image = np.full((20, 20, 3), 255, dtype=np.uint8)
+    ok, encoded = cv2.imencode(".png", image)
+    assert ok
+    boxes = BoxTable(type=["PAN"], x=[2], y=[2], w=[5], h=[5], page=[0])
+
+    redacted = cv2.imdecode(
+        np.frombuffer(redact_image_bytes(encoded.tobytes(), boxes), dtype=np.uint8),
+        cv2.IMREAD_COLOR,
+    )
+
+    assert redacted[4, 4].tolist() == [0, 0, 0]
+    assert redacted[15, 15].tolist() == [255, 255, 255]
+
+
+def test_span_indices_returns_covered_words_only():
+    table = WordTable.from_tesseract(_tesseract_data(["Name", "John", "Doe", "Doe"]), 0, 0)
+
+    assert list(table.span_indices(5, 13)) == [1, 2]
+    assert list(table.span_indices(14, 17)) == [3]
+    assert list(table.span_indices(6, 7)) == [1]
+    assert list(table.span_indices(100, 110)) == []
+
+
+def test_pii_word_indices_maps_detected_occurrence():
+    from main import _pii_word_indices
+
+    table = WordTable.from_tesseract(_tesseract_data(["Doe", "and", "Doe"]), 0, 0)
+
+    assert _pii_word_indices(table, {"value": "Doe", "start": 8, "end": 11}) == [2]
+    assert _pii_word_indices(table, {"value": "Doe"}) == [0, 2]
@@ -0,0 +1,98 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from metrics import REGISTRY
+
+
+T = TypeVar("T")
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "pii_stage_seconds", "Time spent in each processing stage", ["stage"]
+)
+
+_CURRENT: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    # Per-request stage durations. Plain data so it can cross a process pool
+    # boundary; a stage entered several times (OCR per page) keeps every run.
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = {}
+        self.started = time.perf_counter()
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.durations.setdefault(stage, []).append(seconds)
+
+    def merge(self, other: "StageTimer") -> None:
+        for stage, values in other.durations.items():
+            self.durations.setdefault(stage, []).extend(values)
+
+    def totals(self) -> Dict[str, float]:
+        return {stage: sum(values) for stage, values in self.durations.items()}
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        # Server-Timing header value; durations are in milliseconds.
+        parts = [
+            f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.totals().items()
+        ]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def to_payload(self) -> dict:
+        return {
+            "total_ms": round(self.elapsed() * 1000, 1),
+            "stages": {
+                name: {"ms": round(sum(values) * 1000, 1), "count": len(values)}
+                for name, values in self.durations.items()
+            },
+        }
+
+    def observe(self) -> None:
+        for stage, values in self.durations.items():
+            for seconds in values:
+                STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def activate(timer: Optional[StageTimer]) -> Iterator[Optional[StageTimer]]:
+    token = _CURRENT.set(timer)
+    try:
+        yield timer
+    finally:
+        _CURRENT.reset(token)
+
+
+def record(stage: str, seconds: float) -> None:
+    timer = _CURRENT.get()
+    if timer is not None:
+        timer.add(stage, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    timer = _CURRENT.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+def call_timed(fn: Callable[..., T], *args, **kwargs) -> Tuple[T, StageTimer]:
+    # Runs in an executor, where the caller's context is not visible: collect
+    # into a fresh timer and hand it back for the caller to merge.
+    with activate(StageTimer()) as timer:
+        return fn(*args, **kwargs), timer
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+
+@dataclass
+class _CachedUser:
+    user: dict
+    expires_at: float
+
+
+class TokenCache:
+    # token -> user for recently seen API tokens, so an authenticated request
+    # does not need a database round-trip. An entry lives for `ttl_seconds`
+    # at most and never past the token's own expiry; the least recently used
+    # entries go first once `max_entries` is reached. Invalidation only
+    # reaches this process, so other workers may accept a revoked token for
+    # up to `ttl_seconds`. `max_entries=0` disables the cache.
+    #
+    # Every invalidation bumps `generation`. A caller that reads the database
+    # takes the generation first and passes it to put(), which drops the entry
+    # if an invalidation happened in between, so a concurrent logout cannot be
+    # overwritten with the row it just revoked.
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _CachedUser]" = OrderedDict()
+        self._generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return dict(entry.user)
+
+    def put(
+        self,
+        token: str,
+        user: dict,
+        token_expires_at: Optional[datetime] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        lifetime = float(self.ttl_seconds)
+        if token_expires_at is not None:
+            remaining = (token_expires_at - datetime.now(timezone.utc)).total_seconds()
+            lifetime = min(lifetime, remaining)
+        if lifetime <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[token] = _CachedUser(dict(user), time.monotonic() + lifetime)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_token(self, token: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(token, None)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            stale = [token for token, entry in self._entries.items() if entry.user["id"] == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
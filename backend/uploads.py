@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import BinaryIO, Callable, Optional
+
+from fastapi import HTTPException
+
+from encryption import StreamEncryptor
+from timing import record
+
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class SpooledUpload:
+    # One pass over an upload: the raw bytes go to a spooled temp buffer
+    # (memory first, disk past `max_memory`) and the SHA-256 is computed
+    # along the way. When encrypting, the same pass also writes the encrypted
+    # copy to a temp blob, which store() renames into place or discards on a
+    # dedup hit; otherwise store() copies the spool.
+
+    def __init__(self, spool: BinaryIO, size: int, sha256: str, encrypted_temp: Optional[str] = None):
+        self._spool = spool
+        self._encrypted_temp = encrypted_temp
+        self.size = size
+        self.sha256 = sha256
+        self.stored_path: Optional[str] = None
+        self.encrypted = False
+        self.deduplicated = False
+
+    @property
+    def plain_path(self) -> Optional[str]:
+        # The stored copy doubles as the OCR source when it is not encrypted.
+        return None if self.encrypted else self.stored_path
+
+    def open(self) -> BinaryIO:
+        self._spool.seek(0)
+        return self._spool
+
+    def read(self) -> bytes:
+        return self.open().read()
+
+    def copy_to(self, path: str) -> None:
+        with open(path, "wb") as out:
+            shutil.copyfileobj(self.open(), out, CHUNK_SIZE)
+
+    def store(self, path: str, encrypt: bool) -> bool:
+        # Identical bytes map to the same path, so an existing blob is reused
+        # as is: no write and no re-encryption. Its mtime is bumped so
+        # retention counts from the latest upload. Returns True if written.
+        self.stored_path = path
+        self.encrypted = encrypt
+        if os.path.exists(path):
+            os.utime(path)
+            self.deduplicated = True
+            self._discard_encrypted_temp()
+            return False
+        if encrypt and self._encrypted_temp is not None:
+            os.replace(self._encrypted_temp, path)
+            self._encrypted_temp = None
+            return True
+
+        started = time.perf_counter()
+        encryptor = StreamEncryptor() if encrypt else None
+        temp_path = f"{path}.part-{uuid.uuid4().hex}"
+        try:
+            with open(temp_path, "wb") as stored:
+                if encryptor is not None:
+                    stored.write(encryptor.header())
+                source = self.open()
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    stored.write(encryptor.update(chunk) if encryptor is not None else chunk)
+                if encryptor is not None:
+                    stored.write(encryptor.finalize())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        record("encrypt" if encryptor is not None else "store", time.perf_counter() - started)
+        return True
+
+    def _discard_encrypted_temp(self) -> None:
+        temp_path, self._encrypted_temp = self._encrypted_temp, None
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    def close(self) -> None:
+        self._discard_encrypted_temp()
+        self._spool.close()
+
+
+def spool_upload(
+    source: BinaryIO,
+    max_bytes: int,
+    max_memory: int = 2 * CHUNK_SIZE,
+    encrypt_dir: Optional[str] = None,
+) -> SpooledUpload:
+    # `encrypt_dir` also writes an encrypted copy there in the same pass;
+    # it should be the blob directory so store() can rename it into place.
+    started = time.perf_counter()
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    digest = hashlib.sha256()
+    size = 0
+    encryptor = None
+    encrypted = None
+    encrypted_temp = None
+    encrypt_seconds = 0.0
+    try:
+        if encrypt_dir is not None:
+            encryptor = StreamEncryptor()
+            encrypted_temp = os.path.join(encrypt_dir, f".part-{uuid.uuid4().hex}")
+            encrypted = open(encrypted_temp, "wb")
+            encrypted.write(encryptor.header())
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge()
+            digest.update(chunk)
+            spool.write(chunk)
+            if encryptor is not None:
+                began = time.perf_counter()
+                encrypted.write(encryptor.update(chunk))
+                encrypt_seconds += time.perf_counter() - began
+        if encryptor is not None:
+            encrypted.write(encryptor.finalize())
+            encrypted.close()
+    except BaseException:
+        spool.close()
+        if encrypted is not None:
+            encrypted.close()
+            os.remove(encrypted_temp)
+        raise
+
+    elapsed = time.perf_counter() - started
+    if encryptor is not None:
+        record("encrypt", encrypt_seconds)
+    record("upload_read", elapsed - encrypt_seconds)
+    return SpooledUpload(spool, size, digest.hexdigest(), encrypted_temp)
+
+
+class UploadSizeLimitMiddleware:
+    # Rejects oversized upload requests with 413 before the multipart body
+    # is buffered: first on Content-Length, then on the bytes actually read
+    # for chunked or mislabelled requests.
+
+    def __init__(self, app, limit_for_path: Callable[[str], Optional[int]]):
+        self.app = app
+        self.limit_for_path = limit_for_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        limit = self.limit_for_path(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None:
+            try:
+                if int(content_length) > limit:
+                    await self._reject(send)
+                    return
+            except ValueError:
+                pass
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so
+                    # this surfaces as a normal 413 response.
+                    raise HTTPException(status_code=413, detail="File too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send) -> None:
+        body = json.dumps({"detail": "File too large"}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,139 @@
+import importlib
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, TypeVar
+
+import numpy as np
+
+from config import CONFIG
+from lazy_import import lazy_module
+from media_redaction import redact_image_bytes, redact_pdf_with_boxes
+from ocr import extract_pdf_page, extract_text_and_boxes
+from pdf_generator import generate_redacted_pdf
+from pii_detector import detect_pii, get_nlp
+from redaction import redact_text
+from word_table import BoxTable
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+cv2 = lazy_module("cv2")
+
+# Everything the processing stages import lazily; see preload().
+_HEAVY_MODULES = (
+    "cv2",
+    "pytesseract",
+    "pdf2image",
+    "PIL.Image",
+    "reportlab.platypus",
+    "docx",
+)
+
+_SAMPLE_TEXT = "Name: Ravi Kumar\nPAN: ABCDE1234F\nEmail: ravi@example.com\nPhone: 9876543210"
+
+_SAMPLE_BOXES = BoxTable.from_records(
+    [{"type": "PAN", "x": 20, "y": 50, "w": 300, "h": 30, "page": 0, "start": 0, "end": 3}]
+)
+
+
+@dataclass
+class WarmupState:
+    ready: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def to_payload(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warmup_ms": {name: round(seconds * 1000, 1) for name, seconds in self.timings.items()},
+            "warmup_errors": self.errors,
+        }
+
+
+def preload() -> None:
+    # Imports the heavy libraries and loads the NER model without running
+    # anything, e.g. in a pre-fork master or a new pool process. Missing
+    # optional libraries are left for the request that needs them to report.
+    for name in _HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as exc:
+            logger.warning("Could not preload %s: %s", name, exc)
+    if CONFIG.enable_rag_stub:
+        importlib.import_module("rag_service")
+    get_nlp()
+
+
+def _sample_png() -> bytes:
+    image = np.full((220, 900, 3), 255, dtype=np.uint8)
+    for index, line in enumerate(_SAMPLE_TEXT.splitlines()):
+        cv2.putText(
+            image, line, (20, 45 + index * 45), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2
+        )
+    _, encoded = cv2.imencode(".png", image)
+    return encoded.tobytes()
+
+
+def _write(path: str, data: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _step(
+    state: WarmupState, name: str, fn: Callable[..., T], *args, **kwargs
+) -> Optional[T]:
+    # A stage that fails here (say tesseract is not installed) is logged and
+    # skipped; real requests will fail the same way, but the rest still warms.
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    except Exception as exc:
+        state.errors[name] = str(exc) or type(exc).__name__
+        logger.warning("Warmup stage %s failed: %s", name, exc)
+        return None
+    finally:
+        state.timings[name] = time.perf_counter() - started
+
+
+def run_warmup(state: Optional[WarmupState] = None) -> WarmupState:
+    # Pushes a synthetic document through every stage so first-call costs
+    # (NER model, tesseract traineddata, poppler, reportlab fonts, the policy
+    # index) are paid at startup rather than by the first request.
+    state = state if state is not None else WarmupState()
+    started = time.perf_counter()
+    use_preprocess = CONFIG.use_preprocess
+
+    _step(state, "import", preload)
+    pii_data = _step(state, "ner", detect_pii, _SAMPLE_TEXT) or []
+    redacted = _step(state, "redact_text", redact_text, _SAMPLE_TEXT, pii_data) or _SAMPLE_TEXT
+    pdf_bytes = _step(state, "render_pdf", generate_redacted_pdf, redacted, output_path=None)
+    png_bytes = _step(state, "render_image", _sample_png)
+
+    with tempfile.TemporaryDirectory(prefix="pii-warmup-") as workdir:
+        if png_bytes:
+            image_path = _write(os.path.join(workdir, "sample.png"), png_bytes)
+            _step(state, "ocr_image", extract_text_and_boxes, image_path, use_preprocess=use_preprocess)
+            _step(state, "redact_image", redact_image_bytes, png_bytes, _SAMPLE_BOXES)
+        if pdf_bytes:
+            pdf_path = _write(os.path.join(workdir, "sample.pdf"), pdf_bytes)
+            _step(state, "ocr_pdf", extract_pdf_page, pdf_path, 0, use_preprocess=use_preprocess)
+            _step(state, "redact_pdf", redact_pdf_with_boxes, pdf_path, _SAMPLE_BOXES)
+
+    if CONFIG.enable_rag_stub:
+        from rag_service import ensure_policy_index
+
+        _step(state, "policy_index", ensure_policy_index)
+
+    state.timings["total"] = time.perf_counter() - started
+    logger.info(
+        "Warmup finished in %.0f ms (%s)",
+        state.timings["total"] * 1000,
+        ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in state.timings.items()),
+    )
+    return state
@@ -0,0 +1,186 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+_COLUMNS = ("x", "y", "w", "h", "page", "start", "end")
+_DTYPE = np.int32
+
+
+def _column(values) -> np.ndarray:
+    return np.asarray(values if values is not None else [], dtype=_DTYPE)
+
+
+class WordTable:
+    # OCR words stored column-wise: one text list plus one int array per field.
+    __slots__ = ("text",) + _COLUMNS
+
+    def __init__(
+        self,
+        text: Optional[List[str]] = None,
+        x=None,
+        y=None,
+        w=None,
+        h=None,
+        page=None,
+        start=None,
+        end=None,
+    ):
+        self.text = list(text) if text is not None else []
+        self.x = _column(x)
+        self.y = _column(y)
+        self.w = _column(w)
+        self.h = _column(h)
+        self.page = _column(page)
+        self.start = _column(start)
+        self.end = _column(end)
+
+    @classmethod
+    def empty(cls) -> "WordTable":
+        return cls()
+
+    @classmethod
+    def from_tesseract(
+        cls, data: dict, page_index: int, base_offset: int, dx: int = 0, dy: int = 0
+    ) -> "WordTable":
+        texts = data["text"]
+        keep = [i for i, word in enumerate(texts) if word.strip() != ""]
+        if not keep:
+            return cls.empty()
+
+        words = [texts[i] for i in keep]
+        lengths = np.fromiter((len(word) for word in words), dtype=np.int64, count=len(words))
+        # Words are joined by single spaces; a leading space separates this
+        # block from any text that precedes it.
+        lead = 1 if base_offset else 0
+        start = base_offset + lead + np.concatenate(([0], np.cumsum(lengths[:-1] + 1)))
+        end = start + lengths
+        return cls(
+            text=words,
+            x=np.asarray([data["left"][i] for i in keep]) + dx,
+            y=np.asarray([data["top"][i] for i in keep]) + dy,
+            w=[data["width"][i] for i in keep],
+            h=[data["height"][i] for i in keep],
+            page=np.full(len(words), page_index),
+            start=start,
+            end=end,
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "WordTable":
+        records = list(records)
+        return cls(
+            text=[r["text"] for r in records],
+            **{col: [r.get(col, 0) for r in records] for col in _COLUMNS},
+        )
+
+    @classmethod
+    def concat(cls, tables: Sequence["WordTable"]) -> "WordTable":
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls.empty()
+        if len(tables) == 1:
+            return tables[0]
+        text: List[str] = []
+        for t in tables:
+            text.extend(t.text)
+        return cls(
+            text=text,
+            **{col: np.concatenate([getattr(t, col) for t in tables]) for col in _COLUMNS},
+        )
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def shift_offsets(self, delta: int) -> None:
+        if delta:
+            self.start += delta
+            self.end += delta
+
+    def span_indices(self, start: int, end: int) -> range:
+        # Words are laid out in text order, so both offset columns are sorted
+        # and the covered words form one contiguous run found by bisection.
+        lo = int(np.searchsorted(self.end, start, side="right"))
+        hi = int(np.searchsorted(self.start, end, side="left"))
+        return range(lo, max(lo, hi))
+
+    def take(self, indices: Sequence[int], types: Sequence[str]) -> "BoxTable":
+        idx = np.asarray(indices, dtype=np.intp)
+        return BoxTable(
+            type=types,
+            **{col: getattr(self, col)[idx] for col in _COLUMNS},
+        )
+
+    def to_records(self) -> List[dict]:
+        cols = [getattr(self, col).tolist() for col in _COLUMNS]
+        return [
+            {"text": text, **dict(zip(_COLUMNS, values))}
+            for text, values in zip(self.text, zip(*cols))
+        ]
+
+
+class BoxTable:
+    # Redaction boxes: the word columns plus the PII type of each box.
+    __slots__ = ("type",) + _COLUMNS
+
+    def __init__(self, type=None, x=None, y=None, w=None, h=None, page=None, start=None, end=None):
+        self.type = list(type) if type is not None else []
+        self.x = _column(x)
+        self.y = _column(y)
+        self.w = _column(w)
+        self.h = _column(h)
+        self.page = _column(page)
+        self.start = _column(start)
+        self.end = _column(end)
+
+    @classmethod
+    def empty(cls) -> "BoxTable":
+        return cls()
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "BoxTable":
+        records = list(records)
+        return cls(
+            type=[r.get("type", "") for r in records],
+            **{col: [r.get(col) or 0 for r in records] for col in _COLUMNS},
+        )
+
+    def __len__(self) -> int:
+        return len(self.type)
+
+    def rects(self, page: Optional[int] = None) -> List[Tuple[int, int, int, int]]:
+        mask = (self.w > 0) & (self.h > 0)
+        if page is not None:
+            mask &= self.page == page
+        return list(
+            zip(
+                self.x[mask].tolist(),
+                self.y[mask].tolist(),
+                self.w[mask].tolist(),
+                self.h[mask].tolist(),
+            )
+        )
+
+    def to_records(self) -> List[dict]:
+        cols = [getattr(self, col).tolist() for col in ("x", "y", "w", "h", "page")]
+        starts = self.start.tolist()
+        ends = self.end.tolist()
+        return [
+            {
+                "x": x,
+                "y": y,
+                "w": w,
+                "h": h,
+                "page": page,
+                "type": pii_type,
+                "start": start,
+                "end": end,
+            }
+            for (x, y, w, h, page), pii_type, start, end in zip(zip(*cols), self.type, starts, ends)
+        ]
+
+
+def as_box_table(boxes) -> BoxTable:
+    if isinstance(boxes, BoxTable):
+        return boxes
+    return BoxTable.from_records(boxes or [])
@@ -0,0 +1,128 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from timing import call_timed, current_timer
+
+
+T = TypeVar("T")
+
+_LOCK = threading.Lock()
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+_THREAD_POOL: Optional[ThreadPoolExecutor] = None
+_CPU_THREAD_POOL: Optional[ThreadPoolExecutor] = None
+
+
+def _init_process_worker() -> None:
+    # Imports the OCR/rendering libraries and loads the NER model once per
+    # pool worker instead of on the first task it receives.
+    from warmup import preload, run_warmup
+
+    if _get_config().warmup_enabled:
+        run_warmup()
+    else:
+        preload()
+
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+
+def _get_config():
+    # Resolve config at call time so tests that reload config pick it up.
+    from config import CONFIG
+
+    return CONFIG
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _THREAD_POOL
+    with _LOCK:
+        if _THREAD_POOL is None:
+            _THREAD_POOL = ThreadPoolExecutor(
+                max_workers=_get_config().io_pool_size, thread_name_prefix="pii-io"
+            )
+        return _THREAD_POOL
+
+
+def get_cpu_thread_pool() -> ThreadPoolExecutor:
+    # Separate from the I/O pool so a burst of OCR/NER work cannot hold every
+    # thread that token lookups and log writes need.
+    global _CPU_THREAD_POOL
+    with _LOCK:
+        if _CPU_THREAD_POOL is None:
+            _CPU_THREAD_POOL = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1, thread_name_prefix="pii-cpu"
+            )
+        return _CPU_THREAD_POOL
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    global _PROCESS_POOL
+    config = _get_config()
+    if config.process_pool_size <= 0:
+        return None
+    with _LOCK:
+        if _PROCESS_POOL is None:
+            _PROCESS_POOL = ProcessPoolExecutor(
+                max_workers=config.process_pool_size,
+                mp_context=multiprocessing.get_context(config.process_start_method),
+                initializer=_init_process_worker,
+            )
+        return _PROCESS_POOL
+
+
+def _cpu_executor() -> Executor:
+    return get_process_pool() or get_cpu_thread_pool()
+
+
+async def _run_in(executor: Executor, fn: Callable[..., T], *args, **kwargs) -> T:
+    loop = asyncio.get_running_loop()
+    timer = current_timer()
+    if timer is None:
+        return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+    # Stage timings recorded inside `fn` come back with the result.
+    result, child = await loop.run_in_executor(
+        executor, functools.partial(call_timed, fn, *args, **kwargs)
+    )
+    timer.merge(child)
+    return result
+
+
+async def run_cpu(fn: Callable[..., T], *args, **kwargs) -> T:
+    # CPU-bound stages (OCR, NER, rendering). Runs in the process pool when
+    # one is configured, otherwise on the CPU thread pool so the event loop
+    # is never blocked. `fn` and its arguments must be picklable in pool mode.
+    return await _run_in(_cpu_executor(), fn, *args, **kwargs)
+
+
+async def run_io(fn: Callable[..., T], *args, **kwargs) -> T:
+    return await _run_in(get_thread_pool(), fn, *args, **kwargs)
+
+
+def start_pools() -> None:
+    get_thread_pool()
+    pool = get_process_pool()
+    if pool is None:
+        get_cpu_thread_pool()
+        return
+    # Submitting one task per slot makes the pool spawn its workers (and run
+    # the model-loading initializer) now rather than under the first request.
+    futures = [pool.submit(_worker_pid) for _ in range(_get_config().process_pool_size)]
+    for future in futures:
+        future.result()
+
+
+def shutdown_pools() -> None:
+    global _PROCESS_POOL, _THREAD_POOL, _CPU_THREAD_POOL
+    with _LOCK:
+        process_pool, _PROCESS_POOL = _PROCESS_POOL, None
+        thread_pool, _THREAD_POOL = _THREAD_POOL, None
+        cpu_pool, _CPU_THREAD_POOL = _CPU_THREAD_POOL, None
+    for pool in (process_pool, cpu_pool, thread_pool):
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)